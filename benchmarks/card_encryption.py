@@ -0,0 +1,115 @@
+"""
+Card encryption throughput for Flutterwave direct charges.
+
+    python -m benchmarks.card_encryption
+    python -m benchmarks.card_encryption --cards 50000 --batch 500
+
+Encrypts ``--cards`` card payloads (number, expiry month and year, CVV under
+one nonce) three ways:
+
+    per field   what ``FlutterWaveView.post`` did before: a new AESGCM for
+                every field and a nonce from ``secrets.choice`` per character
+    per card    ``encryptor_for(key).encrypt_card``, one payload per call
+    batch       ``encrypt_many``, ``--batch`` payloads per call
+
+and the nonces alone, ``secrets.choice`` per character against
+``AESEncryptor.generate_nonces``. Every payload is decrypted again to check
+the ciphertexts. No provider is called.
+"""
+import argparse
+import base64
+import json
+import secrets
+import string
+import sys
+import time
+
+from .harness import configure
+
+CARD = {"card_number": "4111111111111111", "expiry_month": "09", "expiry_year": "26", "cvv": "123"}
+
+
+def per_field(key, card):
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+    characters = string.ascii_letters + string.digits
+    nonce = "".join(secrets.choice(characters) for _ in range(12))
+    encrypted = {"nonce": nonce}
+    for field, value in card.items():
+        cipher_text = AESGCM(key).encrypt(nonce.encode(), value.encode(), None)
+        encrypted[f"encrypted_{field}"] = base64.b64encode(cipher_text).decode()
+    return encrypted
+
+
+def timed(run, cards):
+    start = time.perf_counter()
+    payloads = run()
+    elapsed = time.perf_counter() - start
+    return payloads, {"seconds": round(elapsed, 3), "cards_per_s": round(cards / elapsed)}
+
+
+def decrypts(key, payload):
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+    nonce = payload["nonce"].encode()
+    return all(
+        AESGCM(key).decrypt(nonce, base64.b64decode(payload[f"encrypted_{field}"]), None).decode() == value
+        for field, value in CARD.items()
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cards", type=int, default=20_000)
+    parser.add_argument("--batch", type=int, default=100, help="payloads per encrypt_many call")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    # Only for the settings; nothing is sent
+    configure("http://127.0.0.1:9")
+
+    from django.conf import settings
+
+    from flutterwave.api.services import AESEncryptor, encryptor_for
+
+    key = base64.b64decode(settings.FLUTTERWAVE_ENCRYPTION_KEY)
+    aes = encryptor_for(settings.FLUTTERWAVE_ENCRYPTION_KEY)
+    cards = [dict(CARD) for _ in range(args.cards)]
+
+    results, checked = {}, {}
+    runs = {
+        "per field": lambda: [per_field(key, card) for card in cards],
+        "per card": lambda: [aes.encrypt_card(card) for card in cards],
+        "batch": lambda: [
+            payload for i in range(0, len(cards), args.batch) for payload in aes.encrypt_many(cards[i:i + args.batch])
+        ],
+    }
+    for name, run in runs.items():
+        payloads, results[name] = timed(run, args.cards)
+        checked[name] = all(decrypts(key, payload) for payload in payloads[:1000])
+        nonces = {payload["nonce"] for payload in payloads}
+        checked[name] = checked[name] and len(nonces) == len(payloads)
+
+    characters = string.ascii_letters + string.digits
+    _, results["nonces: secrets.choice"] = timed(
+        lambda: ["".join(secrets.choice(characters) for _ in range(12)) for _ in range(args.cards)], args.cards
+    )
+    _, results["nonces: generate_nonces"] = timed(lambda: AESEncryptor.generate_nonces(args.cards), args.cards)
+
+    ok = all(checked.values())
+    if args.json:
+        print(json.dumps({"cards": args.cards, "batch": args.batch, "results": results, "decrypted": ok}, indent=2))
+    else:
+        base = results["per field"]["cards_per_s"]
+        print(f"\n{args.cards:,} card payloads, batches of {args.batch}")
+        print(f"{'':<26}{'seconds':>10}{'cards/s':>12}{'speedup':>10}")
+        for name, r in results.items():
+            reference = results["nonces: secrets.choice"]["cards_per_s"] if name.startswith("nonces") else base
+            print(f"{name:<26}{r['seconds']:>10}{r['cards_per_s']:>12,}{r['cards_per_s'] / reference:>9.1f}x")
+        print(f"decrypted and unique nonces: {ok}")
+    if not ok:
+        sys.exit("Some payloads did not decrypt to the card, or nonces repeated")
+
+
+if __name__ == "__main__":
+    main()
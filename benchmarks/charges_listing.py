@@ -0,0 +1,99 @@
+"""
+Flutterwave charge listing: paging the remote ``/charges`` against the local
+charge mirror.
+
+    python -m benchmarks.charges_listing
+    python -m benchmarks.charges_listing --charges 20000 --latency 0.08 --requests 500
+
+Seeds the simulator with ``--charges`` charges spread over ``--days`` days
+and times the same dashboard query through the gateway both ways: the
+succeeded charges of the last 30 days, a page of 50 at a time, walking
+through the pages. The remote path runs with FLUTTERWAVE_CHARGE_MIRROR off,
+so every query pages through the simulator; the local path first syncs the
+mirror (timed on its own) and then answers from indexed tables. Both must
+report the same totals and the same first page.
+"""
+import argparse
+import datetime
+import json
+import sys
+import time
+
+from .harness import configure, peak_rss_mb, run_threads, summarize
+from .simulator import ProviderSimulator
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--charges", type=int, default=10_000)
+    parser.add_argument("--days", type=int, default=90, help="the charges span this many days up to now")
+    parser.add_argument("--requests", type=int, default=200, help="measured listings per path")
+    parser.add_argument("--concurrency", type=int, default=8, help="worker threads")
+    parser.add_argument("--latency", default="0.05", help="provider latency distribution")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    simulator = ProviderSimulator(latency=args.latency, seed=args.seed, seed_customers=50).start_in_thread()
+    simulator.providers["flutterwave"].seed(charges=args.charges, span=datetime.timedelta(days=args.days))
+    configure(simulator.base_url)
+
+    from django.test.utils import override_settings
+
+    from flutterwave.api.charges import charge_mirror, timestamp
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    query = {
+        "status": "succeeded", "size": 50,
+        "from": timestamp(now - datetime.timedelta(days=30)), "to": timestamp(now),
+    }
+
+    def listing(client, page):
+        return client.get("/flutterwave/v1/charges/", {**query, "page": page})
+
+    def first_page():
+        from django.test import Client
+        return json.loads(listing(Client(), 1).content)["data"]
+
+    results = {}
+    with override_settings(FLUTTERWAVE_CHARGE_MIRROR=False):
+        remote = first_page()
+        pages = remote["meta"]["page_info"]["total_pages"]
+        calls = simulator.routes["flutterwave.charge_list"]
+        results["remote"] = summarize(*run_threads(lambda c, i: listing(c, i % pages + 1), args.requests, args.concurrency))
+        results["remote"]["upstream_calls"] = simulator.routes["flutterwave.charge_list"] - calls
+
+    calls = simulator.routes["flutterwave.charge_list"]
+    start = time.perf_counter()
+    charge_mirror.ensure_ready()
+    sync = {"seconds": round(time.perf_counter() - start, 2),
+            "upstream_calls": simulator.routes["flutterwave.charge_list"] - calls}
+
+    local = first_page()
+    calls = simulator.routes["flutterwave.charge_list"]
+    results["local"] = summarize(*run_threads(lambda c, i: listing(c, i % pages + 1), args.requests, args.concurrency))
+    results["local"]["upstream_calls"] = simulator.routes["flutterwave.charge_list"] - calls
+
+    same = (
+        remote["meta"]["page_info"] == local["meta"]["page_info"]
+        and [c["id"] for c in remote["data"]] == [c["id"] for c in local["data"]]
+    )
+    if args.json:
+        print(json.dumps({"query": query, "matches": remote["meta"]["page_info"]["total"],
+                          "same_results": same, "initial_sync": sync, "results": results,
+                          "peak_rss_mb": peak_rss_mb()}, indent=2))
+    else:
+        print(f"\n{args.charges:,} charges over {args.days} days; {remote['meta']['page_info']['total']:,} "
+              f"match the 30-day query ({pages} pages of 50)")
+        print(f"initial mirror sync: {sync['seconds']}s, {sync['upstream_calls']} upstream calls")
+        print(f"{'':<8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'upstream':>10}{'err':>6}")
+        for name, r in results.items():
+            print(f"{name:<8}{r['rps']:>10}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}"
+                  f"{r['upstream_calls']:>10}{r['errors']:>6}")
+        print(f"same results: {same}")
+    if not same:
+        sys.exit("The local listing differs from the remote one")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+End-to-end benchmark of every gateway route under flutterwave/v1/,
+mpesa/v1/, sasapay/v1/ and sasapay-tz/v1/ against the provider simulator.
+
+    python -m benchmarks.endpoints                       # run and print
+    python -m benchmarks.endpoints --save                # refresh the baseline
+    python -m benchmarks.endpoints --compare             # exit 1 on regression or unbaselined route
+    python -m benchmarks.endpoints --only stk-push --only charges --mode asgi
+
+Each route runs in its own subprocess so peak RSS, pools and tokens are
+per endpoint. Reported per route: requests/sec, p50/p95/p99 latency, errors,
+outbound provider connections opened during the measured run (from the
+gateway's http metrics) and peak RSS of the worker process.
+
+Baselines live in benchmarks/baselines/endpoints-<mode>.json. They are
+only comparable on the same machine with the same options; --compare warns
+when the options differ, and fails on routes the baseline doesn't cover.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+from pathlib import Path
+
+from .harness import configure, peak_rss_mb, run_async, run_threads, summarize
+from .scenarios import SCENARIOS
+from .simulator import ProviderSimulator
+
+PREFIXES = ("flutterwave/v1/", "mpesa/v1/", "sasapay/v1/", "sasapay-tz/v1/")
+BASELINES = Path(__file__).resolve().parent / "baselines"
+
+# Absolute slack on top of the relative tolerance, so near-zero numbers
+# don't flag noise as a regression
+LATENCY_SLACK_MS = 5
+CONNECTION_SLACK = 2
+
+
+def gateway_routes():
+    """
+    ``"<METHOD> <route>"`` for every method of every view under PREFIXES,
+    in urlconf order.
+    """
+    from django.urls import URLResolver, get_resolver
+
+    routes = []
+    for top in get_resolver("intergrations.urls").url_patterns:
+        if not isinstance(top, URLResolver) or str(top.pattern) not in PREFIXES:
+            continue
+        for pattern in top.url_patterns:
+            view = pattern.callback.view_class
+            for method in view.http_method_names:
+                if method not in ("options", "head") and hasattr(view, method):
+                    routes.append(f"{method.upper()} /{top.pattern}{pattern.pattern}")
+    return routes
+
+
+def fill(value, params):
+    if isinstance(value, str) and "{" in value:
+        return value.format_map(params)
+    if isinstance(value, dict):
+        return {k: fill(v, params) for k, v in value.items()}
+    if isinstance(value, list):
+        return [fill(v, params) for v in value]
+    return value
+
+
+def connections_opened():
+    from core import metrics
+
+    return sum(
+        values.get("connections_opened", 0)
+        for name, values in metrics.snapshot().items()
+        if name.startswith(("http.", "http_async."))
+    )
+
+
+def child(args):
+    configure(args.base_url, asgi=args.mode == "asgi")
+
+    method, route = args.child.split(" ", 1)
+    scenario = SCENARIOS[args.child]
+    params = json.loads(args.params)
+    path = fill(scenario.path or route, params)
+
+    def request(client, i):
+        send = getattr(client, method.lower())
+        if method == "GET":
+            return send(path, scenario.query)
+        body = fill(scenario.payload(i), params)
+        return send(
+            path, json.dumps(body) if body is not None else "", content_type="application/json",
+            headers=scenario.request_headers(i),
+        )
+
+    async def request_async(client, i):
+        return await request(client, i)
+
+    # The views print payloads and callbacks; keep them out of the result
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        if args.mode == "wsgi":
+            run_threads(request, args.warmup, args.concurrency)
+            opened = connections_opened()
+            measured = run_threads(lambda c, i: request(c, args.warmup + i), args.requests, args.concurrency)
+        else:
+            run_async(request_async, args.warmup, args.concurrency)
+            opened = connections_opened()
+            measured = run_async(
+                lambda c, i: request_async(c, args.warmup + i), args.requests, args.concurrency
+            )
+        result = summarize(*measured, expect=scenario.expect)
+        result["connections_opened"] = connections_opened() - opened
+
+    result["peak_rss_mb"] = peak_rss_mb()
+    print(json.dumps(result))
+
+
+def regressions(result, baseline, tolerance):
+    problems = []
+    if result["errors"] > baseline["errors"]:
+        problems.append(f"errors {baseline['errors']} -> {result['errors']}")
+    if result["rps"] < baseline["rps"] * (1 - tolerance):
+        problems.append(f"rps {baseline['rps']} -> {result['rps']}")
+    for key in ("p50_ms", "p95_ms", "p99_ms"):
+        if result[key] > baseline[key] * (1 + tolerance) + LATENCY_SLACK_MS:
+            problems.append(f"{key} {baseline[key]} -> {result[key]}")
+    if result["connections_opened"] > baseline["connections_opened"] * (1 + tolerance) + CONNECTION_SLACK:
+        problems.append(f"connections {baseline['connections_opened']} -> {result['connections_opened']}")
+    if result["peak_rss_mb"] > baseline["peak_rss_mb"] * (1 + tolerance):
+        problems.append(f"peak RSS {baseline['peak_rss_mb']} -> {result['peak_rss_mb']} MB")
+    return problems
+
+
+def print_table(results, flagged):
+    width = max(len(name) for name in results)
+    print(f"{'route':<{width}}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'err':>6}{'conns':>7}{'rss MB':>8}")
+    for name, r in results.items():
+        mark = "  <-- regression" if name in flagged else ""
+        print(f"{name:<{width}}{r['rps']:>9}{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}"
+              f"{r['errors']:>6}{r['connections_opened']:>7}{r['peak_rss_mb']:>8}{mark}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["wsgi", "asgi"], default="wsgi")
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per route")
+    parser.add_argument("--warmup", type=int, default=10, help="unmeasured requests per route first")
+    parser.add_argument("--concurrency", type=int, default=16, help="worker threads / in-flight requests")
+    parser.add_argument("--latency", default="0.05", help="provider latency distribution")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--only", action="append", default=[], help="run routes containing this text")
+    parser.add_argument("--baseline", help="baseline file (default benchmarks/baselines/endpoints-<mode>.json)")
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--compare", action="store_true", help="exit 1 if any route regressed")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="relative slack before flagging")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    parser.add_argument("--params", default="{}", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return child(args)
+
+    simulator = ProviderSimulator(
+        latency=args.latency, seed=args.seed, callback_delay="0.05",
+        seed_customers=50, seed_charges=500,
+    ).start_in_thread()
+    simulator.callback_urls["*"] = simulator.sink_url
+    flutterwave = simulator.providers["flutterwave"]
+    params = {"customer_id": next(iter(flutterwave.customers)), "charge_id": next(iter(flutterwave.charges))}
+
+    configure(simulator.base_url)
+    routes = gateway_routes()
+    missing = [route for route in routes if route not in SCENARIOS]
+    if missing:
+        sys.exit("No benchmark scenario for:\n  " + "\n  ".join(missing))
+    if args.only:
+        routes = [route for route in routes if any(text in route for text in args.only)]
+
+    options = {
+        "mode": args.mode, "requests": args.requests, "warmup": args.warmup,
+        "concurrency": args.concurrency, "latency": args.latency, "seed": args.seed,
+    }
+    results = {}
+    for route in routes:
+        # process-payment completes a request-payment the simulator is
+        # already holding; stage one per request
+        sasapay = simulator.providers["sasapay"]
+        for i in range(args.warmup + args.requests):
+            sasapay.pending[f"bench-{i}"] = (simulator.sink_url, {"ResultCode": "0"})
+
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.endpoints", "--child", route,
+             "--base-url", simulator.base_url, "--params", json.dumps(params),
+             "--mode", args.mode, "--requests", str(args.requests), "--warmup", str(args.warmup),
+             "--concurrency", str(args.concurrency)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        results[route] = json.loads(output.strip().splitlines()[-1])
+
+    path = Path(args.baseline) if args.baseline else BASELINES / f"endpoints-{args.mode}.json"
+    flagged = {}
+    if args.compare:
+        baseline = json.loads(path.read_text())
+        if baseline["options"] != options:
+            print(f"warning: baseline was recorded with {baseline['options']}", file=sys.stderr)
+        for route, result in results.items():
+            if route not in baseline["results"]:
+                # Unchecked is not the same as unchanged
+                flagged[route] = ["no baseline recorded (run with --save)"]
+                continue
+            problems = regressions(result, baseline["results"][route], args.tolerance)
+            if problems:
+                flagged[route] = problems
+        if not args.only:
+            for route in sorted(set(baseline["results"]) - set(results)):
+                print(f"warning: baseline has {route}, which no longer exists", file=sys.stderr)
+
+    print_table(results, flagged)
+    for route, problems in flagged.items():
+        print(f"\n{route}: " + "; ".join(problems))
+
+    if args.save:
+        saved = json.loads(path.read_text())["results"] if path.exists() and args.only else {}
+        saved.update(results)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({
+            "options": options,
+            "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                        "cpus": os.cpu_count()},
+            "results": saved,
+        }, indent=2) + "\n")
+        print(f"\nBaseline written to {path}")
+
+    if flagged:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
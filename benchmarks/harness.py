@@ -0,0 +1,138 @@
+"""
+Shared plumbing for benchmarks that drive the gateway in-process.
+"""
+import asyncio
+import atexit
+import os
+import resource
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .simulator import gateway_environ
+
+
+def configure(base_url, asgi=False):
+    """
+    Point the gateway at the simulator on ``base_url`` and set up Django in
+    this process, with a freshly migrated throwaway database for the ledger.
+    """
+    workdir = tempfile.mkdtemp(prefix="gateway-bench-")
+    atexit.register(shutil.rmtree, workdir, ignore_errors=True)
+
+    env = {
+        **gateway_environ(base_url),
+        "MPESA_CONSUMER_KEY": "bench", "MPESA_CONSUMER_SECRET": "bench",
+        "MPESA_PASSKEY": "bench", "SHORT_CODE": "174379",
+        "MPESA_SECURITY_CREDENTIALS": "bench", "MPESA_INITIATOR_NAME": "bench",
+        "SASAPAY_CLIENT_ID": "bench", "SASAPAY_CLIENT_SECRET": "bench",
+        "SASAPAY_TZ_CLIENT_ID": "bench", "SASAPAY_TZ_CLIENT_SECRET": "bench",
+        "FLUTTERWAVE_CLIENT_ID": "bench",
+        "FLUTTERWAVE_CLIENT_SECRET": "bench",
+        "FLUTTERWAVE_ENCRYPTION_KEY": "AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA=",
+        # Measured as deployed with webhooks signed, where it defaults on
+        "FLUTTERWAVE_CHARGE_MIRROR": "True",
+        "CACHE_BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "DATABASE_NAME": os.path.join(workdir, "gateway.sqlite3"),
+        "CALLBACK_SPOOL_DIR": os.path.join(workdir, "callbacks"),
+        "SASAPAY_CHANNEL_CODES_SNAPSHOT": os.path.join(workdir, "sasapay-channel-codes.json"),
+        "DJANGO_SETTINGS_MODULE": "intergrations.settings",
+    }
+    if asgi:
+        env["ROOT_URLCONF"] = "intergrations.asgi_urls"
+    for key, value in env.items():
+        os.environ.setdefault(key, value)
+
+    import django
+    django.setup()
+
+    from django.core.management import call_command
+    call_command("migrate", verbosity=0)
+
+    from django.test.utils import setup_test_environment
+    setup_test_environment()
+
+
+def summarize(latencies, elapsed, statuses, expect=None):
+    """
+    Throughput, latency percentiles and error count for one run. Statuses
+    outside ``expect`` (default: any 2xx) count as errors.
+    """
+    latencies = sorted(latencies)
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    if expect is None:
+        errors = sum(1 for code in statuses if not 200 <= code < 300)
+    else:
+        errors = sum(1 for code in statuses if code not in expect)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(quantiles[49] * 1000, 1),
+        "p95_ms": round(quantiles[94] * 1000, 1),
+        "p99_ms": round(quantiles[98] * 1000, 1),
+    }
+
+
+def run_threads(call, count, threads):
+    """
+    Issue ``call(client, i)`` ``count`` times from a pool of ``threads``, each
+    with its own test Client (a gthread worker). Returns
+    ``(latencies, elapsed, statuses)``.
+    """
+    from django.test import Client
+
+    local = threading.local()
+
+    def one(i):
+        if not hasattr(local, "client"):
+            local.client = Client()
+        start = time.perf_counter()
+        response = call(local.client, i)
+        if response.streaming:
+            # A streamed reply is done when its last chunk is
+            b"".join(response.streaming_content)
+        return time.perf_counter() - start, response.status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(one, range(count)))
+    elapsed = time.perf_counter() - start
+    return [r[0] for r in results], elapsed, [r[1] for r in results]
+
+
+def run_async(call, count, concurrency):
+    """
+    Await ``call(client, i)`` ``count`` times on one event loop with at most
+    ``concurrency`` in flight. Returns ``(latencies, elapsed, statuses)``.
+    """
+    from django.test import AsyncClient
+
+    async def main():
+        client = AsyncClient()
+        gate = asyncio.Semaphore(concurrency)
+
+        async def one(i):
+            async with gate:
+                start = time.perf_counter()
+                response = await call(client, i)
+                if response.streaming:
+                    async for _ in response.streaming_content:
+                        pass
+                return time.perf_counter() - start, response.status_code
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*[one(i) for i in range(count)])
+        return results, time.perf_counter() - start
+
+    results, elapsed = asyncio.run(main())
+    return [r[0] for r in results], elapsed, [r[1] for r in results]
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KiB on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
@@ -0,0 +1,212 @@
+"""
+Callback lookup latency against a large transaction ledger.
+
+    python -m benchmarks.ledger_lookup                         # 10M rows
+    python -m benchmarks.ledger_lookup --rows 1000000 --database /tmp/ledger.sqlite3
+
+Fills a separate SQLite database with ``--rows`` synthetic transactions
+spread over the four providers, then times ``Transaction.objects.lookup``
+for every callback key (MerchantRequestID, CheckoutRequestID, TransID, ...)
+and a full ``ledger.apply_callback``. The query plan for each key is printed
+so a table scan shows up as ``SCAN core_transaction``.
+
+An existing ``--database`` that already holds enough rows is reused, so the
+(slow) fill only happens once.
+"""
+import argparse
+import atexit
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from .harness import configure
+
+# provider -> ledger keys its rows carry (and its callbacks send)
+PROVIDER_KEYS = {
+    "mpesa": ("checkout_request_id", "merchant_request_id", "trans_id", "bill_ref_number"),
+    "sasapay": ("checkout_request_id", "merchant_request_id", "merchant_transaction_reference",
+                "trans_id", "bill_ref_number"),
+    "sasapay_tz": ("checkout_request_id", "merchant_request_id", "merchant_transaction_reference",
+                   "trans_id", "bill_ref_number"),
+    "flutterwave": ("reference",),
+}
+PROVIDERS = tuple(PROVIDER_KEYS)
+KEY_PREFIX = {
+    "checkout_request_id": "ws_CO_",
+    "merchant_request_id": "MR",
+    "originator_conversation_id": "OC",
+    "merchant_transaction_reference": "MTR",
+    "reference": "chg-",
+    "trans_id": "TX",
+    "bill_ref_number": "BILL",
+}
+COLUMNS = (
+    "provider", "kind", "status", "amount", "currency", "phone_number",
+    "checkout_request_id", "merchant_request_id", "originator_conversation_id",
+    "merchant_transaction_reference", "reference", "trans_id", "bill_ref_number",
+    "result_code", "result_desc", "request_payload", "created_at", "updated_at",
+)
+
+
+def key_value(key, i):
+    return f"{KEY_PREFIX[key]}{i:010d}"
+
+
+def row(i, now):
+    provider = PROVIDERS[i % len(PROVIDERS)]
+    keys = PROVIDER_KEYS[provider]
+    values = {key: key_value(key, i) if key in keys else None for key in KEY_PREFIX}
+    return (
+        provider, "charge" if provider == "flutterwave" else "c2b",
+        "completed" if i % 10 else "pending", "100.00",
+        "TZS" if provider == "sasapay_tz" else "KES", "254700000000",
+        values["checkout_request_id"], values["merchant_request_id"],
+        values["originator_conversation_id"], values["merchant_transaction_reference"],
+        values["reference"], values["trans_id"], values["bill_ref_number"],
+        "0", "", "{}", now, now,
+    )
+
+
+def fill(rows, batch):
+    """
+    Bulk-load ``rows`` transactions with the indexes dropped, then rebuild
+    them once, which is far faster than maintaining them per insert.
+    """
+    from django.db import connection, transaction
+    from django.utils import timezone
+
+    from core.models import Transaction
+
+    indexes = Transaction._meta.indexes
+    with connection.schema_editor() as editor:
+        for index in indexes:
+            editor.remove_index(Transaction, index)
+
+    table = Transaction._meta.db_table
+    sql = f"INSERT INTO {table} ({', '.join(COLUMNS)}) VALUES ({', '.join(['%s'] * len(COLUMNS))})"
+    now = timezone.now().isoformat()
+    start = time.perf_counter()
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA synchronous = OFF")
+        cursor.execute("PRAGMA journal_mode = MEMORY")
+        done = Transaction.objects.count()
+        while done < rows:
+            count = min(batch, rows - done)
+            with transaction.atomic():
+                cursor.executemany(sql, [row(i, now) for i in range(done, done + count)])
+            done += count
+            print(f"\r  inserted {done:,}/{rows:,}", end="", file=sys.stderr, flush=True)
+    print(f"\n  insert: {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+    start = time.perf_counter()
+    with connection.schema_editor() as editor:
+        for index in indexes:
+            editor.add_index(Transaction, index)
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    print(f"  indexes: {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+
+    def ms(q):
+        return round(samples[min(len(samples) - 1, int(q * len(samples)))] * 1000, 3)
+
+    return {"p50_ms": ms(0.50), "p99_ms": ms(0.99), "max_ms": ms(1.0)}
+
+
+def sample(rng, rows, provider):
+    # Row indexes belonging to ``provider``
+    offset = PROVIDERS.index(provider)
+    return rng.randrange((rows - offset - 1) // len(PROVIDERS) + 1) * len(PROVIDERS) + offset
+
+
+def measure(rows, lookups, seed):
+    from core import ledger
+    from core.models import Transaction
+
+    rng = random.Random(seed)
+    results = {}
+    for key in Transaction.LOOKUP_KEYS:
+        providers = [p for p, keys in PROVIDER_KEYS.items() if key in keys]
+        if not providers:
+            continue
+        provider = providers[0]
+        plan = Transaction.objects.filter(provider=provider, **{key: key_value(key, 0)}).order_by("-pk")[:1].explain()
+
+        timings = []
+        for _ in range(lookups):
+            i = sample(rng, rows, provider)
+            start = time.perf_counter()
+            found = Transaction.objects.lookup(provider, **{key: key_value(key, i)})
+            timings.append(time.perf_counter() - start)
+            assert found is not None and getattr(found, key) == key_value(key, i), (key, i)
+        results[f"lookup {key}"] = {**percentiles(timings), "plan": plan}
+
+    # A whole SasaPay C2B callback: resolve by CheckoutRequestID and update
+    timings = []
+    for _ in range(lookups):
+        i = sample(rng, rows, "sasapay")
+        callback = {
+            "MerchantRequestID": key_value("merchant_request_id", i),
+            "CheckoutRequestID": key_value("checkout_request_id", i),
+            "ResultCode": "0", "ResultDesc": "Transaction processed successfully.",
+            "TransAmount": "100.00", "CustomerMobile": "254700000000",
+            "TransactionCode": key_value("trans_id", i), "BillRefNumber": key_value("bill_ref_number", i),
+        }
+        start = time.perf_counter()
+        ledger.apply_callback("sasapay", "c2b", callback)
+        timings.append(time.perf_counter() - start)
+    results["apply_callback sasapay c2b"] = percentiles(timings)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--database", help="SQLite file to fill or reuse (default: a temporary file)")
+    parser.add_argument("--lookups", type=int, default=2000, help="timed lookups per key")
+    parser.add_argument("--batch", type=int, default=50_000, help="rows per insert transaction")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    database = args.database
+    if database is None:
+        workdir = tempfile.mkdtemp(prefix="ledger-bench-")
+        atexit.register(shutil.rmtree, workdir, ignore_errors=True)
+        database = os.path.join(workdir, "ledger.sqlite3")
+    os.environ["DATABASE_NAME"] = database
+    configure("http://127.0.0.1:9")
+
+    from core.models import Transaction
+
+    existing = Transaction.objects.count()
+    print(f"{database}: {existing:,} rows", file=sys.stderr)
+    if existing < args.rows:
+        fill(args.rows, args.batch)
+    rows = Transaction.objects.count()
+
+    results = measure(rows, args.lookups, args.seed)
+    if args.json:
+        print(json.dumps({"rows": rows, "results": results}, indent=2))
+        return
+
+    print(f"\n{rows:,} rows, {args.lookups} lookups per key")
+    width = max(len(name) for name in results)
+    print(f"{'':<{width}}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, r in results.items():
+        print(f"{name:<{width}}{r['p50_ms']:>10}{r['p99_ms']:>10}{r['max_ms']:>10}")
+    print("\nQuery plans:")
+    for name, r in results.items():
+        if "plan" in r:
+            print(f"  {name}: {r['plan']}")
+
+
+if __name__ == "__main__":
+    main()
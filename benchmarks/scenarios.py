@@ -0,0 +1,218 @@
+"""
+One request shape per gateway route, keyed ``"<METHOD> <route>"`` where the
+route is written as in the urlconf (``/flutterwave/v1/customer/<str:id>/``).
+
+Bodies and headers may be callables taking the request index, for routes
+that need a unique value per request. Payment routes all do: identical
+bodies would be answered by IdempotencyMiddleware instead of reaching the
+provider. ``{name}`` placeholders in paths and body strings are filled from
+ids the simulator was seeded with.
+"""
+import uuid
+
+
+CALLBACK_URL = "https://example.com/callback"
+
+
+class Scenario:
+
+    def __init__(self, body=None, path=None, query=None, expect=None, headers=None):
+        self.body = body
+        self.path = path
+        self.query = query or {}
+        # Statuses that count as success; None means any 2xx
+        self.expect = expect
+        self.headers = headers or {}
+
+    def payload(self, i):
+        return self.body(i) if callable(self.body) else self.body
+
+    def request_headers(self, i):
+        return self.headers(i) if callable(self.headers) else self.headers
+
+
+def unique(prefix):
+    return f"{prefix}-{uuid.uuid4().hex[:12]}"
+
+
+def batch_key(i):
+    # Payout uploads require one, and refuse a key already used
+    return {"Idempotency-Key": unique("batch")}
+
+
+def sasapay_ipn(i):
+    return {
+        "MerchantCode": "600980",
+        "PaymentMethod": "M-PESA",
+        "TransID": unique("TRX"),
+        "TransAmount": "10.00",
+        "TransactionType": "C2B",
+        "MSISDN": "254700000000",
+        "TransTime": "20250101120000",
+        "BillRefNumber": unique("bill")
+    }
+
+
+def sasapay_callback(i):
+    return {
+        "MerchantRequestID": unique("MR"),
+        "CheckoutRequestID": unique("CO"),
+        "ResultCode": "0",
+        "ResultDesc": "Transaction processed successfully.",
+        "TransAmount": "10.00",
+        "CustomerMobile": "254700000000",
+        "TransactionCode": unique("TC"),
+        "BillRefNumber": unique("bill"),
+        "TransactionDate": "20250101120000",
+        "ThirdPartyTransID": unique("TP")
+    }
+
+
+SCENARIOS = {
+    # M-Pesa (Daraja)
+    "POST /mpesa/v1/auth/": Scenario(),
+    "POST /mpesa/v1/QR-Code/": Scenario({
+        "MerchantName": "Bench Store", "RefNo": "INV-1", "Amount": 100,
+        "TrxCode": "BG", "CPI": "174379", "Size": "300"
+    }),
+    "POST /mpesa/v1/stk-push/": Scenario(lambda i: {
+        "TransactionType": "CustomerPayBillOnline", "Amount": 1,
+        "PartyA": "254708374149", "PartyB": "174379", "PhoneNumber": "254708374149",
+        "CallBackURL": CALLBACK_URL, "AccountReference": f"bench-{i}", "TransactionDesc": "bench"
+    }),
+    "POST /mpesa/v1/c2b/": Scenario({
+        "ShortCode": "600000", "ResponseType": "Completed",
+        "ConfirmationURL": CALLBACK_URL, "ValidationURL": CALLBACK_URL
+    }),
+    "POST /mpesa/v1/b2c/": Scenario(lambda i: {
+        "OriginatorConversationID": unique("b2c"), "CommandID": "BusinessPayment", "Amount": 10,
+        "PartyA": "600000", "PartyB": "254708374149", "Remarks": "bench",
+        "QueueTimeOutURL": CALLBACK_URL, "ResultURL": CALLBACK_URL, "Occassion": "bench",
+        "ResponseType": "Completed", "ValidationURL": CALLBACK_URL, "ConfirmationURL": CALLBACK_URL
+    }),
+    # A one-row NDJSON upload
+    "POST /mpesa/v1/b2c/batch/": Scenario({
+        "CommandID": "BusinessPayment", "Amount": 10, "PartyA": "600000", "PartyB": "254708374149",
+        "Remarks": "bench", "QueueTimeOutURL": CALLBACK_URL, "ResultURL": CALLBACK_URL
+    }, headers=batch_key),
+    "POST /mpesa/v1/transaction-status/": Scenario({
+        "Command ID": "TransactionStatusQuery", "Transaction ID": "OEI2AK4Q16",
+        "PartyA": "600000", "IdentifierType": "4", "ResultURL": CALLBACK_URL,
+        "QueueTimeOutURL": CALLBACK_URL, "Remarks": "bench", "Occassion": "bench"
+    }),
+
+    # SasaPay KE
+    "POST /sasapay/v1/authenticate/": Scenario(),
+    "POST /sasapay/v1/c2bpayment/": Scenario(lambda i: {
+        "MerchantCode": "600980", "NetworkCode": "63902", "Amount": "10",
+        "PhoneNumber": "254700000000", "CallBackURL": CALLBACK_URL,
+        "TransactionDesc": "bench", "AccountReference": f"bench-{i}"
+    }),
+    "POST /sasapay/v1/process-payment/": Scenario(lambda i: {
+        "CheckoutRequestID": f"bench-{i}", "MerchantCode": "600980", "VerificationCode": "123456"
+    }),
+    "POST /sasapay/v1/c2b-mobile/": Scenario(lambda i: {
+        "MerchantCode": "600980", "NetworkCode": "63902", "TransactionFee": 0, "Amount": "10",
+        "PhoneNumber": "254700000000", "CallBackURL": CALLBACK_URL,
+        "TransactionDesc": "bench", "AccountReference": f"bench-{i}"
+    }),
+    "POST /sasapay/v1/c2b-callback/": Scenario(sasapay_callback),
+    "POST /sasapay/v1/sasapay/ipn/": Scenario(sasapay_ipn),
+    "POST /sasapay/v1/b2cpayment/": Scenario(lambda i: {
+        "MerchantCode": "600980", "MerchantTransactionReference": unique("b2c"), "Amount": "10",
+        "ReceiverNumber": "254700000000", "Channel": "63902", "Reason": "bench",
+        "CallBackURL": CALLBACK_URL
+    }),
+    "POST /sasapay/v1/b2cpayment/batch/": Scenario({
+        "MerchantCode": "600980", "Amount": "10", "ReceiverNumber": "254700000000",
+        "Channel": "63902", "Reason": "bench", "CallBackURL": CALLBACK_URL
+    }, headers=batch_key),
+    "POST /sasapay/v1/b2bpayment/": Scenario(lambda i: {
+        "MerchantCode": "600980", "MerchantTransactionReference": unique("b2b"), "Amount": "10",
+        "ReceiverMerchantCode": "600981", "AccountReference": "bench", "ReceiverAccountType": "PAYBILL",
+        "NetworkCode": "0", "CallBackURL": CALLBACK_URL, "Reason": "bench"
+    }),
+    "GET /sasapay/v1/channel-codes/": Scenario(),
+    "POST /sasapay/v1/checkout/": Scenario(lambda i: {
+        "MerchantCode": "600980", "Amount": "10", "Reference": unique("chk"), "Description": "bench",
+        "PayerEmail": "bench@example.com", "CallbackUrl": CALLBACK_URL,
+        "SuccessUrl": CALLBACK_URL, "FailureUrl": CALLBACK_URL
+    }),
+    "POST /sasapay/v1/remittance/": Scenario(lambda i: {
+        "MerchantCode": "600980", "MerchantTransactionReference": unique("rem"), "Amount": "10",
+        "DestinationChannelCode": "63902", "ReceiverPhoneNumber": "254700000000",
+        "ReceiverAccountType": "MOBILE", "SenderName": "Bench", "SenderCountryISO": "GB",
+        "RemittancePurpose": "bench", "CallbackUrl": CALLBACK_URL
+    }),
+
+    # SasaPay TZ
+    "POST /sasapay-tz/v1/auth/": Scenario(),
+    "POST /sasapay-tz/v1/c2b-tz/": Scenario(lambda i: {
+        "MerchantCode": "600980", "NetworkCode": "TZ-MPESA", "Amount": "1000",
+        "PhoneNumber": "255700000000", "CallBackURL": CALLBACK_URL,
+        "TransactionDesc": "bench", "AccountReference": f"bench-{i}"
+    }),
+    "POST /sasapay-tz/v1/c2b-tz/callback/": Scenario(sasapay_callback),
+    "POST /sasapay-tz/v1/c2b-tz/ipn/": Scenario(sasapay_ipn),
+    "POST /sasapay-tz/v1/ifm/": Scenario(lambda i: {"merchantCode": "600980", "amount": str(1000 + i)}),
+    "POST /sasapay-tz/v1/b2c-tz/": Scenario(lambda i: {
+        "MerchantCode": "600980", "MerchantTransactionReference": unique("b2c"), "Amount": "1000",
+        "ReceiverNumber": "255700000000", "Channel": "TZ-MPESA", "Reason": "bench",
+        "CallBackURL": CALLBACK_URL
+    }),
+    "POST /sasapay-tz/v1/b2c-tz/batch/": Scenario({
+        "MerchantCode": "600980", "Amount": "1000", "ReceiverNumber": "255700000000",
+        "Channel": "TZ-MPESA", "Reason": "bench", "CallBackURL": CALLBACK_URL
+    }, headers=batch_key),
+    "POST /sasapay-tz/v1/b2b-tz/": Scenario(lambda i: {
+        "MerchantCode": "600980", "MerchantTransactionReference": unique("b2b"), "Amount": "1000",
+        "ReceiverMerchantCode": "600981", "AccountReference": "bench", "ReceiverAccountType": "PAYBILL",
+        "NetworkCode": "0", "CallBackURL": CALLBACK_URL, "Reason": "bench"
+    }),
+    "POST /sasapay-tz/v1/account-validation/": Scenario({
+        "merchant_code": "600980", "channel_code": "TZ-MPESA", "account_number": "255700000001"
+    }),
+    "DELETE /sasapay-tz/v1/account-validation/": Scenario({
+        "merchant_code": "600980", "channel_code": "TZ-MPESA", "account_number": "255700000001"
+    }),
+    # 20 payees per request out of a pool of 200, so later requests are
+    # mostly served from the validation cache
+    "POST /sasapay-tz/v1/account-validation/bulk/": Scenario(lambda i: {
+        "merchant_code": "600980", "channel_code": "TZ-MPESA",
+        "accounts": [{"account_number": f"25570{(i * 20 + j) % 200:07d}"} for j in range(20)]
+    }),
+    "POST /sasapay-tz/v1/transaction-status/": Scenario({
+        "MerchantCode": "600980", "CheckoutRequestId": "bench", "CallbackUrl": CALLBACK_URL
+    }),
+    "GET /sasapay-tz/v1/account-balance/": Scenario(),
+
+    # Flutterwave
+    "GET /flutterwave/v1/customers/": Scenario(query={"page": 1, "size": 10}),
+    "POST /flutterwave/v1/customers/": Scenario(lambda i: {
+        "email": f"{unique('bench')}@example.com",
+        "name": {"first": "Bench", "last": "Customer"},
+        "phone": {"country_code": "254", "number": "700000000"}
+    }),
+    "GET /flutterwave/v1/customers/export/": Scenario(),
+    "GET /flutterwave/v1/customer/<str:id>/": Scenario(path="/flutterwave/v1/customer/{customer_id}/"),
+    "PUT /flutterwave/v1/customer/<str:id>/": Scenario(
+        {"name": {"first": "Bench", "last": "Updated"}},
+        path="/flutterwave/v1/customer/{customer_id}/"
+    ),
+    "POST /flutterwave/v1/search/": Scenario({"email": "customer0@example.com"}),
+    "GET /flutterwave/v1/charges/": Scenario(query={"page": 1, "size": 10, "status": "succeeded"}),
+    "POST /flutterwave/v1/charges/": Scenario(lambda i: {
+        "amount": 100, "currency": "KES", "reference": unique("chg"), "customer_id": "{customer_id}",
+        "payment_method_details": {"type": "mobile_money"}
+    }),
+    "GET /flutterwave/v1/charges/export/": Scenario(query={"status": "succeeded"}),
+    "GET /flutterwave/v1/charges/<str:id>/": Scenario(path="/flutterwave/v1/charges/{charge_id}/"),
+    "PUT /flutterwave/v1/charges/<str:id>/": Scenario(
+        {"amount": 150, "currency": "KES", "reference": "bench-update", "payment_method_id": "pmd_bench"},
+        path="/flutterwave/v1/charges/{charge_id}/"
+    ),
+    "POST /flutterwave/v1/webhook/": Scenario({
+        "webhook_id": "wbk_bench", "type": "charge.completed",
+        "data": {"id": "{charge_id}", "status": "succeeded"}
+    }),
+}
@@ -0,0 +1,2 @@
+from .profile import Profile
+from .server import ProviderSimulator, gateway_environ
@@ -0,0 +1,75 @@
+"""
+Run the provider simulator for load tests against a local gateway:
+
+    python -m benchmarks.simulator --port 9000 --latency lognormal:0.2,0.5 \
+        --error-rate 0.01 --callback-url http://127.0.0.1:8000/sasapay/v1/c2b-callback/
+
+then start the gateway with the printed settings exported. Latency specs
+are described in benchmarks/simulator/latency.py; per-route overrides go in
+a JSON --profile (see benchmarks/simulator/profile.py).
+"""
+import argparse
+import asyncio
+
+from .profile import Profile
+from .server import ProviderSimulator
+
+
+def callback_url(value):
+    provider, sep, url = value.partition("=")
+    if sep and not provider.startswith("http"):
+        return provider, url
+    return "*", value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--profile", help="JSON file of per-provider / per-route behaviour")
+    parser.add_argument("--seed", type=int, help="seed latency, error and callback draws for repeatable runs")
+    parser.add_argument("--latency", help="response latency distribution, e.g. 0.2 or lognormal:0.2,0.5")
+    parser.add_argument("--error-rate", type=float, help="fraction of requests answered with an error status")
+    parser.add_argument("--error-statuses", type=lambda v: [int(c) for c in v.split(",")],
+                        help="comma separated statuses for injected errors (default 500,503)")
+    parser.add_argument("--timeout-rate", type=float, help="fraction of requests that never get a reply")
+    parser.add_argument("--hang-seconds", type=float, help="how long unanswered requests hold the connection")
+    parser.add_argument("--callback-delay", help="delay distribution before callbacks fire")
+    parser.add_argument("--decline-rate", type=float, help="fraction of callbacks reporting a failed transaction")
+    parser.add_argument("--duplicate-rate", type=float, help="fraction of callbacks delivered twice")
+    parser.add_argument("--callback-url", type=callback_url, action="append", default=[],
+                        metavar="[PROVIDER=]URL",
+                        help="deliver callbacks here instead of the URL in the request; repeatable per provider")
+    parser.add_argument("--seed-customers", type=int, default=0, help="Flutterwave customers to pre-create")
+    parser.add_argument("--seed-charges", type=int, default=0, help="Flutterwave charges to pre-create")
+    args = parser.parse_args()
+
+    defaults = {
+        "latency": args.latency,
+        "error_rate": args.error_rate,
+        "error_statuses": args.error_statuses,
+        "timeout_rate": args.timeout_rate,
+        "hang_seconds": args.hang_seconds,
+        "callback_delay": args.callback_delay,
+        "decline_rate": args.decline_rate,
+        "duplicate_rate": args.duplicate_rate,
+    }
+    profile = Profile.from_file(args.profile, **defaults) if args.profile else Profile(**defaults)
+
+    simulator = ProviderSimulator(
+        args.host, args.port, profile=profile, seed=args.seed,
+        callback_urls=dict(args.callback_url),
+        seed_customers=args.seed_customers, seed_charges=args.seed_charges,
+    )
+
+    print(f"Provider simulator on {simulator.base_url}")
+    for key, value in simulator.environ().items():
+        print(f"export {key}={value}")
+    try:
+        asyncio.run(simulator.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import base64
+import json
+import re
+import secrets
+import time
+import uuid
+from urllib.parse import parse_qsl
+
+
+class Request:
+
+    def __init__(self, method, path, query, headers, body):
+        self.method = method
+        self.path = path
+        self.query = dict(parse_qsl(query))
+        self.headers = headers
+        self.body = body
+        self.params = {}
+
+    @property
+    def json(self):
+        if not self.body:
+            return {}
+        try:
+            return json.loads(self.body)
+        except ValueError:
+            return None
+
+    @property
+    def form(self):
+        return dict(parse_qsl(self.body.decode("latin-1")))
+
+    @property
+    def bearer_token(self):
+        scheme, _, token = self.headers.get("authorization", "").partition(" ")
+        return token if scheme.lower() == "bearer" else None
+
+    @property
+    def basic_credentials(self):
+        scheme, _, encoded = self.headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "basic":
+            return None
+        try:
+            user, _, password = base64.b64decode(encoded).decode().partition(":")
+        except ValueError:
+            return None
+        return user, password
+
+
+class Reply:
+
+    def __init__(self, status, body, callback=None):
+        self.status = status
+        self.body = body
+        # (url, body) POSTed after the route's callback delay
+        self.callback = callback
+
+
+def route(method, path, auth=True):
+    """
+    Declare a provider handler for ``method path``. ``{name}`` segments are
+    captured into ``request.params``.
+    """
+    pattern = re.compile("^" + re.sub(r"\{(\w+)\}", r"(?P<\1>[^/]+)", path) + "$")
+
+    def decorator(handler):
+        handler.route = (method, pattern, auth)
+        return handler
+
+    return decorator
+
+
+class Provider:
+    """
+    One simulated provider, mounted under ``/<name>`` on the simulator.
+
+    Subclasses declare handlers with ``@route`` and shape their error and
+    auth failures like the real API.
+    """
+
+    name = None
+    token_ttl = 3600
+
+    def __init__(self, simulator):
+        self.simulator = simulator
+        self.rng = simulator.rng
+        self.tokens = {}
+        self.routes = []
+        for attr in dir(type(self)):
+            handler = getattr(self, attr)
+            if callable(handler) and hasattr(handler, "route"):
+                method, pattern, auth = handler.route
+                self.routes.append((method, pattern, auth, attr, handler))
+
+    def resolve(self, method, path):
+        """
+        Return ``(route_name, handler, auth, params)``, or the 404 / 405
+        reply when no handler matches.
+        """
+        path_matched = False
+        for route_method, pattern, auth, name, handler in self.routes:
+            found = pattern.match(path)
+            if found:
+                if route_method == method:
+                    return name, handler, auth, found.groupdict()
+                path_matched = True
+        return self.method_not_allowed(method) if path_matched else self.not_found(path)
+
+    def issue_token(self):
+        token = secrets.token_urlsafe(24)
+        self.tokens[token] = time.monotonic() + self.token_ttl
+        return token
+
+    def authorized(self, request):
+        expires_at = self.tokens.get(request.bearer_token)
+        return expires_at is not None and time.monotonic() < expires_at
+
+    def callback_url(self, url):
+        """
+        Where to deliver a callback: the simulator-wide override for this
+        provider, else the URL the gateway sent.
+        """
+        override = self.simulator.callback_urls.get(self.name) or self.simulator.callback_urls.get("*")
+        return override or url
+
+    def declined(self, route):
+        behaviour = self.simulator.profile.behaviour(self.name, route)
+        return self.rng.random() < behaviour.decline_rate
+
+    def unauthorized(self):
+        return Reply(401, {"message": "Unauthorized"})
+
+    def not_found(self, path):
+        return Reply(404, {"message": f"No route for {path}"})
+
+    def method_not_allowed(self, method):
+        return Reply(405, {"message": f"Method {method} not allowed"})
+
+    def invalid(self, message):
+        return Reply(400, {"message": message})
+
+    def error(self, status):
+        return Reply(status, {"message": "Simulated provider error"})
+
+    @staticmethod
+    def reference(prefix="", length=10):
+        return prefix + uuid.uuid4().hex[:length].upper()
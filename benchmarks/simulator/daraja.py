@@ -0,0 +1,192 @@
+"""
+Safaricom Daraja (M-Pesa) endpoints used by the mpesa app.
+"""
+import base64
+import datetime
+
+from .base import Provider, Reply, route
+
+
+STK_REQUIRED = ["BusinessShortCode", "Password", "Timestamp", "Amount", "PhoneNumber", "CallBackURL"]
+
+
+class Daraja(Provider):
+    name = "daraja"
+
+    def error(self, status):
+        messages = {
+            429: "Spike arrest violation",
+            500: "Internal Server Error",
+            503: "Service Unavailable",
+        }
+        return Reply(status, {
+            "requestId": self.reference(length=16),
+            "errorCode": f"{status}.003.02",
+            "errorMessage": messages.get(status, "System is busy. Please try again")
+        })
+
+    def unauthorized(self):
+        return Reply(401, {
+            "requestId": self.reference(length=16),
+            "errorCode": "404.001.03",
+            "errorMessage": "Invalid Access Token"
+        })
+
+    def invalid(self, message):
+        return Reply(400, {
+            "requestId": self.reference(length=16),
+            "errorCode": "400.002.02",
+            "errorMessage": f"Bad Request - {message}"
+        })
+
+    def bad_request(self, field):
+        return self.invalid(f"Invalid {field}")
+
+    @staticmethod
+    def now():
+        return datetime.datetime.now().strftime("%Y%m%d%H%M%S")
+
+    @route("GET", "/oauth/v1/generate", auth=False)
+    def token(self, request):
+        if request.basic_credentials is None or request.query.get("grant_type") != "client_credentials":
+            return Reply(400, {
+                "requestId": self.reference(length=16),
+                "errorCode": "400.008.01",
+                "errorMessage": "Invalid Authentication passed"
+            })
+        return Reply(200, {"access_token": self.issue_token(), "expires_in": str(self.token_ttl - 1)})
+
+    @route("POST", "/mpesa/stkpush/v1/processrequest")
+    def stk_push(self, request):
+        data = request.json or {}
+        for field in STK_REQUIRED:
+            if not data.get(field):
+                return self.bad_request(field)
+
+        merchant_request_id = f"{self.rng.randint(10000, 99999)}-{self.rng.randint(1000000, 9999999)}-1"
+        checkout_request_id = f"ws_CO_{self.now()}{self.rng.randint(100000, 999999)}"
+
+        if self.declined("stk_push"):
+            result = {
+                "MerchantRequestID": merchant_request_id,
+                "CheckoutRequestID": checkout_request_id,
+                "ResultCode": 1032,
+                "ResultDesc": "Request cancelled by user"
+            }
+        else:
+            result = {
+                "MerchantRequestID": merchant_request_id,
+                "CheckoutRequestID": checkout_request_id,
+                "ResultCode": 0,
+                "ResultDesc": "The service request is processed successfully.",
+                "CallbackMetadata": {
+                    "Item": [
+                        {"Name": "Amount", "Value": data["Amount"]},
+                        {"Name": "MpesaReceiptNumber", "Value": self.reference()},
+                        {"Name": "TransactionDate", "Value": int(self.now())},
+                        {"Name": "PhoneNumber", "Value": data["PhoneNumber"]}
+                    ]
+                }
+            }
+
+        return Reply(200, {
+            "MerchantRequestID": merchant_request_id,
+            "CheckoutRequestID": checkout_request_id,
+            "ResponseCode": "0",
+            "ResponseDescription": "Success. Request accepted for processing",
+            "CustomerMessage": "Success. Request accepted for processing"
+        }, callback=(self.callback_url(data["CallBackURL"]), {"Body": {"stkCallback": result}}))
+
+    @route("POST", "/mpesa/qrcode/v1/generate")
+    def qr_code(self, request):
+        data = request.json or {}
+        for field in ("MerchantName", "RefNo", "Amount", "TrxCode", "CPI"):
+            if not data.get(field):
+                return self.bad_request(field)
+
+        return Reply(200, {
+            "ResponseCode": f"AG_{self.now()[:8]}_{self.reference(length=16).lower()}",
+            "RequestID": f"{self.rng.randint(10000, 99999)}-{self.rng.randint(1000000, 9999999)}-1",
+            "ResponseDescription": "QR Code Successfully Generated.",
+            "QRCode": base64.b64encode(self.reference(length=32).encode()).decode()
+        })
+
+    @route("POST", "/mpesa/c2b/v1/registerurl")
+    def c2b_register_url(self, request):
+        data = request.json or {}
+        for field in ("ShortCode", "ResponseType", "ConfirmationURL", "ValidationURL"):
+            if not data.get(field):
+                return self.bad_request(field)
+
+        return Reply(200, {
+            "OriginatorCoversationID": self.reference(length=16),
+            "ResponseCode": "0",
+            "ResponseDescription": "Success"
+        })
+
+    def result(self, route, data, parameters):
+        """
+        Acknowledge an asynchronous (B2C / status) request and queue its
+        ``Result`` callback to ``ResultURL``.
+        """
+        if not data.get("ResultURL"):
+            return self.bad_request("ResultURL")
+
+        conversation_id = f"AG_{self.now()[:8]}_{self.reference(length=20).lower()}"
+        originator_id = data.get("OriginatorConversationID") or self.reference(length=16)
+        declined = self.declined(route)
+
+        result = {
+            "ResultType": 0,
+            "ResultCode": 2001 if declined else 0,
+            "ResultDesc": "The initiator information is invalid." if declined
+            else "The service request is processed successfully.",
+            "OriginatorConversationID": originator_id,
+            "ConversationID": conversation_id,
+            "TransactionID": self.reference(),
+            "ReferenceData": {
+                "ReferenceItem": {"Key": "QueueTimeoutURL", "Value": data.get("QueueTimeOutURL")}
+            }
+        }
+        if not declined:
+            result["ResultParameters"] = {
+                "ResultParameter": [{"Key": key, "Value": value} for key, value in parameters]
+            }
+
+        return Reply(200, {
+            "ConversationID": conversation_id,
+            "OriginatorConversationID": originator_id,
+            "ResponseCode": "0",
+            "ResponseDescription": "Accept the service request successfully."
+        }, callback=(self.callback_url(data["ResultURL"]), {"Result": result}))
+
+    @route("POST", "/mpesa/b2c/v3/paymentrequest")
+    def b2c(self, request):
+        data = request.json or {}
+        for field in ("CommandID", "Amount", "PartyA", "PartyB"):
+            if not data.get(field):
+                return self.bad_request(field)
+
+        return self.result("b2c", data, [
+            ("TransactionAmount", data["Amount"]),
+            ("TransactionReceipt", self.reference()),
+            ("ReceiverPartyPublicName", f"{data['PartyB']} - Simulated Customer"),
+            ("TransactionCompletedDateTime", datetime.datetime.now().strftime("%d.%m.%Y %H:%M:%S")),
+            ("B2CUtilityAccountAvailableFunds", round(self.rng.uniform(1000, 100000), 2)),
+            ("B2CWorkingAccountAvailableFunds", round(self.rng.uniform(1000, 100000), 2)),
+            ("B2CRecipientIsRegisteredCustomer", "Y"),
+        ])
+
+    @route("POST", "/mpesa/transactionstatus/v1/query")
+    def transaction_status(self, request):
+        data = request.json or {}
+        if not data.get("TransactionID") and not data.get("OriginatorConversationID"):
+            return self.bad_request("TransactionID")
+
+        return self.result("transaction_status", data, [
+            ("ReceiptNo", data.get("TransactionID") or self.reference()),
+            ("TransactionStatus", "Completed"),
+            ("ReasonType", "Salary Payment via API"),
+            ("Amount", round(self.rng.uniform(1, 10000), 2)),
+            ("FinalisedTime", int(self.now())),
+        ])
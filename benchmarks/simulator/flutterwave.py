@@ -0,0 +1,279 @@
+"""
+Flutterwave v4 endpoints used by the flutterwave app. Customers and
+charges are kept in memory so list, retrieve, update and search behave
+like the real API across calls.
+"""
+import datetime
+import time
+
+from .base import Provider, Reply, route
+
+
+MAX_PAGE_SIZE = 50
+
+
+def timestamp(moment=None):
+    moment = moment or datetime.datetime.now(datetime.timezone.utc)
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.") + f"{moment.microsecond // 1000:03d}Z"
+
+
+class Flutterwave(Provider):
+    name = "flutterwave"
+    token_ttl = 600
+
+    def __init__(self, simulator):
+        super().__init__(simulator)
+        self.customers = {}
+        self.customer_emails = {}
+        self.charges = {}
+
+    def error(self, status):
+        return Reply(status, {
+            "status": "failed",
+            "error": {
+                "type": "RATE_LIMIT_EXCEEDED" if status == 429 else "SERVER_ERROR",
+                "code": f"{status}00",
+                "message": "Too many requests" if status == 429 else "An unexpected error occurred",
+                "validation_errors": []
+            }
+        })
+
+    def unauthorized(self):
+        return Reply(401, {
+            "status": "failed",
+            "error": {
+                "type": "UNAUTHORIZED",
+                "code": "10401",
+                "message": "Invalid or expired access token",
+                "validation_errors": []
+            }
+        })
+
+    def invalid(self, message, status=400, code="10400"):
+        return Reply(status, {
+            "status": "failed",
+            "error": {
+                "type": "REQUEST_NOT_VALID",
+                "code": code,
+                "message": message,
+                "validation_errors": []
+            }
+        })
+
+    def not_found(self, path):
+        return self.invalid(f"Resource not found: {path}", status=404, code="10404")
+
+    @staticmethod
+    def success(message, data, status=200, meta=None):
+        body = {"status": "success", "message": message, "data": data}
+        if meta is not None:
+            body["meta"] = meta
+        return Reply(status, body)
+
+    def page(self, request, items, message):
+        try:
+            page = max(int(request.query.get("page") or 1), 1)
+            size = min(max(int(request.query.get("size") or 10), 1), MAX_PAGE_SIZE)
+        except ValueError:
+            return self.invalid("page and size must be integers")
+
+        total = len(items)
+        start = (page - 1) * size
+        return self.success(message, items[start:start + size], meta={
+            "page_info": {
+                "total": total,
+                "current_page": page,
+                "total_pages": (total + size - 1) // size
+            }
+        })
+
+    def seed(self, customers=0, charges=0, span=None):
+        """
+        Pre-populate the store so list/search/export paths have data to page
+        through. Charges are a second apart, or spread evenly over ``span``
+        (a timedelta) up to now.
+        """
+        now = datetime.datetime.now(datetime.timezone.utc)
+        for i in range(customers):
+            self.add_customer({
+                "email": f"customer{i}@example.com",
+                "name": {"first": "Customer", "last": str(i)},
+                "phone": {"country_code": "254", "number": f"7{i:08d}"[-9:]},
+            }, created=now - datetime.timedelta(seconds=customers - i))
+
+        customer_ids = list(self.customers)
+        for i in range(charges):
+            self.add_charge({
+                "amount": round(self.rng.uniform(10, 10000), 2),
+                "currency": "KES",
+                "reference": f"seed-{i:08d}",
+                "customer_id": customer_ids[i % len(customer_ids)] if customer_ids else None,
+            }, status=self.rng.choice(["succeeded", "succeeded", "succeeded", "failed"]),
+                created=now - (span * (charges - i) / charges if span else datetime.timedelta(seconds=charges - i)))
+
+    def add_customer(self, data, created=None):
+        customer = {
+            "id": self.reference("cus_", 10),
+            "address": data.get("address"),
+            "email": data.get("email"),
+            "name": data.get("name"),
+            "phone": data.get("phone"),
+            "meta": data.get("meta") or {},
+            "created_datetime": timestamp(created)
+        }
+        self.customers[customer["id"]] = customer
+        self.customer_emails[customer["email"]] = customer["id"]
+        return customer
+
+    def add_charge(self, data, status="pending", created=None):
+        charge = {
+            "id": self.reference("chg_", 10),
+            "amount": data.get("amount"),
+            "currency": data.get("currency"),
+            "customer_id": data.get("customer_id"),
+            "description": data.get("description"),
+            "meta": data.get("meta") or {},
+            "order_id": data.get("order_id"),
+            "payment_method_details": data.get("payment_method_details"),
+            "redirect_url": data.get("redirect_url"),
+            "reference": data.get("reference"),
+            "status": status,
+            "processor_response": None,
+            "created_datetime": timestamp(created)
+        }
+        self.charges[charge["id"]] = charge
+        return charge
+
+    @route("POST", "/realms/flutterwave/protocol/openid-connect/token", auth=False)
+    def token(self, request):
+        form = request.form
+        if form.get("grant_type") != "client_credentials" or not form.get("client_id"):
+            return Reply(401, {"error": "invalid_client", "error_description": "Invalid client credentials"})
+        return Reply(200, {
+            "access_token": self.issue_token(),
+            "expires_in": self.token_ttl,
+            "refresh_expires_in": 0,
+            "token_type": "Bearer",
+            "not-before-policy": 0,
+            "scope": "profile email"
+        })
+
+    @route("GET", "/customers")
+    def customer_list(self, request):
+        return self.page(request, list(self.customers.values()), "Customers fetched")
+
+    @route("POST", "/customers")
+    def customer_create(self, request):
+        data = request.json or {}
+        if not data.get("email"):
+            return self.invalid("email is required")
+        if data["email"] in self.customer_emails:
+            return self.invalid("A customer with this email already exists", status=409, code="10409")
+        return self.success("Customer created", self.add_customer(data), status=201)
+
+    @route("POST", "/customers/search")
+    def customer_search(self, request):
+        email = (request.json or {}).get("email")
+        if not email:
+            return self.invalid("email is required")
+        customer_id = self.customer_emails.get(email)
+        matches = [self.customers[customer_id]] if customer_id else []
+        return self.page(request, matches, "Customers fetched")
+
+    @route("GET", "/customers/{id}")
+    def customer_detail(self, request):
+        customer = self.customers.get(request.params["id"])
+        if customer is None:
+            return self.not_found(request.path)
+        return self.success("Customer fetched", customer)
+
+    @route("PUT", "/customers/{id}")
+    def customer_update(self, request):
+        customer = self.customers.get(request.params["id"])
+        if customer is None:
+            return self.not_found(request.path)
+
+        data = request.json or {}
+        email = data.get("email")
+        if email and email != customer["email"]:
+            if email in self.customer_emails:
+                return self.invalid("A customer with this email already exists", status=409, code="10409")
+            del self.customer_emails[customer["email"]]
+            self.customer_emails[email] = customer["id"]
+        customer.update({k: v for k, v in data.items() if k in ("address", "email", "name", "phone", "meta") and v})
+        return self.success("Customer updated", customer)
+
+    @route("GET", "/charges")
+    def charge_list(self, request):
+        filters = {k: request.query.get(k) for k in ("status", "reference", "customer_id", "order_id")}
+        start, end = request.query.get("from"), request.query.get("to")
+
+        charges = [
+            charge for charge in self.charges.values()
+            if all(v is None or charge.get(k) == v for k, v in filters.items())
+            and (start is None or charge["created_datetime"] >= start)
+            and (end is None or charge["created_datetime"] <= end)
+        ]
+        return self.page(request, charges, "Charges fetched")
+
+    def charge_created(self, route, charge):
+        """
+        Reply to a new charge. It settles after the callback delay and, when
+        a webhook URL is configured, ``charge.completed`` is delivered.
+        """
+        declined = self.declined(route)
+
+        def settle():
+            charge["status"] = "failed" if declined else "succeeded"
+            charge["processor_response"] = {
+                "type": "declined" if declined else "approved",
+                "code": "51" if declined else "00"
+            }
+            return {
+                "webhook_id": self.reference("wbk_", 10),
+                "timestamp": int(time.time() * 1000),
+                "type": "charge.completed",
+                "data": dict(charge)
+            }
+
+        reply = self.success("Charge created", charge, status=201)
+        # Settles even without a webhook URL, so polling sees the outcome
+        reply.callback = (self.callback_url(None), settle)
+        return reply
+
+    @route("POST", "/charges")
+    def charge_create(self, request):
+        data = request.json or {}
+        missing = [f for f in ("amount", "currency", "reference", "customer_id") if not data.get(f)]
+        if missing:
+            return self.invalid(f"Missing required fields: {', '.join(missing)}")
+        if data["customer_id"] not in self.customers:
+            return self.invalid("Customer not found", status=404, code="10404")
+        return self.charge_created("charge_create", self.add_charge(data))
+
+    @route("GET", "/charges/{id}")
+    def charge_detail(self, request):
+        charge = self.charges.get(request.params["id"])
+        if charge is None:
+            return self.not_found(request.path)
+        return self.success("Charge fetched", charge)
+
+    @route("PUT", "/charges/{id}")
+    def charge_update(self, request):
+        charge = self.charges.get(request.params["id"])
+        if charge is None:
+            return self.not_found(request.path)
+
+        data = request.json or {}
+        charge.update({
+            k: v for k, v in data.items()
+            if k in ("amount", "currency", "reference", "meta", "order_id", "redirect_url") and v
+        })
+        return self.success("Charge updated", charge)
+
+    @route("POST", "/orchestration/direct-charges")
+    def direct_charge(self, request):
+        data = request.json or {}
+        if not data.get("reference") or not data.get("amount"):
+            return self.invalid("reference and amount are required")
+        return self.charge_created("direct_charge", self.add_charge(data))
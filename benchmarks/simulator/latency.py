@@ -0,0 +1,86 @@
+"""
+Latency distributions for the simulator, parsed from short specs:
+
+    0.25                    constant 250 ms
+    uniform:0.1,0.4         uniform between 100 and 400 ms
+    normal:0.2,0.05         mean 200 ms, sd 50 ms (clamped at 0)
+    lognormal:0.2,0.6       median 200 ms, sigma 0.6 (long right tail)
+    exp:0.2                 exponential with mean 200 ms
+"""
+import math
+
+
+class Distribution:
+    kind = None
+
+    def __init__(self, *args):
+        self.args = args
+
+    def sample(self, rng):
+        raise NotImplementedError
+
+    def __str__(self):
+        return f"{self.kind}:{','.join(str(a) for a in self.args)}"
+
+
+class Constant(Distribution):
+    kind = "const"
+
+    def sample(self, rng):
+        return self.args[0]
+
+
+class Uniform(Distribution):
+    kind = "uniform"
+
+    def sample(self, rng):
+        low, high = self.args
+        return rng.uniform(low, high)
+
+
+class Normal(Distribution):
+    kind = "normal"
+
+    def sample(self, rng):
+        mean, sd = self.args
+        return max(rng.gauss(mean, sd), 0.0)
+
+
+class LogNormal(Distribution):
+    kind = "lognormal"
+
+    def sample(self, rng):
+        median, sigma = self.args
+        return rng.lognormvariate(math.log(median), sigma)
+
+
+class Exponential(Distribution):
+    kind = "exp"
+
+    def sample(self, rng):
+        return rng.expovariate(1 / self.args[0])
+
+
+KINDS = {cls.kind: cls for cls in (Constant, Uniform, Normal, LogNormal, Exponential)}
+ARITY = {"const": 1, "uniform": 2, "normal": 2, "lognormal": 2, "exp": 1}
+
+
+def parse(spec):
+    """
+    Build a distribution from a spec string (or pass one through).
+    """
+    if isinstance(spec, Distribution):
+        return spec
+    if isinstance(spec, (int, float)):
+        return Constant(float(spec))
+
+    kind, _, args = str(spec).partition(":")
+    if not args:
+        return Constant(float(kind))
+
+    if kind not in KINDS:
+        raise ValueError(f"Unknown latency distribution '{kind}' (expected one of {', '.join(KINDS)})")
+    values = [float(a) for a in args.split(",")]
+    if len(values) != ARITY[kind]:
+        raise ValueError(f"'{kind}' takes {ARITY[kind]} argument(s), got {len(values)}")
+    return KINDS[kind](*values)
@@ -0,0 +1,70 @@
+"""
+Per-route behaviour of the simulator.
+
+A profile is a dict (or JSON file) of overrides keyed by ``default``, a
+provider name, or ``provider.route``; the most specific key wins:
+
+    {
+        "default": {"latency": "lognormal:0.2,0.5", "error_rate": 0.01},
+        "daraja": {"error_statuses": [500, 503, 429]},
+        "daraja.stk_push": {"callback_delay": "uniform:5,20", "decline_rate": 0.1}
+    }
+"""
+import json
+
+from . import latency
+
+
+DEFAULTS = {
+    # Time before the provider answers
+    "latency": 0.0,
+    # Fraction of requests answered with one of ``error_statuses``
+    "error_rate": 0.0,
+    "error_statuses": [500, 503],
+    # Fraction of requests that never get an answer; the connection is held
+    # for ``hang_seconds`` and then dropped
+    "timeout_rate": 0.0,
+    "hang_seconds": 60.0,
+    # Time between accepting a request and firing its callback
+    "callback_delay": "uniform:1,3",
+    # Fraction of callbacks that report a failed / declined transaction
+    "decline_rate": 0.0,
+    # Fraction of callbacks delivered twice, as providers do on retries
+    "duplicate_rate": 0.0,
+}
+
+
+class Behaviour:
+
+    def __init__(self, **options):
+        for key, value in options.items():
+            if key not in DEFAULTS:
+                raise ValueError(f"Unknown simulator option '{key}'")
+            setattr(self, key, value)
+        self.latency = latency.parse(self.latency)
+        self.callback_delay = latency.parse(self.callback_delay)
+        self.error_statuses = [int(code) for code in self.error_statuses]
+
+
+class Profile:
+
+    def __init__(self, config=None, **defaults):
+        self.config = dict(config or {})
+        self.defaults = dict(DEFAULTS)
+        self.defaults.update(self.config.get("default", {}))
+        self.defaults.update({k: v for k, v in defaults.items() if v is not None})
+        self._cache = {}
+
+    @classmethod
+    def from_file(cls, path, **defaults):
+        with open(path) as f:
+            return cls(json.load(f), **defaults)
+
+    def behaviour(self, provider, route):
+        key = f"{provider}.{route}"
+        if key not in self._cache:
+            options = dict(self.defaults)
+            options.update(self.config.get(provider, {}))
+            options.update(self.config.get(key, {}))
+            self._cache[key] = Behaviour(**options)
+        return self._cache[key]
@@ -0,0 +1,320 @@
+"""
+SasaPay endpoints used by the sasapay (KE) and sasapay_tz apps. Both
+regions share one API shape and differ in currency and channels.
+"""
+import datetime
+
+from .base import Provider, Reply, route
+
+
+CHANNELS = {
+    "KES": [
+        ("0", "SasaPay", "WALLET"),
+        ("63902", "M-PESA", "MOBILE_MONEY"),
+        ("63903", "AirtelMoney", "MOBILE_MONEY"),
+        ("63907", "T-Kash", "MOBILE_MONEY"),
+        ("01", "KCB Bank", "BANK"),
+        ("11", "Co-operative Bank", "BANK"),
+        ("68", "Equity Bank", "BANK"),
+    ],
+    "TZS": [
+        ("0", "SasaPay", "WALLET"),
+        ("TZ-MPESA", "Vodacom M-Pesa", "MOBILE_MONEY"),
+        ("TZ-TIGO", "Tigo Pesa", "MOBILE_MONEY"),
+        ("TZ-AIRTEL", "Airtel Money", "MOBILE_MONEY"),
+        ("TZ-HALO", "HaloPesa", "MOBILE_MONEY"),
+        ("TZ-CRDB", "CRDB Bank", "BANK"),
+        ("TZ-NMB", "NMB Bank", "BANK"),
+    ],
+}
+
+
+class SasaPay(Provider):
+    name = "sasapay"
+    currency = "KES"
+
+    def __init__(self, simulator):
+        super().__init__(simulator)
+        # CheckoutRequestID -> pending request-payment awaiting process-payment
+        self.pending = {}
+
+    def error(self, status):
+        return Reply(status, {
+            "status": False,
+            "detail": "Service temporarily unavailable, please retry" if status >= 500
+            else "Too many requests"
+        })
+
+    def unauthorized(self):
+        return Reply(401, {
+            "status": False,
+            "detail": "Given token not valid for any token type",
+            "code": "token_not_valid"
+        })
+
+    @staticmethod
+    def invalid(message):
+        return Reply(400, {"status": False, "detail": message})
+
+    @staticmethod
+    def now():
+        return datetime.datetime.now().strftime("%Y%m%d%H%M%S")
+
+    def missing(self, data, fields):
+        missing = [field for field in fields if data.get(field) in (None, "")]
+        if missing:
+            return self.invalid(f"{', '.join(missing)}: This field is required.")
+        return None
+
+    def callback(self, route, url, body):
+        if not url:
+            return None
+        if self.declined(route):
+            body = dict(body, ResultCode="1", ResultDesc="Transaction failed: insufficient funds")
+        return self.callback_url(url), body
+
+    @route("GET", "/auth/token/", auth=False)
+    def token(self, request):
+        if request.basic_credentials is None:
+            return Reply(401, {"status": False, "detail": "Invalid client credentials"})
+        return Reply(200, {
+            "status": True,
+            "detail": "SUCCESS",
+            "access_token": self.issue_token(),
+            "expires_in": self.token_ttl,
+            "token_type": "Bearer",
+            "scope": "read write"
+        })
+
+    def payment_request(self, route, request):
+        data = request.json or {}
+        error = self.missing(data, ["MerchantCode", "NetworkCode", "Amount", "PhoneNumber", "CallBackURL"])
+        if error:
+            return error
+
+        merchant_request_id = self.reference(length=12)
+        checkout_request_id = f"{self.reference(length=8)}-{self.reference(length=4)}"
+        result = {
+            "MerchantRequestID": merchant_request_id,
+            "CheckoutRequestID": checkout_request_id,
+            "PaymentRequestID": self.reference(length=12),
+            "ResultCode": "0",
+            "ResultDesc": "Transaction processed successfully.",
+            "SourceChannel": "SasaPay" if str(data["NetworkCode"]) == "0" else "M-PESA",
+            "TransAmount": f"{float(data['Amount']):.2f}",
+            "RequestedAmount": f"{float(data['Amount']):.2f}",
+            "Paid": True,
+            "BillRefNumber": data.get("AccountReference"),
+            "TransactionDate": self.now(),
+            "CustomerMobile": data["PhoneNumber"],
+            "TransactionCode": self.reference(),
+            "ThirdPartyTransID": self.reference()
+        }
+        reply = {
+            "status": True,
+            "detail": "Request is being processed",
+            "PaymentGateway": result["SourceChannel"],
+            "MerchantRequestID": merchant_request_id,
+            "CheckoutRequestID": checkout_request_id,
+            "TransactionReference": self.reference(),
+            "ResponseCode": "0",
+            "ResponseDescription": "Request is being processed",
+            "CustomerMessage": "Enter the verification code sent to your phone"
+        }
+
+        # SasaPay wallet payments only complete once process-payment supplies
+        # the customer's verification code
+        if result["SourceChannel"] == "SasaPay":
+            self.pending[checkout_request_id] = (data["CallBackURL"], result)
+            return Reply(200, reply)
+        return Reply(200, reply, callback=self.callback(route, data["CallBackURL"], result))
+
+    @route("POST", "/payments/request-payment/")
+    def request_payment(self, request):
+        return self.payment_request("request_payment", request)
+
+    @route("POST", "/payments/process-payment/")
+    def process_payment(self, request):
+        data = request.json or {}
+        error = self.missing(data, ["CheckoutRequestID", "MerchantCode", "VerificationCode"])
+        if error:
+            return error
+
+        pending = self.pending.pop(data["CheckoutRequestID"], None)
+        if pending is None:
+            return self.invalid("Invalid or expired CheckoutRequestID")
+
+        url, result = pending
+        return Reply(200, {
+            "status": True,
+            "detail": "Transaction is being processed",
+            "ResponseCode": "0"
+        }, callback=self.callback("process_payment", url, result))
+
+    def disbursement(self, route, data, receiver_field, callback_field="CallBackURL"):
+        error = self.missing(data, ["MerchantCode", "MerchantTransactionReference", "Amount", receiver_field])
+        if error:
+            return error
+
+        checkout_request_id = f"{self.reference(length=8)}-{self.reference(length=4)}"
+        result = {
+            "MerchantCode": data["MerchantCode"],
+            "DestinationChannel": data.get("Channel") or data.get("NetworkCode"),
+            "RecipientName": "Simulated Recipient",
+            "RecipientAccountNumber": data[receiver_field],
+            "ResultCode": "0",
+            "ResultDesc": "Transaction processed successfully.",
+            "SourceChannel": "SasaPay",
+            "SasaPayTransactionCode": self.reference(),
+            "CheckoutRequestID": checkout_request_id,
+            "SasaPayTransactionID": self.reference(),
+            "ThirdPartyTransactionCode": self.reference(),
+            "TransactionAmount": f"{float(data['Amount']):.2f}",
+            "TransactionCharges": "0.00",
+            "MerchantRequestID": self.reference(length=12),
+            "MerchantTransactionReference": data["MerchantTransactionReference"],
+            "TransactionDate": self.now(),
+            "MerchantAccountBalance": f"{self.rng.uniform(1000, 1000000):.2f}",
+            "LinkedTransactionCode": None
+        }
+        return Reply(200, {
+            "status": True,
+            "detail": "Transaction is being processed",
+            "B2CRequestID": self.reference(length=12),
+            "ConversationID": self.reference(length=12),
+            "OriginatorConversationID": checkout_request_id,
+            "ResponseCode": "0",
+            "TransactionCharges": "0.00"
+        }, callback=self.callback(route, data.get(callback_field), result))
+
+    @route("POST", "/payments/b2c/")
+    def b2c(self, request):
+        return self.disbursement("b2c", request.json or {}, "ReceiverNumber")
+
+    @route("POST", "/payments/b2b/")
+    def b2b(self, request):
+        return self.disbursement("b2b", request.json or {}, "ReceiverMerchantCode")
+
+    @route("GET", "/payments/channel-codes/")
+    def channel_codes(self, request):
+        return Reply(200, {
+            "status": True,
+            "detail": "Channel codes fetched",
+            "data": [
+                {"channel_code": code, "channel_name": name, "channel_type": kind}
+                for code, name, kind in CHANNELS[self.currency]
+            ]
+        })
+
+    @route("POST", "/payments/card-payments/")
+    def card_payments(self, request):
+        data = request.json or {}
+        error = self.missing(data, ["MerchantCode", "Amount", "Reference", "CallbackUrl"])
+        if error:
+            return error
+
+        payment_request_id = self.reference(length=12)
+        return Reply(200, {
+            "status": True,
+            "detail": "Checkout link generated",
+            "CheckoutUrl": f"https://checkout.sasapay.app/pay/{payment_request_id.lower()}",
+            "PaymentRequestID": payment_request_id,
+            "MerchantReference": data["Reference"]
+        }, callback=self.callback("card_payments", data["CallbackUrl"], {
+            "MerchantRequestID": payment_request_id,
+            "CheckoutRequestID": payment_request_id,
+            "PaymentRequestID": payment_request_id,
+            "ResultCode": "0",
+            "ResultDesc": "Transaction processed successfully.",
+            "SourceChannel": "CARD",
+            "TransAmount": f"{float(data['Amount']):.2f}",
+            "BillRefNumber": data["Reference"],
+            "TransactionDate": self.now(),
+            "TransactionCode": self.reference()
+        }))
+
+    @route("POST", "/remittances/remittance-payments/")
+    def remittance(self, request):
+        data = request.json or {}
+        receiver = "ReceiverAccountNumber" if data.get("ReceiverAccountNumber") else "ReceiverPhoneNumber"
+        return self.disbursement("remittance", data, receiver, callback_field="CallbackUrl")
+
+    @route("POST", "/transactions/status-query/")
+    def status_query(self, request):
+        data = request.json or {}
+        error = self.missing(data, ["MerchantCode"])
+        if error:
+            return error
+        if not (data.get("CheckoutRequestId") or data.get("MerchantTransactionReference")
+                or data.get("TransactionCode")):
+            return self.invalid("One of CheckoutRequestId, MerchantTransactionReference or TransactionCode is required.")
+
+        return Reply(200, {
+            "status": True,
+            "detail": "Request received, results will be sent to the callback URL"
+        }, callback=self.callback("status_query", data.get("CallbackUrl"), {
+            "MerchantCode": data["MerchantCode"],
+            "CheckoutRequestID": data.get("CheckoutRequestId"),
+            "MerchantTransactionReference": data.get("MerchantTransactionReference"),
+            "TransactionCode": data.get("TransactionCode") or self.reference(),
+            "ResultCode": "0",
+            "ResultDesc": "Transaction query successful",
+            "TransactionStatus": "COMPLETED",
+            "TransactionDate": self.now()
+        }))
+
+
+class SasaPayTZ(SasaPay):
+    name = "sasapay-tz"
+    currency = "TZS"
+
+    @route("POST", "/transactions/fund-movement/")
+    def fund_movement(self, request):
+        data = request.json or {}
+        error = self.missing(data, ["merchantCode", "amount"])
+        if error:
+            return error
+        return Reply(200, {
+            "status": True,
+            "message": "Funds moved successfully",
+            "data": {
+                "merchantCode": data["merchantCode"],
+                "amount": data["amount"],
+                "transactionCode": self.reference()
+            }
+        })
+
+    @route("POST", "/accounts/account-validation/")
+    def account_validation(self, request):
+        data = request.json or {}
+        error = self.missing(data, ["merchant_code", "channel_code", "account_number"])
+        if error:
+            return error
+
+        # Accounts ending in 0000 do not exist, so callers can exercise the
+        # not-found path deterministically
+        if str(data["account_number"]).endswith("0000"):
+            return Reply(404, {"status": False, "detail": "Account not found"})
+        return Reply(200, {
+            "status": True,
+            "message": "Account validated successfully",
+            "data": {
+                "account_number": data["account_number"],
+                "account_name": "Simulated Account Holder",
+                "channel_code": data["channel_code"]
+            }
+        })
+
+    @route("GET", "/payments/check-balance/")
+    def check_balance(self, request):
+        return Reply(200, {
+            "status": True,
+            "message": "Balance fetched successfully",
+            "data": {
+                "CurrencyCode": self.currency,
+                "Accounts": [
+                    {"account_label": "Working Account", "account_balance": round(self.rng.uniform(1e5, 1e7), 2)},
+                    {"account_label": "Utility Account", "account_balance": round(self.rng.uniform(1e4, 1e6), 2)},
+                ]
+            }
+        })
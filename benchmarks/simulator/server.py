@@ -0,0 +1,242 @@
+import asyncio
+import json
+import random
+import threading
+from collections import Counter
+from http import HTTPStatus
+
+import aiohttp
+
+from .base import Reply, Request
+from .daraja import Daraja
+from .flutterwave import Flutterwave
+from .profile import Profile
+from .sasapay import SasaPay, SasaPayTZ
+
+
+PROVIDERS = (Daraja, SasaPay, SasaPayTZ, Flutterwave)
+TOKEN_PATHS = {"flutterwave": "/realms/flutterwave/protocol/openid-connect/token"}
+
+
+def gateway_environ(base_url):
+    """
+    Settings that point every gateway app at a simulator on ``base_url``.
+    """
+    return {
+        "MPESA_BASE_URL": f"{base_url}/daraja",
+        "SASAPAY_BASE_URL": f"{base_url}/sasapay",
+        "SASAPAY_TZ_BASE_URL": f"{base_url}/sasapay-tz",
+        "FLUTTERWAVE_BASE_URL": f"{base_url}/flutterwave",
+        "FLUTTERWAVE_TOKEN_URL": f"{base_url}/flutterwave{TOKEN_PATHS['flutterwave']}",
+    }
+
+
+class ProviderSimulator:
+    """
+    Local stand-in for Daraja, SasaPay (KE / TZ) and Flutterwave, each
+    mounted under its own prefix (``/daraja``, ``/sasapay``, ``/sasapay-tz``,
+    ``/flutterwave``).
+
+    Every request is delayed, failed or dropped according to the profile,
+    tokens are checked like the real APIs, and accepted transactions fire
+    their callbacks in the background. Counters are served as JSON at
+    ``GET /_simulator/stats``; ``POST /_simulator/callbacks`` is a sink that
+    acknowledges callbacks.
+
+    It speaks just enough HTTP/1.1 (keep-alive, Content-Length bodies) for
+    the gateway's clients and never blocks one connection on another.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, profile=None, seed=None, callback_urls=None,
+                 seed_customers=0, seed_charges=0, **defaults):
+        self.host = host
+        self.port = port
+        self.rng = random.Random(seed)
+        self.profile = profile if isinstance(profile, Profile) else Profile(profile, **defaults)
+        # provider name (or "*") -> URL that receives that provider's callbacks
+        self.callback_urls = dict(callback_urls or {})
+        self.providers = {cls.name: cls(self) for cls in PROVIDERS}
+        self.providers["flutterwave"].seed(seed_customers, seed_charges)
+
+        self.counters = Counter()
+        self.routes = Counter()
+        self.statuses = Counter()
+        self._callbacks = set()
+        self._session = None
+        self._server = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def sink_url(self):
+        """
+        Callback target that just acknowledges, for runs without a gateway
+        callback endpoint listening.
+        """
+        return f"{self.base_url}/_simulator/callbacks"
+
+    def environ(self):
+        return gateway_environ(self.base_url)
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, backlog=4096)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def start_in_thread(self):
+        """
+        Run the simulator on its own event loop in a daemon thread and return
+        once it is accepting connections.
+        """
+        ready = threading.Event()
+
+        def run():
+            loop = asyncio.new_event_loop()
+            loop.run_until_complete(self.start())
+            ready.set()
+            loop.run_forever()
+
+        threading.Thread(target=run, name="provider-simulator", daemon=True).start()
+        ready.wait()
+        return self
+
+    def stats(self):
+        return {
+            **self.counters,
+            "callbacks_pending": len(self._callbacks),
+            "routes": dict(sorted(self.routes.items())),
+            "statuses": {str(code): count for code, count in sorted(self.statuses.items())},
+        }
+
+    async def _handle(self, reader, writer):
+        self.counters["connections"] += 1
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+
+                reply = await self._dispatch(request)
+                if reply is None:
+                    # Simulated timeout: hold the connection, then drop it
+                    break
+
+                self.statuses[reply.status] += 1
+                payload = json.dumps(reply.body).encode()
+                writer.write(
+                    f"HTTP/1.1 {reply.status} {HTTPStatus(reply.status).phrase}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: keep-alive\r\n\r\n".encode() + payload
+                )
+                await writer.drain()
+                if request.headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_request(reader):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            return None
+
+        lines = head.decode("latin-1").split("\r\n")
+        method, target, _ = lines[0].split(" ", 2)
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length", 0))
+        body = await reader.readexactly(length) if length else b""
+        path, _, query = target.partition("?")
+        return Request(method, path, query, headers, body)
+
+    async def _dispatch(self, request):
+        self.counters["requests"] += 1
+        prefix, _, rest = request.path.lstrip("/").partition("/")
+
+        if prefix == "_simulator":
+            if rest == "stats":
+                return Reply(200, self.stats())
+            if rest == "callbacks":
+                self.counters["callbacks_received"] += 1
+                return Reply(200, {"ResultCode": 0, "ResultDesc": "Accepted"})
+
+        provider = self.providers.get(prefix)
+        if provider is None:
+            return Reply(404, {"message": f"No simulated provider at /{prefix}"})
+
+        resolved = provider.resolve(request.method, "/" + rest)
+        if isinstance(resolved, Reply):
+            return resolved
+        route, handler, auth, params = resolved
+        self.routes[f"{provider.name}.{route}"] += 1
+
+        behaviour = self.profile.behaviour(provider.name, route)
+        delay = behaviour.latency.sample(self.rng)
+        if delay:
+            await asyncio.sleep(delay)
+
+        roll = self.rng.random()
+        if roll < behaviour.timeout_rate:
+            self.counters["injected_timeouts"] += 1
+            await asyncio.sleep(behaviour.hang_seconds)
+            return None
+        if roll < behaviour.timeout_rate + behaviour.error_rate:
+            self.counters["injected_errors"] += 1
+            return provider.error(self.rng.choice(behaviour.error_statuses))
+
+        if auth and not provider.authorized(request):
+            return provider.unauthorized()
+
+        request.params = params
+        try:
+            reply = handler(request)
+        except (ValueError, TypeError, KeyError) as e:
+            return provider.invalid(f"Invalid request: {e}")
+
+        if reply.callback is not None:
+            url, body = reply.callback
+            task = asyncio.ensure_future(self._fire_callback(behaviour, url, body))
+            self._callbacks.add(task)
+            task.add_done_callback(self._callbacks.discard)
+        return reply
+
+    async def _fire_callback(self, behaviour, url, body):
+        self.counters["callbacks_scheduled"] += 1
+        await asyncio.sleep(behaviour.callback_delay.sample(self.rng))
+
+        # Deferred bodies settle provider state at delivery time
+        if callable(body):
+            body = body()
+        if not url:
+            return
+
+        deliveries = 2 if self.rng.random() < behaviour.duplicate_rate else 1
+        if deliveries > 1:
+            self.counters["callbacks_duplicated"] += 1
+        for _ in range(deliveries):
+            await self._post_callback(url, body)
+
+    async def _post_callback(self, url, body):
+        if self._session is None:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30))
+        try:
+            async with self._session.post(url, json=body) as response:
+                await response.read()
+                delivered = 200 <= response.status < 300
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            delivered = False
+        self.counters["callbacks_delivered" if delivered else "callbacks_failed"] += 1
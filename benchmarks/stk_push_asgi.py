@@ -0,0 +1,91 @@
+"""
+Concurrent STK-push throughput: sync views under WSGI vs native async views
+under ASGI, both against the local provider simulator.
+
+    python -m benchmarks.stk_push_asgi --requests 2000 --latency 0.5 \
+        --wsgi-threads 32 --asgi-concurrency 1000
+
+WSGI mode drives the DRF views through Django's WSGI handler from a fixed
+pool of threads (a gthread worker); ASGI mode drives the async views
+through the ASGI handler on one event loop. Each mode runs in its own
+subprocess so pools, tokens and metrics start cold.
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+from .harness import configure, run_async, run_threads, summarize
+from .simulator import ProviderSimulator
+
+STK_PUSH = {
+    "TransactionType": "CustomerPayBillOnline",
+    "Amount": 1,
+    "PartyA": "254708374149",
+    "PartyB": "174379",
+    "PhoneNumber": "254708374149",
+    "CallBackURL": "https://example.com/callback",
+    "AccountReference": "bench",
+    "TransactionDesc": "bench"
+}
+
+
+def stk_push(client, i):
+    return client.post("/mpesa/v1/stk-push/", STK_PUSH, content_type="application/json")
+
+
+def run_wsgi(count, threads):
+    return {"mode": "wsgi", **summarize(*run_threads(stk_push, count, threads))}
+
+
+def run_asgi(count, concurrency):
+    async def call(client, i):
+        return await stk_push(client, i)
+
+    return {"mode": "asgi", **summarize(*run_async(call, count, concurrency))}
+
+
+def child(args):
+    configure(args.base_url, asgi=args.mode == "asgi")
+    if args.mode == "wsgi":
+        result = run_wsgi(args.requests, args.wsgi_threads)
+    else:
+        result = run_asgi(args.requests, args.asgi_concurrency)
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--latency", default="0.5", help="provider latency distribution (see benchmarks/simulator)")
+    parser.add_argument("--wsgi-threads", type=int, default=32)
+    parser.add_argument("--asgi-concurrency", type=int, default=1000)
+    parser.add_argument("--mode", choices=["wsgi", "asgi"], help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        return child(args)
+
+    simulator = ProviderSimulator(latency=args.latency).start_in_thread()
+    # Keep STK callbacks on the loopback instead of the payload's CallBackURL
+    simulator.callback_urls["*"] = simulator.sink_url
+    results = []
+    for mode in ("wsgi", "asgi"):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.stk_push_asgi", "--mode", mode, "--base-url", simulator.base_url,
+             "--requests", str(args.requests), "--wsgi-threads", str(args.wsgi_threads),
+             "--asgi-concurrency", str(args.asgi_concurrency)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"{'mode':<6}{'requests':>10}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for r in results:
+        print(f"{r['mode']:<6}{r['requests']:>10}{r['errors']:>8}{r['rps']:>10}"
+              f"{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}")
+    print(f"\nasgi/wsgi throughput: {results[1]['rps'] / results[0]['rps']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+from django.contrib import admin
+
+from .models import Transaction
+
+
+@admin.register(Transaction)
+class TransactionAdmin(admin.ModelAdmin):
+    list_display = ("id", "provider", "kind", "status", "amount", "currency", "created_at")
+    list_filter = ("provider", "kind", "status")
+    search_fields = (
+        "checkout_request_id", "merchant_request_id", "originator_conversation_id",
+        "merchant_transaction_reference", "reference", "trans_id", "bill_ref_number",
+    )
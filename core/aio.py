@@ -0,0 +1,193 @@
+import asyncio
+import json
+import threading
+import time
+import weakref
+
+import aiohttp
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from . import bulkhead, circuit, metrics, ratelimit, retry
+
+
+# Transport failures the async views report like RequestException
+TRANSPORT_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError)
+
+
+class AsyncResponse:
+    """
+    Provider reply read in full, so the connection goes straight back to the
+    pool. Mirrors the parts of ``requests.Response`` the views use.
+    """
+
+    def __init__(self, status_code, content, headers):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+
+    @property
+    def is_success(self):
+        return 200 <= self.status_code < 300
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class AsyncProviderClient:
+    """
+    Pooled, keep-alive asyncio HTTP client for a single payment provider,
+    used by the native async views under ASGI.
+
+    aiohttp sessions are bound to the event loop that created them, so one
+    ``aiohttp.ClientSession`` is kept per running loop.
+    """
+
+    def __init__(self, name, max_connections=500, connect_timeout=3.05, read_timeout=30):
+        self.name = name
+        self.max_connections = max_connections
+        self.timeout = aiohttp.ClientTimeout(
+            total=None, sock_connect=connect_timeout, sock_read=read_timeout
+        )
+        self.requests_sent = metrics.Counter()
+        self.connections_opened = metrics.Counter()
+        self._sessions = weakref.WeakKeyDictionary()
+
+    def _session(self):
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            trace = aiohttp.TraceConfig()
+            trace.on_connection_create_end.append(self._connection_created)
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=self.timeout,
+                trace_configs=[trace],
+            )
+            self._sessions[loop] = session
+        return session
+
+    async def _connection_created(self, session, context, params):
+        self.connections_opened.incr()
+
+    async def request(self, method, url, token_manager=None, **kwargs):
+        """
+        Async counterpart of ``ProviderClient.request``: with
+        ``token_manager`` the call is authorized with its Bearer token and a
+        401 is retried once with a fresh one, and failures are retried as the
+        endpoint's retry policy allows.
+        """
+        async def send(budget):
+            options = kwargs
+            if budget is not None:
+                options = {**kwargs, "timeout": aiohttp.ClientTimeout(
+                    total=None, sock_connect=min(self.timeout.sock_connect, budget),
+                    sock_read=min(self.timeout.sock_read, budget),
+                )}
+            return await self._authorized(method, url, token_manager, **options)
+
+        return await retry.get_policy(self.name, url).call_async(send, method, kwargs.get("headers"))
+
+    async def _authorized(self, method, url, token_manager, **kwargs):
+        if token_manager is None:
+            return await self._send(method, url, **kwargs)
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        token = await self._token(token_manager)
+        headers["Authorization"] = f"Bearer {token}"
+        response = await self._send(method, url, headers=headers, **kwargs)
+
+        if response.status_code == 401:
+            await sync_to_async(token_manager.invalidate, thread_sensitive=False)(token)
+            headers["Authorization"] = f"Bearer {await self._token(token_manager)}"
+            response = await self._send(method, url, headers=headers, **kwargs)
+        return response
+
+    async def _token(self, token_manager):
+        # Only a refresh does blocking I/O; serve fresh tokens on the loop
+        token = token_manager.cached_token()
+        if token is None:
+            token = await sync_to_async(token_manager.get_access_token, thread_sensitive=False)()
+        return token
+
+    async def _send(self, method, url, **kwargs):
+        params = kwargs.get("params")
+        if isinstance(params, dict):
+            # requests drops None params; aiohttp rejects them
+            kwargs["params"] = {k: v for k, v in params.items() if v is not None}
+
+        breaker = circuit.get_breaker(self.name, url)
+        limiter = ratelimit.get_limiter(self.name, url)
+        probe = breaker.before()
+        try:
+            # Wait for the rate limit before taking a slot, so the wait
+            # doesn't hold one and turn bursts into BulkheadFull
+            if limiter is not None:
+                await limiter.acquire_async()
+            async with bulkhead.get_bulkhead(self.name).async_slot():
+                self.requests_sent.incr()
+                start = time.monotonic()
+                try:
+                    async with self._session().request(method, url, **kwargs) as response:
+                        content = await response.read()
+                except TRANSPORT_ERRORS:
+                    breaker.record(True, time.monotonic() - start, probe)
+                    raise
+        except (ratelimit.RateLimited, bulkhead.BulkheadFull, asyncio.CancelledError):
+            breaker.cancel(probe)
+            raise
+
+        breaker.record(response.status >= 500, time.monotonic() - start, probe)
+        if limiter is not None and response.status == 429:
+            await sync_to_async(limiter.throttle, thread_sensitive=False)(response.headers.get("Retry-After"))
+        return AsyncResponse(response.status, content, response.headers)
+
+    async def get(self, url, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request("POST", url, **kwargs)
+
+    async def put(self, url, **kwargs):
+        return await self.request("PUT", url, **kwargs)
+
+    def stats(self):
+        sent = self.requests_sent.value
+        opened = self.connections_opened.value
+        return {
+            "requests": sent,
+            "connections_opened": opened,
+            "connections_reused": max(sent - opened, 0),
+        }
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_async_client(name):
+    """
+    Return the process-wide async client for ``name``. Timeouts follow the
+    provider's sync pool settings; ``PROVIDER_ASYNC_HTTP_MAX_CONNECTIONS``
+    caps concurrent connections.
+    """
+    client = _clients.get(name)
+    if client is not None:
+        return client
+
+    with _clients_lock:
+        if name not in _clients:
+            options = dict(settings.PROVIDER_HTTP_DEFAULTS)
+            options.update(settings.PROVIDER_HTTP.get(name, {}))
+            _clients[name] = AsyncProviderClient(
+                name,
+                max_connections=settings.PROVIDER_ASYNC_HTTP_MAX_CONNECTIONS,
+                connect_timeout=options["connect_timeout"],
+                read_timeout=options["read_timeout"],
+            )
+            metrics.register(f"http_async.{name}", _clients[name].stats)
+        return _clients[name]
@@ -0,0 +1,157 @@
+import json
+
+import requests
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+
+from core import ledger
+from core.aio import TRANSPORT_ERRORS
+from core.circuit import ProviderUnavailable
+
+
+class AsyncProviderView(View):
+    """
+    Base for the native async provider views served under ASGI.
+
+    Subclasses build the same payloads as their sync counterparts (from the
+    app's ``payloads`` module) and hand them to ``call_provider``, which
+    awaits the provider without holding a worker thread.
+    """
+
+    client = None
+    # ``core.models.Transaction.Provider`` recorded for ``ledger_kind`` calls
+    ledger_provider = None
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Same CSRF behaviour as the DRF APIViews these mirror
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    def get_token_manager(self):
+        return None
+
+    @staticmethod
+    def ledger_data(res_data):
+        """
+        The part of a successful provider reply that carries its references.
+        """
+        return res_data
+
+    async def record(self, kind, payload, res_data):
+        await sync_to_async(ledger.record)(self.ledger_provider, kind, payload, self.ledger_data(res_data))
+
+    @staticmethod
+    def parse_body(request):
+        if not request.body:
+            return {}
+        return json.loads(request.body)
+
+    def parse_or_reject(self, request):
+        """
+        Return ``(data, None)`` or ``(None, error_response)`` for bad JSON.
+        """
+        try:
+            return self.parse_body(request), None
+        except ValueError:
+            return None, JsonResponse(
+                {"status": False, "message": "Request body must be valid JSON."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+    @staticmethod
+    def unavailable(e):
+        """
+        The 503 (429 when rate limited) sent when the gateway refused to call
+        the provider (``ProviderUnavailable``).
+        """
+        response = JsonResponse(e.detail, status=e.status_code)
+        response["Retry-After"] = str(e.wait)
+        return response
+
+    async def fetch(self, method, url, error_message, headers=None, coalesce=None, coalesce_query=None, **kwargs):
+        """
+        Call the provider and decode its JSON body.
+
+        Returns ``(response, res_data, None)``, or ``(None, None, error)``
+        where ``error`` is the 500 response the sync views send when the
+        request itself fails, or a 503 while the endpoint's circuit is open.
+        With ``coalesce`` (a ``core.coalesce.Coalescer``), concurrent calls
+        with the same ``coalesce_query`` (default: the ``json`` or
+        ``params``) share one provider call.
+        """
+        if headers is None:
+            headers = {"Content-Type": "application/json"}
+
+        def send():
+            return self.client.request(
+                method, url, headers=headers, token_manager=self.get_token_manager(), **kwargs
+            )
+
+        try:
+            if coalesce is None:
+                response = await send()
+            else:
+                if coalesce_query is None:
+                    coalesce_query = kwargs.get("json", kwargs.get("params"))
+                response = await coalesce.call_async(coalesce_query, send)
+            return response, response.json(), None
+        except ProviderUnavailable as e:
+            return None, None, self.unavailable(e)
+        except TRANSPORT_ERRORS + (requests.exceptions.RequestException, ValueError) as e:
+            return None, None, JsonResponse(
+                {
+                    "status": False,
+                    "message": f"{error_message}: {str(e)}"
+                },
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    async def call_provider(self, method, url, success_message, failure_message, error_message,
+                            check_status=False, provider_message=False,
+                            provider_failure_message=False, ledger_kind=None, on_success=None, **kwargs):
+        """
+        Call the provider and shape the reply like the sync views do:
+        ``{"status", "message", "data"}`` with the provider's status code.
+
+        ``check_status`` also treats a ``{"status": false}`` body as a failure
+        (SasaPay reports some errors that way) and reports the provider's own
+        message. ``provider_message`` / ``provider_failure_message`` prefer the
+        provider's ``message`` over the default on success / failure.
+        ``ledger_kind`` records an accepted request in the transaction ledger;
+        ``on_success(res_data)`` is awaited for one as well.
+        Other keyword arguments (``coalesce``, ``json``...) go to ``fetch``.
+        """
+        response, res_data, error = await self.fetch(method, url, error_message, **kwargs)
+        if error is not None:
+            return error
+
+        is_dict = isinstance(res_data, dict)
+        failed = not response.is_success
+        if check_status and is_dict and not res_data.get("status", True):
+            failed = True
+
+        if failed:
+            message = failure_message
+            if check_status and is_dict:
+                message = res_data.get("message") or res_data.get("detail") or failure_message
+            elif provider_failure_message and is_dict:
+                message = res_data.get("message", failure_message)
+            return JsonResponse(
+                {"status": False, "message": message, "data": res_data},
+                status=response.status_code
+            )
+
+        if ledger_kind is not None and is_dict:
+            await self.record(ledger_kind, kwargs.get("json"), res_data)
+        if on_success is not None and is_dict:
+            await on_success(res_data)
+
+        if provider_message and is_dict:
+            success_message = res_data.get("message", success_message)
+        return JsonResponse(
+            {"status": True, "message": success_message, "data": res_data},
+            status=response.status_code
+        )
@@ -0,0 +1,8 @@
+from django.urls import path
+from .views import *
+
+urlpatterns = [
+    path("metrics/", MetricsView.as_view(), name="metrics"),
+    path("payouts/<int:id>/", PayoutBatchView.as_view(), name="payout-batch"),
+    path("payouts/<int:id>/items/", PayoutItemsView.as_view(), name="payout-items"),
+]
@@ -0,0 +1,155 @@
+import csv
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.shortcuts import get_object_or_404
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+
+from .. import idempotency, metrics, payouts
+from ..models import PayoutBatch, PayoutItem
+
+
+class MetricsView(APIView):
+    """
+    Expose in-process gateway counters (connection reuse, queues, limiters).
+    """
+
+    def get(self, request):
+        return Response(
+            {
+                "status": True,
+                "message": "Metrics fetched successfully",
+                "data": metrics.snapshot()
+            },
+            status=status.HTTP_200_OK
+        )
+
+
+class BulkPayoutView(APIView):
+    """
+    Accept a file of B2C payouts and send them in the background.
+
+    The body is CSV (``Content-Type: text/csv``, header line first) or
+    NDJSON, one payout per row in the fields of the provider's single B2C
+    endpoint. Query parameters apply to every row that does not set them
+    (e.g. ``?MerchantCode=600980&CallBackURL=...``); ``concurrency`` caps
+    the provider calls in flight. Rows are validated as the upload streams
+    in; progress is at ``core/v1/payouts/<id>/``.
+
+    An ``Idempotency-Key`` header is required, and a second upload with a
+    key already used for this provider is refused with a 409, so a file is
+    never paid out twice. Rows without a reference get one derived from
+    the key.
+    """
+    # A core.payouts.PayoutChannel
+    channel = None
+
+    def post(self, request):
+        params = request.query_params.dict()
+        try:
+            concurrency = int(params.pop("concurrency", settings.PAYOUT_CONCURRENCY))
+        except ValueError:
+            return Response(
+                {"status": False, "message": "concurrency must be an integer"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        concurrency = max(1, min(concurrency, settings.PAYOUT_MAX_CONCURRENCY))
+
+        key = idempotency.caller_key(request)
+        if key is None:
+            return Response(
+                {"status": False, "message": "An Idempotency-Key header is required for payout batches"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            with transaction.atomic():
+                batch = PayoutBatch.objects.create(
+                    provider=self.channel.provider, idempotency_key=key[:255], concurrency=concurrency,
+                    defaults=params
+                )
+        except IntegrityError:
+            batch = PayoutBatch.objects.get(provider=self.channel.provider, idempotency_key=key[:255])
+            return Response(
+                {
+                    "status": False,
+                    "message": "A payout batch was already uploaded with this Idempotency-Key",
+                    "data": payouts.summary(batch)
+                },
+                status=status.HTTP_409_CONFLICT
+            )
+        try:
+            payouts.ingest(batch, payouts.read_rows(request.stream or [], request.content_type), self.channel)
+        except (UnicodeDecodeError, csv.Error) as e:
+            # Nothing was sent, so the key is free for a corrected upload
+            batch.status = PayoutBatch.Status.FAILED
+            batch.error = f"Unreadable upload: {e}"[:255]
+            batch.idempotency_key = None
+            batch.save(update_fields=["status", "error", "idempotency_key"])
+            return Response(
+                {"status": False, "message": batch.error, "data": payouts.summary(batch)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        payouts.start(batch, self.channel)
+        return Response(
+            {
+                "status": True,
+                "message": "Payout batch accepted",
+                "data": payouts.summary(batch)
+            },
+            status=status.HTTP_202_ACCEPTED
+        )
+
+
+class PayoutBatchView(APIView):
+    """
+    Progress of a payout batch: row counts per status.
+    """
+
+    def get(self, request, id):
+        batch = get_object_or_404(PayoutBatch, pk=id)
+        return Response(
+            {
+                "status": True,
+                "message": "Payout batch fetched successfully",
+                "data": payouts.summary(batch)
+            },
+            status=status.HTTP_200_OK
+        )
+
+
+class PayoutItemsView(APIView):
+    """
+    Rows of a payout batch, optionally filtered by ``status``, paged with
+    ``page`` / ``size``.
+    """
+
+    fields = ("row_number", "status", "reference", "receiver", "amount", "error", "response",
+              "transaction_id", "transaction__status", "updated_at")
+
+    def get(self, request, id):
+        batch = get_object_or_404(PayoutBatch, pk=id)
+        try:
+            page = max(1, int(request.query_params.get("page", 1)))
+            size = max(1, min(int(request.query_params.get("size", 100)), 1000))
+        except ValueError:
+            return Response(
+                {"status": False, "message": "page and size must be integers"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        items = batch.items.order_by("row_number")
+        if request.query_params.get("status"):
+            items = items.filter(status=request.query_params["status"])
+        rows = list(items.values(*self.fields)[(page - 1) * size:page * size])
+
+        return Response(
+            {
+                "status": True,
+                "message": "Payout items fetched successfully",
+                "data": {"page": page, "size": size, "items": rows}
+            },
+            status=status.HTTP_200_OK
+        )
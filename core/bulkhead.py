@@ -0,0 +1,117 @@
+import asyncio
+import contextlib
+import threading
+import weakref
+
+from django.conf import settings
+
+from . import metrics
+from .circuit import ProviderUnavailable
+
+
+class BulkheadFull(ProviderUnavailable):
+    """
+    Every slot for the provider stayed busy for ``max_wait``.
+    """
+
+    def __init__(self, name, max_concurrent):
+        super().__init__(f"{name} is at capacity ({max_concurrent} calls in flight), retry shortly", 1)
+
+
+class Bulkhead:
+    """
+    Caps how many calls to one provider are in flight in this process.
+
+    A slow provider can then only hold ``max_concurrent`` worker threads;
+    further calls wait up to ``max_wait`` for a slot and are then refused
+    with ``BulkheadFull`` (a 503), leaving the rest of the pool to other
+    providers. Async views take slots from a separate semaphore of the same
+    size on their event loop.
+    """
+
+    def __init__(self, name, max_concurrent=20, max_wait=0.05):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_wait = max_wait
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._async_slots = weakref.WeakKeyDictionary()
+
+        self._lock = threading.Lock()
+        self._active = 0
+        self._peak = 0
+        self.admitted = metrics.Counter()
+        self.rejected = metrics.Counter()
+        metrics.register(f"bulkhead.{name}", self.stats)
+
+    def _enter(self):
+        with self._lock:
+            self._active += 1
+            self._peak = max(self._peak, self._active)
+        self.admitted.incr()
+
+    def _exit(self):
+        with self._lock:
+            self._active -= 1
+
+    def _reject(self):
+        self.rejected.incr()
+        return BulkheadFull(self.name, self.max_concurrent)
+
+    @contextlib.contextmanager
+    def slot(self):
+        if not self._slots.acquire(timeout=self.max_wait):
+            raise self._reject()
+        self._enter()
+        try:
+            yield
+        finally:
+            self._exit()
+            self._slots.release()
+
+    @contextlib.asynccontextmanager
+    async def async_slot(self):
+        loop = asyncio.get_running_loop()
+        slots = self._async_slots.get(loop)
+        if slots is None:
+            slots = self._async_slots[loop] = asyncio.Semaphore(self.max_concurrent)
+        try:
+            await asyncio.wait_for(slots.acquire(), self.max_wait)
+        except asyncio.TimeoutError:
+            raise self._reject() from None
+        self._enter()
+        try:
+            yield
+        finally:
+            self._exit()
+            slots.release()
+
+    def stats(self):
+        return {
+            "max_concurrent": self.max_concurrent,
+            "active": self._active,
+            "peak": self._peak,
+            "admitted": self.admitted.value,
+            "rejected": self.rejected.value,
+        }
+
+
+_bulkheads = {}
+_bulkheads_lock = threading.Lock()
+
+
+def get_bulkhead(provider):
+    """
+    The process-wide bulkhead for ``provider``, sized from
+    ``settings.PROVIDER_BULKHEAD_DEFAULTS`` and
+    ``settings.PROVIDER_BULKHEAD[provider]``.
+    """
+    bulkhead = _bulkheads.get(provider)
+    if bulkhead is not None:
+        return bulkhead
+
+    with _bulkheads_lock:
+        if provider not in _bulkheads:
+            options = dict(settings.PROVIDER_BULKHEAD_DEFAULTS)
+            options.update(settings.PROVIDER_BULKHEAD.get(provider, {}))
+            _bulkheads[provider] = Bulkhead(provider, **options)
+        return _bulkheads[provider]
@@ -0,0 +1,220 @@
+import math
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from . import metrics
+
+
+class ProviderUnavailable(APIException):
+    """
+    The gateway refused to call a provider, so nothing was sent.
+
+    Raised past the views' ``RequestException`` handling; DRF turns it into
+    a 503 (a 429 for ``RateLimited``) with ``Retry-After``.
+    """
+
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_code = "provider_unavailable"
+
+    def __init__(self, message, wait):
+        self.wait = max(1, math.ceil(wait))
+        super().__init__(message)
+        self.detail = {"status": False, "message": message}
+
+
+class CircuitOpen(ProviderUnavailable):
+    """
+    A provider endpoint's circuit is open.
+    """
+
+    def __init__(self, name, wait):
+        super().__init__(f"{name} is unavailable, retry in {max(1, math.ceil(wait))}s", wait)
+
+
+class CircuitBreaker:
+    """
+    Fails calls to one provider endpoint fast while it is unhealthy.
+
+    Closed, every call goes through and its outcome is counted in one-second
+    buckets over the last ``window`` seconds. A transport error, a 5xx or a
+    reply slower than ``slow_call_seconds`` is a failure. The circuit opens
+    once ``failure_rate`` of at least ``min_calls`` calls failed, or after
+    ``consecutive_failures`` in a row, and then rejects calls with
+    ``CircuitOpen`` for ``open_seconds``. After that, up to ``probes`` calls
+    at a time are let through half-open: a success closes the circuit, a
+    failure opens it again for twice as long (up to ``max_open_seconds``).
+
+    State is per process, so a dead provider costs each worker a handful of
+    timeouts rather than a cache round trip on every call.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name, window=30.0, min_calls=10, failure_rate=0.5, consecutive_failures=5,
+                 slow_call_seconds=5.0, open_seconds=15.0, max_open_seconds=120.0, probes=1):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.consecutive_failures = consecutive_failures
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.probes = probes
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        # second -> [calls, failures]
+        self._buckets = {}
+        self._consecutive = 0
+        self._open_until = 0.0
+        self._open_for = open_seconds
+        self._probing = 0
+
+        self.rejected = metrics.Counter()
+        self.opened = metrics.Counter()
+        self.failures = metrics.Counter()
+        self.slow_calls = metrics.Counter()
+        metrics.register(f"circuit.{name}", self.stats)
+
+    def before(self):
+        """
+        Admit a call, or raise CircuitOpen. Returns True if the call is a
+        half-open probe. Every admitted call must be followed by ``record``
+        or ``cancel``, passed that flag.
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return False
+            now = time.monotonic()
+            if self._state == self.OPEN and now >= self._open_until:
+                self._state = self.HALF_OPEN
+            if self._state == self.HALF_OPEN and self._probing < self.probes:
+                self._probing += 1
+                return True
+            wait = self._open_until - now if self._state == self.OPEN else 1
+        self.rejected.incr()
+        raise CircuitOpen(self.name, wait)
+
+    def cancel(self, probe=False):
+        """
+        An admitted call was never sent.
+        """
+        if probe:
+            with self._lock:
+                self._probing = max(self._probing - 1, 0)
+
+    def record(self, failed, elapsed, probe=False):
+        """
+        The outcome of a call ``before`` admitted. Only probes move a
+        half-open circuit; calls admitted while closed that finish after it
+        opened are counted but change nothing.
+        """
+        slow = elapsed >= self.slow_call_seconds
+        failed = failed or slow
+        if slow:
+            self.slow_calls.incr()
+        if failed:
+            self.failures.incr()
+
+        with self._lock:
+            if probe:
+                self._probing = max(self._probing - 1, 0)
+                if self._state == self.HALF_OPEN:
+                    if failed:
+                        self._trip(self._open_for * 2)
+                    else:
+                        self._reset()
+                return
+            if self._state != self.CLOSED:
+                return
+
+            second = int(time.monotonic())
+            bucket = self._buckets.setdefault(second, [0, 0])
+            bucket[0] += 1
+            bucket[1] += failed
+            self._consecutive = self._consecutive + 1 if failed else 0
+            if not failed:
+                return
+
+            oldest = second - self.window
+            for key in [key for key in self._buckets if key <= oldest]:
+                del self._buckets[key]
+            calls = sum(b[0] for b in self._buckets.values())
+            failures = sum(b[1] for b in self._buckets.values())
+            if self._consecutive >= self.consecutive_failures or (
+                calls >= self.min_calls and failures >= calls * self.failure_rate
+            ):
+                self._trip(self.open_seconds)
+
+    def _trip(self, open_for):
+        # Called with the lock held
+        self._open_for = min(open_for, self.max_open_seconds)
+        self._open_until = time.monotonic() + self._open_for
+        self._state = self.OPEN
+        self.opened.incr()
+
+    def _reset(self):
+        # Called with the lock held
+        self._state = self.CLOSED
+        self._buckets.clear()
+        self._consecutive = 0
+        self._open_for = self.open_seconds
+
+    def stats(self):
+        with self._lock:
+            calls = sum(b[0] for b in self._buckets.values())
+            failures = sum(b[1] for b in self._buckets.values())
+            state = self._state
+            open_for = max(self._open_until - time.monotonic(), 0) if state == self.OPEN else 0
+        return {
+            "state": state,
+            "open_for": round(open_for, 3),
+            "window_calls": calls,
+            "window_failures": failures,
+            "failures": self.failures.value,
+            "slow_calls": self.slow_calls.value,
+            "opened": self.opened.value,
+            "rejected": self.rejected.value,
+        }
+
+
+# Path segments that are ids rather than part of the endpoint
+_ID_SEGMENT = re.compile(r"^(?=.*\d).{6,}$|[A-Z_]")
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def endpoint(url):
+    """
+    ``url``'s path with id segments replaced, so every ``/charges/<id>``
+    shares one breaker.
+    """
+    segments = urlsplit(url).path.strip("/").split("/")
+    return "/".join(":id" if _ID_SEGMENT.search(segment) else segment for segment in segments)
+
+
+def get_breaker(provider, url):
+    """
+    The breaker for ``url`` on ``provider``, configured from
+    ``settings.PROVIDER_CIRCUIT_BREAKER_DEFAULTS`` and
+    ``settings.PROVIDER_CIRCUIT_BREAKER[provider]``.
+    """
+    key = (provider, endpoint(url))
+    breaker = _breakers.get(key)
+    if breaker is not None:
+        return breaker
+
+    with _breakers_lock:
+        if key not in _breakers:
+            options = dict(settings.PROVIDER_CIRCUIT_BREAKER_DEFAULTS)
+            options.update(settings.PROVIDER_CIRCUIT_BREAKER.get(provider, {}))
+            _breakers[key] = CircuitBreaker(f"{provider}.{key[1]}", **options)
+        return _breakers[key]
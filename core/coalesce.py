@@ -0,0 +1,289 @@
+import asyncio
+import hashlib
+import json
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+from django.db import close_old_connections
+
+from . import metrics
+
+# Replies that say the query itself was rejected rather than that the
+# provider failed; worth remembering for ``negative_ttl``
+REFUSED_STATUSES = {400, 404, 422}
+
+
+class Reply:
+    """
+    A provider reply reduced to its status and body, so it can be shared
+    between callers and kept in the cache. Mirrors the parts of
+    ``requests.Response`` and ``core.aio.AsyncResponse`` the views use.
+    """
+
+    def __init__(self, status_code, content):
+        self.status_code = status_code
+        self.content = content
+
+    @classmethod
+    def of(cls, response):
+        return cls(response.status_code, response.content)
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def is_success(self):
+        return 200 <= self.status_code < 300
+
+    @property
+    def refused(self):
+        """
+        The provider answered and said no: a 400/404/422, or a 2xx whose
+        body is ``{"status": false, ...}`` as SasaPay sends for some errors.
+        """
+        if self.status_code in REFUSED_STATUSES:
+            return True
+        if not self.is_success:
+            return False
+        try:
+            data = self.json()
+        except ValueError:
+            return False
+        return isinstance(data, dict) and data.get("status", True) is False
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class _Flight:
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.reply = None
+        self.error = None
+
+
+class Coalescer:
+    """
+    Shares one provider call between concurrent identical queries.
+
+    The first caller for a key makes the call; callers that arrive while it
+    is in flight wait for it and get the same ``Reply`` (or exception)
+    instead of calling the provider themselves. This is per process; async
+    callers coalesce per event loop.
+
+    With ``ttl``, a successful reply is also kept in the shared cache for
+    that many seconds, so repeats from any worker within it don't reach the
+    provider at all; with ``negative_ttl``, so is a ``refused`` one. Use
+    them only where a slightly stale answer is fine, and ``invalidate`` a
+    query whose answer is known to have changed. ``ttl`` may also be a
+    function of the successful ``Reply``, for answers that are final in some
+    states and not in others.
+    """
+
+    def __init__(self, name, ttl=0, negative_ttl=0):
+        self.name = name
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._async_flights = weakref.WeakKeyDictionary()
+
+        self.calls = metrics.Counter()
+        self.coalesced = metrics.Counter()
+        self.cache_hits = metrics.Counter()
+        self.stored = metrics.Counter()
+        self.negative_stored = metrics.Counter()
+        self.invalidated = metrics.Counter()
+        metrics.register(f"coalesce.{name}", self.stats)
+
+    @property
+    def caching(self):
+        return bool(self.ttl or self.negative_ttl)
+
+    def _key(self, query):
+        digest = hashlib.sha256(json.dumps(query, sort_keys=True, default=str).encode()).hexdigest()
+        return f"gateway:coalesce:{self.name}:{digest}"
+
+    def _keep_for(self, reply):
+        """
+        Seconds to cache ``reply`` for, or 0.
+        """
+        if reply.refused:
+            if self.negative_ttl:
+                self.negative_stored.incr()
+            return self.negative_ttl
+        if not reply.is_success or not self.ttl:
+            return 0
+        ttl = self.ttl(reply) if callable(self.ttl) else self.ttl
+        if ttl:
+            self.stored.incr()
+        return ttl
+
+    def call(self, query, send):
+        """
+        The ``Reply`` to ``query``, from the cache, a call already in flight
+        or ``Reply.of(send())``.
+        """
+        key = self._key(query)
+        if self.caching:
+            reply = cache.get(key)
+            if reply is not None:
+                self.cache_hits.incr()
+                return reply
+        return self._call(key, send)
+
+    def _call(self, key, send):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            self.coalesced.incr()
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.reply
+
+        try:
+            self.calls.incr()
+            flight.reply = Reply.of(send())
+            ttl = self._keep_for(flight.reply)
+            if ttl:
+                cache.set(key, flight.reply, ttl)
+            return flight.reply
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def call_many(self, queries, send, concurrency):
+        """
+        ``call`` for each of ``queries``, in order. Cached replies are read
+        in one round trip and only the misses are sent, ``send(query)``,
+        ``concurrency`` at a time. A query whose call raised gets the
+        exception in its place.
+        """
+        keys = [self._key(query) for query in queries]
+        found = cache.get_many(set(keys)) if self.caching else {}
+        self.cache_hits.incr(sum(1 for key in keys if key in found))
+
+        misses = {}
+        for key, query in zip(keys, queries):
+            if key not in found:
+                misses.setdefault(key, query)
+
+        def one(item):
+            key, query = item
+            try:
+                return key, self._call(key, lambda: send(query))
+            except Exception as e:
+                return key, e
+            finally:
+                # The pool's threads reach the database through the cache
+                close_old_connections()
+
+        if misses:
+            with ThreadPoolExecutor(min(concurrency, len(misses)), thread_name_prefix=f"coalesce-{self.name}") as pool:
+                found.update(pool.map(one, misses.items()))
+        return [found[key] for key in keys]
+
+    async def call_async(self, query, send):
+        """
+        ``call`` for coroutines; ``send()`` is awaited.
+        """
+        key = self._key(query)
+        if self.caching:
+            reply = await cache.aget(key)
+            if reply is not None:
+                self.cache_hits.incr()
+                return reply
+        return await self._call_async(key, send)
+
+    async def _call_async(self, key, send):
+        loop = asyncio.get_running_loop()
+        flights = self._async_flights.setdefault(loop, {})
+        while key in flights:
+            future = flights[key]
+            self.coalesced.incr()
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # The caller making the call went away; take over from it
+                if not future.cancelled():
+                    raise
+
+        future = flights[key] = loop.create_future()
+        try:
+            self.calls.incr()
+            reply = Reply.of(await send())
+            ttl = self._keep_for(reply)
+            if ttl:
+                await cache.aset(key, reply, ttl)
+            future.set_result(reply)
+            return reply
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark it retrieved in case nobody was waiting
+            future.exception()
+            raise
+        finally:
+            del flights[key]
+
+    async def call_many_async(self, queries, send, concurrency):
+        """
+        ``call_many`` for coroutines; ``send(query)`` is awaited.
+        """
+        keys = [self._key(query) for query in queries]
+        found = await cache.aget_many(set(keys)) if self.caching else {}
+        self.cache_hits.incr(sum(1 for key in keys if key in found))
+
+        misses = {}
+        for key, query in zip(keys, queries):
+            if key not in found:
+                misses.setdefault(key, query)
+
+        slots = asyncio.Semaphore(concurrency)
+
+        async def one(key, query):
+            async with slots:
+                try:
+                    found[key] = await self._call_async(key, lambda: send(query))
+                except Exception as e:
+                    found[key] = e
+
+        await asyncio.gather(*(one(key, query) for key, query in misses.items()))
+        return [found[key] for key in keys]
+
+    def invalidate(self, query):
+        self.invalidated.incr()
+        cache.delete(self._key(query))
+
+    async def ainvalidate(self, query):
+        self.invalidated.incr()
+        await cache.adelete(self._key(query))
+
+    def stats(self):
+        calls = self.calls.value
+        saved = self.coalesced.value + self.cache_hits.value
+        return {
+            "ttl": getattr(self.ttl, "__name__", self.ttl),
+            "negative_ttl": self.negative_ttl,
+            "calls": calls,
+            "coalesced": self.coalesced.value,
+            "cache_hits": self.cache_hits.value,
+            "saved_rate": round(saved / (calls + saved), 4) if calls + saved else 0.0,
+            "stored": self.stored.value,
+            "negative_stored": self.negative_stored.value,
+            "invalidated": self.invalidated.value,
+        }
@@ -0,0 +1,118 @@
+import collections
+import hashlib
+import math
+import threading
+
+from . import metrics
+
+
+class BloomFilter:
+    """
+    Fixed-size set membership with no false negatives and a false positive
+    rate of about ``error_rate`` up to ``capacity`` items.
+    """
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class Deduplicator:
+    """
+    Cheap in-process check for provider notifications already received.
+
+    Keys are tracked in two generations of Bloom filters (the older one is
+    dropped when the current one fills) plus an exact set of the most recent
+    keys. A key the filters have never seen is new without any further
+    work. A key in the recent set is a duplicate. Anything else (another
+    worker's key, an older key or a filter false positive) is settled by
+    ``confirm``, normally a query on a unique index.
+
+    A new key is only remembered by this process, so duplicates that land
+    on different workers before either is applied still need the unique
+    index behind this to reject them.
+    """
+
+    def __init__(self, name, confirm, capacity=1_000_000, error_rate=0.001, recent=100_000):
+        self.confirm = confirm
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.recent_size = recent
+        self._current = BloomFilter(capacity, error_rate)
+        self._previous = None
+        self._recent = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+        self.checked = metrics.Counter()
+        self.duplicates = metrics.Counter()
+        self.confirmed = metrics.Counter()
+        self.false_positives = metrics.Counter()
+        metrics.register(f"dedup.{name}", self.stats)
+
+    def seen(self, provider, key):
+        """
+        Whether ``key`` from ``provider`` was received before. Hits the
+        database only when the filters match a key not recently seen here.
+        """
+        item = f"{provider}:{key}"
+        self.checked.incr()
+        with self._lock:
+            if item in self._recent:
+                self.duplicates.incr()
+                return True
+            maybe = item in self._current or (self._previous is not None and item in self._previous)
+        if not maybe:
+            return False
+
+        if self.confirm(provider, key):
+            self.duplicates.incr()
+            self.confirmed.incr()
+            return True
+        self.false_positives.incr()
+        return False
+
+    def add(self, provider, key):
+        item = f"{provider}:{key}"
+        with self._lock:
+            if self._current.count >= self.capacity:
+                self._previous, self._current = self._current, BloomFilter(self.capacity, self.error_rate)
+            self._current.add(item)
+            self._recent[item] = None
+            if len(self._recent) > self.recent_size:
+                self._recent.popitem(last=False)
+
+    def forget(self, provider, key):
+        """
+        ``key`` was never applied after all, so a re-delivery must not be
+        taken for a duplicate. The filters can't drop it, but a filter match
+        is confirmed against the database anyway.
+        """
+        with self._lock:
+            self._recent.pop(f"{provider}:{key}", None)
+
+    def stats(self):
+        return {
+            "checked": self.checked.value,
+            "duplicates": self.duplicates.value,
+            "confirmed_in_database": self.confirmed.value,
+            "false_positives": self.false_positives.value,
+            "filter_items": self._current.count,
+            "filter_bytes": len(self._current.bits) * (2 if self._previous is not None else 1),
+        }
@@ -0,0 +1,168 @@
+import threading
+import time
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from . import bulkhead, circuit, metrics, ratelimit, retry
+
+
+def _counting_pool(pool_class, counter):
+    class CountingPool(pool_class):
+        def _new_conn(self):
+            counter.incr()
+            return super()._new_conn()
+
+    return CountingPool
+
+
+class CountingAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that counts how many TCP/TLS connections it had to open.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.connections_opened = metrics.Counter()
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _counting_pool(HTTPConnectionPool, self.connections_opened),
+            "https": _counting_pool(HTTPSConnectionPool, self.connections_opened),
+        }
+
+
+class ProviderClient:
+    """
+    Pooled, keep-alive HTTP client for a single payment provider.
+
+    Exposes the same get/post/put calls as ``requests`` so views can swap
+    ``requests.post(...)`` for ``client.post(...)`` and keep handling
+    ``requests.exceptions.RequestException``.
+    """
+
+    def __init__(self, name, pool_connections=4, pool_maxsize=20, pool_block=False,
+                 connect_timeout=3.05, read_timeout=30):
+        self.name = name
+        self.timeout = (connect_timeout, read_timeout)
+        self.requests_sent = metrics.Counter()
+
+        self.adapter = CountingAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+
+    def request(self, method, url, token_manager=None, **kwargs):
+        """
+        Send a request through the pool.
+
+        With ``token_manager`` the call is authorized with its cached Bearer
+        token, and a 401 is retried once with a freshly fetched token.
+        Failures are retried as far as the endpoint's retry policy
+        (core/retry.py) considers safe.
+
+        Calls wait for the provider's rate limit (core/ratelimit.py) and
+        raise ``RateLimited`` if it stays exhausted.
+        They raise ``CircuitOpen`` without being sent while the endpoint's
+        circuit breaker (core/circuit.py) is open, and ``BulkheadFull`` when
+        the provider's share of this process (core/bulkhead.py) is in use.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+
+        def send(budget):
+            options = kwargs
+            if budget is not None:
+                timeout = options["timeout"]
+                connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+                options = {**kwargs, "timeout": (min(connect, budget), min(read, budget))}
+            return self._authorized(method, url, token_manager, **options)
+
+        return retry.get_policy(self.name, url).call(send, method, kwargs.get("headers"))
+
+    def _authorized(self, method, url, token_manager, **kwargs):
+        if token_manager is None:
+            return self._send(method, url, **kwargs)
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        token = token_manager.get_access_token()
+        headers["Authorization"] = f"Bearer {token}"
+        response = self._send(method, url, headers=headers, **kwargs)
+
+        if response.status_code == 401:
+            token_manager.invalidate(token)
+            headers["Authorization"] = f"Bearer {token_manager.get_access_token()}"
+            response = self._send(method, url, headers=headers, **kwargs)
+        return response
+
+    def _send(self, method, url, **kwargs):
+        breaker = circuit.get_breaker(self.name, url)
+        limiter = ratelimit.get_limiter(self.name, url)
+        probe = breaker.before()
+        try:
+            # Wait for the rate limit before taking a slot, so the wait
+            # doesn't hold one and turn bursts into BulkheadFull
+            if limiter is not None:
+                limiter.acquire()
+            with bulkhead.get_bulkhead(self.name).slot():
+                self.requests_sent.incr()
+                start = time.monotonic()
+                try:
+                    response = self.session.request(method, url, **kwargs)
+                except requests.exceptions.RequestException:
+                    breaker.record(True, time.monotonic() - start, probe)
+                    raise
+        except (ratelimit.RateLimited, bulkhead.BulkheadFull):
+            breaker.cancel(probe)
+            raise
+
+        breaker.record(response.status_code >= 500, time.monotonic() - start, probe)
+        if limiter is not None and response.status_code == 429:
+            limiter.throttle(response.headers.get("Retry-After"))
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request("PUT", url, **kwargs)
+
+    def stats(self):
+        sent = self.requests_sent.value
+        opened = self.adapter.connections_opened.value
+        return {
+            "requests": sent,
+            "connections_opened": opened,
+            "connections_reused": max(sent - opened, 0),
+        }
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(name):
+    """
+    Return the process-wide client for ``name``, configured from
+    ``settings.PROVIDER_HTTP_DEFAULTS`` and ``settings.PROVIDER_HTTP[name]``.
+    """
+    client = _clients.get(name)
+    if client is not None:
+        return client
+
+    with _clients_lock:
+        if name not in _clients:
+            options = dict(settings.PROVIDER_HTTP_DEFAULTS)
+            options.update(settings.PROVIDER_HTTP.get(name, {}))
+            _clients[name] = ProviderClient(name, **options)
+            metrics.register(f"http.{name}", _clients[name].stats)
+        return _clients[name]
@@ -0,0 +1,137 @@
+"""
+Idempotency for payment-initiating requests: which key a request carries,
+the key forwarded to providers, and the shared store of completed replies
+that ``core.middleware.IdempotencyMiddleware`` answers repeats from.
+"""
+import hashlib
+import json
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import metrics
+
+# Keys sent upstream are uuid5s in this namespace; changing it re-keys
+# every request
+NAMESPACE = uuid.UUID("5d0c7f0e-4b7a-4c8e-9a43-0f3c1d2e6b11")
+KEY_HEADERS = ("Idempotency-Key", "X-Idempotency-Key")
+# Set on responses answered from the store
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+def caller_key(request, fallback=None):
+    """
+    The idempotency key the caller chose: its ``Idempotency-Key`` header,
+    else ``fallback`` (a natural key from the body, such as a charge's
+    ``reference``), else None.
+    """
+    for header in KEY_HEADERS:
+        key = request.headers.get(header)
+        if key:
+            return key
+    return str(fallback) if fallback not in (None, "") else None
+
+
+def provider_key(scope, key):
+    """
+    The idempotency key to send upstream for the caller's ``key``: the same
+    on every repeat of the request, distinct per ``scope``. Without a caller
+    key each call gets a fresh one, as before.
+    """
+    if key is None:
+        return str(uuid.uuid4())
+    return str(uuid.uuid5(NAMESPACE, f"{scope}:{key}"))
+
+
+def fingerprint(body):
+    """
+    Digest of a request body, ignoring JSON key order and whitespace.
+    """
+    try:
+        body = json.dumps(json.loads(body), sort_keys=True, separators=(",", ":")).encode()
+    except ValueError:
+        pass
+    return hashlib.sha256(body).hexdigest()
+
+
+class IdempotencyStore:
+    """
+    Completed replies by idempotency key, kept in the shared cache, and a
+    lock per key held while the first request with it is in flight.
+
+    Each operation has an ``a``-prefixed twin for async callers. The
+    counters are kept by ``IdempotencyMiddleware``.
+    """
+
+    def __init__(self, name, lock_timeout):
+        self.name = name
+        self.lock_timeout = lock_timeout
+
+        self.requests = metrics.Counter()
+        self.replayed = metrics.Counter()
+        self.waited = metrics.Counter()
+        self.stored = metrics.Counter()
+        self.mismatched = metrics.Counter()
+        self.conflicts = metrics.Counter()
+        metrics.register(f"idempotency.{name}", self.stats)
+
+    def _cache_key(self, scope, key):
+        digest = hashlib.sha256(f"{scope}:{key}".encode()).hexdigest()
+        return f"gateway:{self.name}:{digest}"
+
+    def get(self, scope, key):
+        return cache.get(self._cache_key(scope, key))
+
+    def put(self, scope, key, record, ttl):
+        cache.set(self._cache_key(scope, key), record, ttl)
+
+    def lock(self, scope, key):
+        """
+        Take the key's lock: a token to release it with, or None if another
+        request holds it.
+        """
+        token = uuid.uuid4().hex
+        return token if cache.add(f"{self._cache_key(scope, key)}:lock", token, self.lock_timeout) else None
+
+    def unlock(self, scope, key, token):
+        """
+        Release the lock if ``token`` still holds it. Once it has expired
+        and another request took it, that request's lock is left alone.
+        """
+        lock = f"{self._cache_key(scope, key)}:lock"
+        if cache.get(lock) == token:
+            cache.delete(lock)
+
+    async def aget(self, scope, key):
+        return await cache.aget(self._cache_key(scope, key))
+
+    async def aput(self, scope, key, record, ttl):
+        await cache.aset(self._cache_key(scope, key), record, ttl)
+
+    async def alock(self, scope, key):
+        token = uuid.uuid4().hex
+        added = await cache.aadd(f"{self._cache_key(scope, key)}:lock", token, self.lock_timeout)
+        return token if added else None
+
+    async def aunlock(self, scope, key, token):
+        lock = f"{self._cache_key(scope, key)}:lock"
+        if await cache.aget(lock) == token:
+            await cache.adelete(lock)
+
+    def stats(self):
+        requests = self.requests.value
+        replayed = self.replayed.value
+        return {
+            "requests": requests,
+            "replayed": replayed,
+            "hit_rate": round(replayed / requests, 4) if requests else 0.0,
+            "upstream_calls_saved": replayed,
+            "waited_for_first": self.waited.value,
+            "stored": self.stored.value,
+            "key_reused": self.mismatched.value,
+            "conflicts": self.conflicts.value,
+        }
+
+
+store = IdempotencyStore("inbound", settings.IDEMPOTENCY_LOCK_TIMEOUT)
@@ -0,0 +1,237 @@
+import collections
+import fcntl
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+
+from django.db import close_old_connections
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class CallbackInbox:
+    """
+    Durable local queue between provider callback views and the ledger.
+
+    ``submit`` appends the callback to this process's spool segment (one JSON
+    line, fsynced) and returns, so the provider gets its acknowledgement in a
+    few milliseconds however slow the database is. A daemon thread applies
+    queued callbacks in order with ``handler(provider, kind, data)`` and
+    records how far it got in a ``.offset`` file next to the segment.
+
+    A callback that still fails after ``max_attempts`` goes to ``dead.log``
+    and is passed to ``on_dead(provider, kind, data)``.
+
+    Each process holds an exclusive lock on its own segment, taken before the
+    segment appears under its ``.log`` name. Segments whose lock is free
+    belonged to a process that exited, and are replayed from their offset by
+    the next worker that finds them, so callbacks are applied at least once.
+    ``start`` runs that recovery as soon as a server process comes up;
+    otherwise it waits for the process's first callback.
+    """
+
+    # Truncate a fully applied segment once it grows past this
+    rotate_bytes = 1 << 20
+    # Attempts per callback before it is moved to dead.log
+    max_attempts = 5
+    retry_delay = 1.0
+    # How often an idle worker looks for orphaned segments
+    scan_interval = 30.0
+
+    def __init__(self, name, directory, handler, fsync=True, on_dead=None):
+        self.name = name
+        self.directory = directory
+        self.handler = handler
+        self.on_dead = on_dead
+        self.fsync = fsync
+
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        # (enqueued_at, segment offset after the entry, provider, kind, data)
+        self._pending = collections.deque()
+        self._pid = None
+        self._segment = None
+        self._path = None
+        self._written = 0
+        self._applied = 0
+        self._worker = None
+
+        self.received = metrics.Counter()
+        self.applied = metrics.Counter()
+        self.failed = metrics.Counter()
+        self.replayed = metrics.Counter()
+        self._last_lag = 0.0
+        self._max_lag = 0.0
+        metrics.register(f"callbacks.{name}", self.stats)
+        os.register_at_fork(after_in_child=self._forked)
+
+    def _forked(self):
+        # The parent's worker thread is not copied into the child, and may
+        # have held the lock when it forked
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._pid = None
+
+    def start(self):
+        """
+        Open this process's segment and start its worker, which first
+        replays the segments of processes that exited.
+        """
+        with self._lock:
+            self._open()
+
+    def submit(self, provider, kind, data):
+        """
+        Durably queue a callback for the ledger. Raises OSError if it could
+        not be written, so the view can fail and the provider retry.
+        """
+        now = time.time()
+        line = json.dumps({"at": now, "provider": provider, "kind": kind, "data": data}, default=str)
+        with self._lock:
+            self._open()
+            self._segment.write(line.encode() + b"\n")
+            self._segment.flush()
+            if self.fsync:
+                os.fsync(self._segment.fileno())
+            self._written = self._segment.tell()
+            self._pending.append((now, self._written, provider, kind, data))
+            self._ready.notify()
+        self.received.incr()
+
+    def _open(self):
+        # Called with the lock held. A forked worker must not share its
+        # parent's segment, so the segment belongs to a pid.
+        if self._pid == os.getpid():
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{self.name}-{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}.log"
+        path = os.path.join(self.directory, name)
+        # Locked before it is renamed into place, so _recover never sees it
+        # unlocked and takes it for an exited process's
+        segment = open(path + ".new", "ab")
+        fcntl.flock(segment.fileno(), fcntl.LOCK_EX)
+        os.rename(path + ".new", path)
+        self._segment = segment
+        self._path = path
+        self._pid = os.getpid()
+        self._pending.clear()
+        self._written = self._applied = 0
+        self._write_offset(0)
+        self._worker = threading.Thread(target=self._run, name=f"callbacks-{self.name}", daemon=True)
+        self._worker.start()
+
+    def _offset_path(self, segment_path):
+        return segment_path[:-len(".log")] + ".offset"
+
+    def _write_offset(self, offset):
+        path = self._offset_path(self._path)
+        with open(path + ".tmp", "w") as f:
+            f.write(str(offset))
+        os.replace(path + ".tmp", path)
+
+    def _run(self):
+        next_scan = 0.0
+        while True:
+            if time.monotonic() >= next_scan:
+                self._recover()
+                next_scan = time.monotonic() + self.scan_interval
+
+            with self._lock:
+                if not self._pending:
+                    self._ready.wait(timeout=self.scan_interval)
+                    if not self._pending:
+                        continue
+                enqueued_at, end, provider, kind, data = self._pending[0]
+
+            self._apply(provider, kind, data)
+            lag = time.time() - enqueued_at
+            self._last_lag = lag
+            self._max_lag = max(self._max_lag, lag)
+
+            with self._lock:
+                self._pending.popleft()
+                self._applied = end
+                if self._applied == self._written and self._written >= self.rotate_bytes:
+                    self._segment.truncate(0)
+                    self._written = self._applied = 0
+                self._write_offset(self._applied)
+
+    def _apply(self, provider, kind, data):
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                self.handler(provider, kind, data)
+                self.applied.incr()
+                return
+            except Exception:
+                logger.exception("Applying %s %s callback failed (attempt %d)", provider, kind, attempt)
+                close_old_connections()
+                if attempt < self.max_attempts:
+                    time.sleep(self.retry_delay * attempt)
+
+        self.failed.incr()
+        with open(os.path.join(self.directory, "dead.log"), "a") as f:
+            f.write(json.dumps({"provider": provider, "kind": kind, "data": data}, default=str) + "\n")
+        if self.on_dead is not None:
+            self.on_dead(provider, kind, data)
+
+    def _recover(self):
+        """
+        Apply the unapplied tail of every segment whose process has exited.
+        """
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return
+        for name in names:
+            path = os.path.join(self.directory, name)
+            if not name.startswith(f"{self.name}-") or not name.endswith(".log") or path == self._path:
+                continue
+            try:
+                segment = open(path, "rb")
+            except FileNotFoundError:
+                continue
+            with segment:
+                try:
+                    fcntl.flock(segment.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue  # still owned by a live process
+                if not os.path.exists(path):
+                    continue  # another worker replayed it while we waited
+                try:
+                    with open(self._offset_path(path)) as f:
+                        segment.seek(int(f.read() or 0))
+                except FileNotFoundError:
+                    pass
+                for line in segment:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn final write; its callback was never acknowledged
+                    self._apply(entry["provider"], entry["kind"], entry["data"])
+                    self.replayed.incr()
+                for leftover in (path, self._offset_path(path)):
+                    try:
+                        os.unlink(leftover)
+                    except FileNotFoundError:
+                        pass
+
+    def stats(self):
+        with self._lock:
+            depth = len(self._pending)
+            oldest = self._pending[0][0] if self._pending else None
+        return {
+            "depth": depth,
+            "lag_seconds": round(time.time() - oldest, 3) if oldest else 0.0,
+            "last_lag_seconds": round(self._last_lag, 3),
+            "max_lag_seconds": round(self._max_lag, 3),
+            "received": self.received.value,
+            "applied": self.applied.value,
+            "failed": self.failed.value,
+            "replayed": self.replayed.value,
+        }
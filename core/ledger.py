@@ -0,0 +1,213 @@
+"""
+Recording provider transactions and applying their callbacks to the ledger
+(``core.models.Transaction``).
+"""
+import logging
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, transaction as db_transaction
+from django.utils import timezone
+
+from .dedup import Deduplicator
+from .inbox import CallbackInbox
+from .models import CallbackReceipt, Transaction
+
+logger = logging.getLogger(__name__)
+
+
+# Provider field -> ledger lookup key. Checked in order; the first value
+# found for a key wins.
+KEY_FIELDS = (
+    ("CheckoutRequestID", "checkout_request_id"),
+    ("MerchantRequestID", "merchant_request_id"),
+    ("OriginatorConversationID", "originator_conversation_id"),
+    ("MerchantTransactionReference", "merchant_transaction_reference"),
+    ("reference", "reference"),
+    ("TransID", "trans_id"),
+    ("TransactionCode", "trans_id"),
+    ("MpesaReceiptNumber", "trans_id"),
+    ("BillRefNumber", "bill_ref_number"),
+    ("AccountReference", "bill_ref_number"),
+)
+AMOUNT_FIELDS = ("TransAmount", "TransactionAmount", "Amount", "amount")
+CURRENCY_FIELDS = ("Currency", "currency")
+PHONE_FIELDS = ("PhoneNumber", "CustomerMobile", "MSISDN", "ReceiverNumber", "ReceiverPhoneNumber")
+# Fields identifying one notification, so re-deliveries can be recognised.
+# IPNs carry the receipt; request callbacks the id of the request.
+NOTIFICATION_KEY_FIELDS = (
+    "TransID", "CheckoutRequestID", "OriginatorConversationID", "MerchantTransactionReference",
+    "TransactionCode",
+)
+
+
+def _first(sources, fields):
+    for source in sources:
+        for field in fields:
+            value = source.get(field)
+            if value not in (None, ""):
+                return value
+    return None
+
+
+def _flatten_metadata(data):
+    """
+    Daraja STK callbacks carry the receipt and amount in
+    ``CallbackMetadata.Item`` as name/value pairs.
+    """
+    items = (data.get("CallbackMetadata") or {}).get("Item") or []
+    return {item.get("Name"): item.get("Value") for item in items if isinstance(item, dict)}
+
+
+def extract(*sources):
+    """
+    Ledger fields found in provider payloads (requests, responses or
+    callbacks), earlier sources taking precedence.
+    """
+    sources = [s for s in sources if isinstance(s, dict)]
+    sources += [_flatten_metadata(s) for s in sources]
+
+    fields = {}
+    for provider_field, key in KEY_FIELDS:
+        if key not in fields:
+            value = _first(sources, [provider_field])
+            if value is not None:
+                fields[key] = str(value)[:64]
+
+    amount = _first(sources, AMOUNT_FIELDS)
+    if amount is not None:
+        try:
+            fields["amount"] = Decimal(str(amount))
+        except InvalidOperation:
+            pass
+    currency = _first(sources, CURRENCY_FIELDS)
+    if currency:
+        fields["currency"] = str(currency)[:3]
+    phone = _first(sources, PHONE_FIELDS)
+    if phone:
+        fields["phone_number"] = str(phone)[:20]
+    return fields
+
+
+def record(provider, kind, payload, response_data):
+    """
+    Add a pending transaction for a request the provider accepted.
+
+    The provider has already acted on the request, so a database failure is
+    logged rather than turned into an error response the client would retry.
+    """
+    try:
+        return Transaction.objects.create(
+            provider=provider,
+            kind=kind,
+            request_payload=payload or {},
+            **extract(response_data, payload),
+        )
+    except DatabaseError:
+        logger.exception("Could not record %s %s transaction", provider, kind)
+        return None
+
+
+def settle(provider, status, references, result_desc=""):
+    """
+    Move the provider's pending transactions with these ``reference``s to
+    ``status``, for outcomes learnt from a provider listing rather than a
+    callback. Returns the number of rows updated.
+    """
+    if not references:
+        return 0
+    try:
+        return Transaction.objects.filter(
+            provider=provider, status=Transaction.Status.PENDING, reference__in=list(references)
+        ).update(status=status, result_desc=result_desc[:255], updated_at=timezone.now())
+    except DatabaseError:
+        logger.exception("Could not settle %s transactions", provider)
+        return 0
+
+
+def notification_key(data):
+    """
+    The provider's id for a callback or IPN, or None if it carries none.
+    """
+    value = _first([data], NOTIFICATION_KEY_FIELDS)
+    return str(value)[:64] if value is not None else None
+
+
+def apply_callback(provider, kind, data):
+    """
+    Resolve the transaction a callback refers to and store its outcome.
+    Callbacks for transactions the gateway did not initiate (IPNs, customer
+    initiated payments) are recorded as new rows.
+
+    A notification whose key already has a ``CallbackReceipt`` is a
+    re-delivery and is skipped (returns None).
+    """
+    key = notification_key(data)
+    try:
+        with db_transaction.atomic():
+            if key is not None:
+                CallbackReceipt.objects.create(provider=provider, key=key)
+            return _apply(provider, kind, data)
+    except IntegrityError:
+        if key is not None and CallbackReceipt.objects.filter(provider=provider, key=key).exists():
+            return None
+        raise
+
+
+def _apply(provider, kind, data):
+    fields = extract(data)
+    transaction = Transaction.objects.lookup(provider, **fields)
+    if transaction is None:
+        transaction = Transaction(provider=provider, kind=kind)
+
+    result_code = data.get("ResultCode")
+    if result_code is None:
+        # IPNs only arrive for completed payments
+        transaction.status = Transaction.Status.COMPLETED
+    else:
+        transaction.result_code = str(result_code)
+        transaction.status = (
+            Transaction.Status.COMPLETED if str(result_code) == "0" else Transaction.Status.FAILED
+        )
+    transaction.result_desc = str(data.get("ResultDesc") or "")[:255]
+    transaction.callback_payload = data
+
+    for key, value in fields.items():
+        if not getattr(transaction, key):
+            setattr(transaction, key, value)
+    transaction.save()
+    return transaction
+
+
+def _received(provider, key):
+    return CallbackReceipt.objects.filter(provider=provider, key=key).exists()
+
+
+def _dead(provider, kind, data):
+    # A dead-lettered callback has no receipt; let its re-delivery through
+    key = notification_key(data)
+    if key is not None:
+        duplicates.forget(provider, key)
+
+
+def receive_callback(provider, kind, data):
+    """
+    Queue a provider notification for the ledger and return True, or return
+    False without queueing it if it is a re-delivery of one already
+    received.
+    """
+    key = notification_key(data)
+    if key is not None and duplicates.seen(provider, key):
+        return False
+    callbacks.submit(provider, kind, data)
+    if key is not None:
+        duplicates.add(provider, key)
+    return True
+
+
+# Callback views queue here and acknowledge; a worker thread applies them
+callbacks = CallbackInbox(
+    "ledger", settings.CALLBACK_SPOOL_DIR, apply_callback, fsync=settings.CALLBACK_SPOOL_FSYNC, on_dead=_dead
+)
+# Rejects re-delivered notifications before they are queued
+duplicates = Deduplicator("callbacks", _received)
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import payouts
+
+
+class Command(BaseCommand):
+    help = (
+        "Finish payout batches left PROCESSING by a worker that died. Queued rows are sent; "
+        "rows that were SENDING are never resent and are left for reconciliation."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--stale", type=int, default=settings.PAYOUT_RESUME_AFTER,
+            help="seconds without progress before a batch is taken over (default: %(default)s)",
+        )
+
+    def handle(self, *args, stale, **options):
+        resumed = payouts.resume(stale)
+        for batch in resumed:
+            counts = payouts.summary(batch)["items"]
+            self.stdout.write(
+                f"Batch {batch.pk}: {batch.status}, {counts['submitted']} submitted, "
+                f"{counts['failed']} failed, {counts['sending']} left SENDING"
+            )
+        self.stdout.write(f"Resumed {len(resumed)} payout batch(es)")
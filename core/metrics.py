@@ -0,0 +1,37 @@
+import threading
+
+
+_sources = {}
+_sources_lock = threading.Lock()
+
+
+class Counter:
+    """
+    Monotonic, thread-safe counter.
+    """
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def incr(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self):
+        return self._value
+
+
+def register(name, collector):
+    """
+    Register a zero-argument callable returning a dict of metric values.
+    """
+    with _sources_lock:
+        _sources[name] = collector
+
+
+def snapshot():
+    with _sources_lock:
+        sources = dict(_sources)
+    return {name: collector() for name, collector in sorted(sources.items())}
@@ -0,0 +1,179 @@
+import asyncio
+import json
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+
+from . import idempotency
+
+
+class IdempotencyMiddleware:
+    """
+    Answers repeats of payment-initiating requests without calling the
+    provider again.
+
+    Routes are listed in ``settings.IDEMPOTENT_ROUTES`` with the body field
+    that names the payment, if any. A POST to one is keyed by its
+    ``Idempotency-Key`` header, else that field (kept for
+    ``IDEMPOTENCY_REPLAY_TTL``), else a digest of the body (kept for
+    ``IDEMPOTENCY_FINGERPRINT_TTL``, long enough to absorb a client's
+    retries but not to block a genuine second payment). A route whose field
+    is ``Idempotency-Key`` takes an upload: only requests with that header
+    are handled, fingerprinted by their query string, content type and
+    length, so the body is left for the view to stream.
+
+    The first request with a key takes a lock in the shared cache and goes
+    through; a 2xx reply is stored with the request's fingerprint. Repeats
+    get the stored reply with ``Idempotent-Replayed: true``, or a 422 if the
+    key was used for a different request. A duplicate that arrives while the
+    first is in flight polls until its reply is stored (or, if it failed,
+    takes the lock itself), and gives up with a 409 after
+    ``IDEMPOTENCY_WAIT`` seconds.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    poll_interval = 0.05
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        self.store = idempotency.store
+
+    def _identify(self, request):
+        """
+        ``(scope, key, fingerprint, ttl)`` for a request to an idempotent
+        route, else None.
+        """
+        if request.method != "POST" or request.path not in settings.IDEMPOTENT_ROUTES:
+            return None
+        field = settings.IDEMPOTENT_ROUTES[request.path]
+        if field in idempotency.KEY_HEADERS:
+            key = idempotency.caller_key(request)
+            if key is None:
+                return None
+            fingerprint = idempotency.fingerprint(
+                f"{request.META.get('QUERY_STRING', '')}:{request.content_type}:"
+                f"{request.META.get('CONTENT_LENGTH', '')}".encode()
+            )
+            return request.path, key, fingerprint, settings.IDEMPOTENCY_REPLAY_TTL
+        fingerprint = idempotency.fingerprint(request.body)
+
+        natural = None
+        if field and request.content_type == "application/json":
+            try:
+                natural = json.loads(request.body).get(field)
+            except (ValueError, AttributeError):
+                pass
+        key = idempotency.caller_key(request, natural)
+        if key is not None:
+            return request.path, key, fingerprint, settings.IDEMPOTENCY_REPLAY_TTL
+        return request.path, f"body:{fingerprint}", fingerprint, settings.IDEMPOTENCY_FINGERPRINT_TTL
+
+    def _replay(self, record, fingerprint, waited):
+        if record["fingerprint"] != fingerprint:
+            self.store.mismatched.incr()
+            return JsonResponse({
+                "status": False,
+                "message": "Idempotency key was already used for a different request"
+            }, status=422)
+        self.store.replayed.incr()
+        if waited:
+            self.store.waited.incr()
+        response = HttpResponse(record["content"], status=record["status"], content_type=record["content_type"])
+        response[idempotency.REPLAYED_HEADER] = "true"
+        return response
+
+    def _conflict(self):
+        self.store.conflicts.incr()
+        response = JsonResponse({
+            "status": False,
+            "message": "A request with this idempotency key is still in progress, retry shortly"
+        }, status=409)
+        response["Retry-After"] = "1"
+        return response
+
+    def _record(self, response, fingerprint):
+        if not 200 <= response.status_code < 300 or response.streaming:
+            return None
+        self.store.stored.incr()
+        return {
+            "fingerprint": fingerprint,
+            "status": response.status_code,
+            "content": response.content,
+            "content_type": response.get("Content-Type"),
+        }
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        identity = self._identify(request)
+        if identity is None:
+            return self.get_response(request)
+        scope, key, fingerprint, ttl = identity
+        self.store.requests.incr()
+
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT
+        waited = False
+        while True:
+            record = self.store.get(scope, key)
+            if record is not None:
+                return self._replay(record, fingerprint, waited)
+            token = self.store.lock(scope, key)
+            if token is not None:
+                break
+            if time.monotonic() >= deadline:
+                return self._conflict()
+            waited = True
+            time.sleep(self.poll_interval)
+
+        try:
+            # The first request may have finished between the get and the lock
+            record = self.store.get(scope, key)
+            if record is not None:
+                return self._replay(record, fingerprint, waited)
+            response = self.get_response(request)
+            record = self._record(response, fingerprint)
+            if record is not None:
+                self.store.put(scope, key, record, ttl)
+            return response
+        finally:
+            self.store.unlock(scope, key, token)
+
+    async def __acall__(self, request):
+        identity = self._identify(request)
+        if identity is None:
+            return await self.get_response(request)
+        scope, key, fingerprint, ttl = identity
+        self.store.requests.incr()
+
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT
+        waited = False
+        while True:
+            record = await self.store.aget(scope, key)
+            if record is not None:
+                return self._replay(record, fingerprint, waited)
+            token = await self.store.alock(scope, key)
+            if token is not None:
+                break
+            if time.monotonic() >= deadline:
+                return self._conflict()
+            waited = True
+            await asyncio.sleep(self.poll_interval)
+
+        try:
+            record = await self.store.aget(scope, key)
+            if record is not None:
+                return self._replay(record, fingerprint, waited)
+            response = await self.get_response(request)
+            record = self._record(response, fingerprint)
+            if record is not None:
+                await self.store.aput(scope, key, record, ttl)
+            return response
+        finally:
+            await self.store.aunlock(scope, key, token)
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-17 10:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Transaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(choices=[('mpesa', 'M-Pesa'), ('sasapay', 'SasaPay KE'), ('sasapay_tz', 'SasaPay TZ'), ('flutterwave', 'Flutterwave')], max_length=20)),
+                ('kind', models.CharField(choices=[('c2b', 'Customer to business'), ('b2c', 'Business to customer'), ('b2b', 'Business to business'), ('checkout', 'Card checkout'), ('remittance', 'Remittance'), ('charge', 'Charge')], max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('amount', models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True)),
+                ('currency', models.CharField(blank=True, max_length=3)),
+                ('phone_number', models.CharField(blank=True, max_length=20)),
+                ('merchant_request_id', models.CharField(blank=True, max_length=64, null=True)),
+                ('checkout_request_id', models.CharField(blank=True, max_length=64, null=True)),
+                ('originator_conversation_id', models.CharField(blank=True, max_length=64, null=True)),
+                ('merchant_transaction_reference', models.CharField(blank=True, max_length=64, null=True)),
+                ('trans_id', models.CharField(blank=True, max_length=64, null=True)),
+                ('bill_ref_number', models.CharField(blank=True, max_length=64, null=True)),
+                ('reference', models.CharField(blank=True, max_length=64, null=True)),
+                ('result_code', models.CharField(blank=True, max_length=20)),
+                ('result_desc', models.CharField(blank=True, max_length=255)),
+                ('request_payload', models.JSONField(blank=True, default=dict)),
+                ('callback_payload', models.JSONField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['provider', 'checkout_request_id'], name='core_txn_checkout_idx'), models.Index(fields=['provider', 'merchant_request_id'], name='core_txn_merchant_req_idx'), models.Index(fields=['provider', 'originator_conversation_id'], name='core_txn_conversation_idx'), models.Index(fields=['provider', 'merchant_transaction_reference'], name='core_txn_merchant_ref_idx'), models.Index(fields=['provider', 'reference'], name='core_txn_reference_idx'), models.Index(fields=['provider', 'trans_id'], name='core_txn_trans_id_idx'), models.Index(fields=['provider', 'bill_ref_number'], name='core_txn_bill_ref_idx'), models.Index(fields=['status', 'created_at'], name='core_txn_status_created_idx')],
+            },
+        ),
+    ]
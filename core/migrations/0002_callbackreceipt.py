@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-17 10:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CallbackReceipt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(choices=[('mpesa', 'M-Pesa'), ('sasapay', 'SasaPay KE'), ('sasapay_tz', 'SasaPay TZ'), ('flutterwave', 'Flutterwave')], max_length=20)),
+                ('key', models.CharField(max_length=64)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('provider', 'key'), name='core_callback_receipt_unique')],
+            },
+        ),
+    ]
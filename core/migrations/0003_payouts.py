@@ -0,0 +1,51 @@
+# Generated by Django 5.2.7 on 2026-10-17 10:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_callbackreceipt'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayoutBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(choices=[('mpesa', 'M-Pesa'), ('sasapay', 'SasaPay KE'), ('sasapay_tz', 'SasaPay TZ'), ('flutterwave', 'Flutterwave')], max_length=20)),
+                ('status', models.CharField(choices=[('receiving', 'Receiving'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed')], default='receiving', max_length=20)),
+                ('concurrency', models.PositiveSmallIntegerField()),
+                ('defaults', models.JSONField(blank=True, default=dict)),
+                ('total_rows', models.PositiveIntegerField(default=0)),
+                ('invalid_rows', models.PositiveIntegerField(default=0)),
+                ('error', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PayoutItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('row_number', models.PositiveIntegerField()),
+                ('status', models.CharField(choices=[('invalid', 'Invalid'), ('queued', 'Queued'), ('sending', 'Sending'), ('submitted', 'Submitted'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('reference', models.CharField(blank=True, max_length=64)),
+                ('receiver', models.CharField(blank=True, max_length=20)),
+                ('amount', models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True)),
+                ('payload', models.JSONField(blank=True, default=dict)),
+                ('error', models.CharField(blank=True, max_length=255)),
+                ('response', models.JSONField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='core.payoutbatch')),
+                ('transaction', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.transaction')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['batch', 'status'], name='core_payout_item_status_idx')],
+                'constraints': [models.UniqueConstraint(fields=('batch', 'row_number'), name='core_payout_item_row_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-17 12:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_payouts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payoutbatch',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='payoutbatch',
+            constraint=models.UniqueConstraint(fields=('provider', 'idempotency_key'), name='core_payout_batch_key_unique'),
+        ),
+    ]
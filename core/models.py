@@ -0,0 +1,195 @@
+from django.db import models
+
+
+class TransactionQuerySet(models.QuerySet):
+
+    def lookup(self, provider, **keys):
+        """
+        Find the transaction a provider message refers to with a single
+        indexed query on the most specific key present (see
+        ``Transaction.LOOKUP_KEYS``). Returns None if nothing matches.
+
+        Less specific keys are deliberately not tried as a fallback: a
+        BillRefNumber is often reused and would match an unrelated row.
+        """
+        for key in Transaction.LOOKUP_KEYS:
+            value = keys.get(key)
+            if value:
+                return self.filter(provider=provider, **{key: value}).order_by("-pk").first()
+        return None
+
+
+class Transaction(models.Model):
+    """
+    Ledger row for every payment, payout or charge sent through the gateway,
+    whichever provider app initiated it, updated in place by callbacks.
+    """
+
+    class Provider(models.TextChoices):
+        MPESA = "mpesa", "M-Pesa"
+        SASAPAY = "sasapay", "SasaPay KE"
+        SASAPAY_TZ = "sasapay_tz", "SasaPay TZ"
+        FLUTTERWAVE = "flutterwave", "Flutterwave"
+
+    class Kind(models.TextChoices):
+        C2B = "c2b", "Customer to business"
+        B2C = "b2c", "Business to customer"
+        B2B = "b2b", "Business to business"
+        CHECKOUT = "checkout", "Card checkout"
+        REMITTANCE = "remittance", "Remittance"
+        CHARGE = "charge", "Charge"
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        COMPLETED = "completed", "Completed"
+        FAILED = "failed", "Failed"
+
+    # Keys providers send back in callbacks, most specific first
+    LOOKUP_KEYS = (
+        "checkout_request_id",
+        "merchant_request_id",
+        "originator_conversation_id",
+        "merchant_transaction_reference",
+        "reference",
+        "trans_id",
+        "bill_ref_number",
+    )
+
+    provider = models.CharField(max_length=20, choices=Provider.choices)
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+
+    amount = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+    currency = models.CharField(max_length=3, blank=True)
+    phone_number = models.CharField(max_length=20, blank=True)
+
+    # Daraja / SasaPay request identifiers
+    merchant_request_id = models.CharField(max_length=64, null=True, blank=True)
+    checkout_request_id = models.CharField(max_length=64, null=True, blank=True)
+    originator_conversation_id = models.CharField(max_length=64, null=True, blank=True)
+    merchant_transaction_reference = models.CharField(max_length=64, null=True, blank=True)
+    # Provider receipt (TransID, TransactionCode, MpesaReceiptNumber)
+    trans_id = models.CharField(max_length=64, null=True, blank=True)
+    bill_ref_number = models.CharField(max_length=64, null=True, blank=True)
+    # Flutterwave charge reference
+    reference = models.CharField(max_length=64, null=True, blank=True)
+
+    result_code = models.CharField(max_length=20, blank=True)
+    result_desc = models.CharField(max_length=255, blank=True)
+    request_payload = models.JSONField(default=dict, blank=True)
+    callback_payload = models.JSONField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = TransactionQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["provider", "checkout_request_id"], name="core_txn_checkout_idx"),
+            models.Index(fields=["provider", "merchant_request_id"], name="core_txn_merchant_req_idx"),
+            models.Index(fields=["provider", "originator_conversation_id"], name="core_txn_conversation_idx"),
+            models.Index(fields=["provider", "merchant_transaction_reference"], name="core_txn_merchant_ref_idx"),
+            models.Index(fields=["provider", "reference"], name="core_txn_reference_idx"),
+            models.Index(fields=["provider", "trans_id"], name="core_txn_trans_id_idx"),
+            models.Index(fields=["provider", "bill_ref_number"], name="core_txn_bill_ref_idx"),
+            models.Index(fields=["status", "created_at"], name="core_txn_status_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_provider_display()} {self.kind} {self.pk} ({self.status})"
+
+
+class CallbackReceipt(models.Model):
+    """
+    One row per provider notification applied to the ledger. The unique
+    index is what finally rejects a re-delivered callback or IPN, whichever
+    worker received it.
+    """
+
+    provider = models.CharField(max_length=20, choices=Transaction.Provider.choices)
+    # TransID for IPNs, CheckoutRequestID etc. for request callbacks
+    key = models.CharField(max_length=64)
+    received_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["provider", "key"], name="core_callback_receipt_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.provider} {self.key}"
+
+
+class PayoutBatch(models.Model):
+    """
+    One uploaded file of B2C payouts, fanned out to a provider row by row.
+    """
+
+    class Status(models.TextChoices):
+        RECEIVING = "receiving", "Receiving"
+        PROCESSING = "processing", "Processing"
+        COMPLETED = "completed", "Completed"
+        FAILED = "failed", "Failed"
+
+    provider = models.CharField(max_length=20, choices=Transaction.Provider.choices)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.RECEIVING)
+    concurrency = models.PositiveSmallIntegerField()
+    # Query parameters applied to every row that does not set them
+    defaults = models.JSONField(default=dict, blank=True)
+    # The uploader's Idempotency-Key: a second upload with it is refused,
+    # and rows without a reference get one derived from it
+    idempotency_key = models.CharField(max_length=255, null=True, blank=True)
+    total_rows = models.PositiveIntegerField(default=0)
+    invalid_rows = models.PositiveIntegerField(default=0)
+    error = models.CharField(max_length=255, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["provider", "idempotency_key"], name="core_payout_batch_key_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_provider_display()} payout batch {self.pk} ({self.status})"
+
+
+class PayoutItem(models.Model):
+    """
+    One row of a payout batch and what the provider said about it.
+    """
+
+    class Status(models.TextChoices):
+        INVALID = "invalid", "Invalid"
+        QUEUED = "queued", "Queued"
+        # Sent but not answered; never resent automatically, as the
+        # provider may have paid it
+        SENDING = "sending", "Sending"
+        SUBMITTED = "submitted", "Submitted"
+        FAILED = "failed", "Failed"
+
+    batch = models.ForeignKey(PayoutBatch, on_delete=models.CASCADE, related_name="items")
+    row_number = models.PositiveIntegerField()
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.QUEUED)
+    reference = models.CharField(max_length=64, blank=True)
+    receiver = models.CharField(max_length=20, blank=True)
+    amount = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+    payload = models.JSONField(default=dict, blank=True)
+    error = models.CharField(max_length=255, blank=True)
+    response = models.JSONField(null=True, blank=True)
+    transaction = models.ForeignKey(Transaction, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["batch", "row_number"], name="core_payout_item_row_unique"),
+        ]
+        indexes = [
+            models.Index(fields=["batch", "status"], name="core_payout_item_status_idx"),
+        ]
+
+    def __str__(self):
+        return f"Payout {self.batch_id}/{self.row_number} ({self.status})"
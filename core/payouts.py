@@ -0,0 +1,364 @@
+"""
+Bulk B2C payouts: streaming ingestion of CSV / NDJSON uploads into
+``PayoutBatch`` rows, then fan-out to the provider at a bounded
+concurrency with each row's outcome stored on its ``PayoutItem``.
+"""
+import codecs
+import csv
+import hashlib
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+
+import requests
+from django.db import connection, transaction as db_transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from . import circuit, ledger, metrics
+from .models import PayoutBatch, PayoutItem, Transaction
+
+logger = logging.getLogger(__name__)
+
+# Rows written per INSERT while ingesting
+INGEST_CHUNK = 1000
+# Error on rows left SENDING because the provider's answer was unusable
+UNANSWERED = "No usable response from provider"
+
+rows_sent = metrics.Counter()
+rows_failed = metrics.Counter()
+_running = set()
+_running_lock = threading.Lock()
+# PayoutChannel instances by provider, for resume()
+channels = {}
+
+
+class PayoutChannel:
+    """
+    How one provider's B2C endpoint takes a payout row. Provider apps
+    subclass this next to their other services.
+    """
+
+    provider = None
+    client = None
+    kind = Transaction.Kind.B2C
+    receiver_field = None
+    amount_field = "Amount"
+    # Filled in with "payout-<digest of the batch's key>-<row>" when a row
+    # has none, so a re-upload under the same key reuses the references
+    reference_field = None
+    required_fields = ()
+
+    def __init__(self):
+        channels[self.provider] = self
+
+    def url(self):
+        raise NotImplementedError
+
+    def get_token_manager(self):
+        return None
+
+    def payload(self, row):
+        raise NotImplementedError
+
+    def accepted(self, response, data):
+        return response.ok and isinstance(data, dict)
+
+    def prepare(self, batch, number, row, references):
+        """
+        Validate one uploaded row (merged over the batch defaults) into an
+        unsaved PayoutItem. ``references`` holds the batch's references so
+        far, to reject repeats.
+        """
+        item = PayoutItem(batch=batch, row_number=number)
+        if not isinstance(row, dict):
+            return self._invalid(item, "Row is not a JSON object")
+
+        values = dict(batch.defaults)
+        values.update({k: v for k, v in row.items() if v not in (None, "")})
+        values.setdefault(self.reference_field, f"payout-{batch_digest(batch)}-{number}")
+        item.reference = str(values[self.reference_field])[:64]
+        item.receiver = str(values.get(self.receiver_field, ""))[:20]
+
+        missing = [field for field in self.required_fields if field not in values]
+        if missing:
+            return self._invalid(item, f"Missing fields: {', '.join(missing)}")
+        try:
+            amount = Decimal(str(values[self.amount_field]))
+        except InvalidOperation:
+            return self._invalid(item, "Amount must be a number")
+        if not amount.is_finite() or amount <= 0:
+            return self._invalid(item, "Amount must be positive")
+        item.amount = amount
+        if not item.receiver.lstrip("+").isdigit():
+            return self._invalid(item, f"{self.receiver_field} must be a phone number")
+        if item.reference in references:
+            return self._invalid(item, f"Duplicate {self.reference_field} in batch")
+
+        references.add(item.reference)
+        item.payload = self.payload(values)
+        return item
+
+    @staticmethod
+    def _invalid(item, error):
+        item.status = PayoutItem.Status.INVALID
+        item.error = error
+        return item
+
+
+def batch_digest(batch):
+    """
+    A short digest of the batch's provider and Idempotency-Key, the same
+    for every upload with that key.
+    """
+    key = batch.idempotency_key or f"batch:{batch.pk}"
+    return hashlib.sha256(f"{batch.provider}:{key}".encode()).hexdigest()[:16]
+
+
+def read_rows(stream, content_type):
+    """
+    Yield ``(row_number, row)`` from an upload without reading it whole.
+    ``text/csv`` is read with a header line; anything else as NDJSON, where
+    a line that is not a JSON object yields ``None``.
+    """
+    lines = codecs.iterdecode(stream, "utf-8-sig")
+    if content_type.startswith("text/csv"):
+        for number, row in enumerate(csv.DictReader(lines), start=1):
+            yield number, {k.strip(): v.strip() for k, v in row.items() if k and isinstance(v, str)}
+        return
+
+    number = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield number, row if isinstance(row, dict) else None
+
+
+def ingest(batch, rows, channel):
+    """
+    Store every row of the upload as a PayoutItem, validating as it streams
+    in. Raises UnicodeDecodeError / csv.Error for unreadable uploads.
+    """
+    references = set()
+    items = []
+    total = invalid = 0
+    for number, row in rows:
+        item = channel.prepare(batch, number, row, references)
+        total += 1
+        invalid += item.status == PayoutItem.Status.INVALID
+        items.append(item)
+        if len(items) >= INGEST_CHUNK:
+            PayoutItem.objects.bulk_create(items)
+            items = []
+    PayoutItem.objects.bulk_create(items)
+
+    batch.total_rows = total
+    batch.invalid_rows = invalid
+    batch.save(update_fields=["total_rows", "invalid_rows"])
+
+
+def _send(channel, item):
+    """
+    Send one payout. Returns the item with its new status, an unsaved
+    ledger Transaction if the provider accepted it, and how long to hold
+    off the provider if it refused to take the call.
+    """
+    try:
+        response = channel.client.post(
+            channel.url(), headers={"Content-Type": "application/json"}, json=item.payload,
+            token_manager=channel.get_token_manager(),
+        )
+        data = response.json()
+    except circuit.ProviderUnavailable as e:
+        # Never sent; back in the queue for a later chunk, once the
+        # provider is expected to take calls again
+        item.status = PayoutItem.Status.QUEUED
+        item.error = e.detail["message"][:255]
+        return item, None, e.wait
+    except requests.exceptions.ConnectTimeout as e:
+        item.status = PayoutItem.Status.FAILED
+        item.error = f"Request to provider failed: {e}"[:255]
+        return item, None, 0
+    except (requests.exceptions.RequestException, ValueError) as e:
+        # The provider may have acted on it; leave it SENDING for
+        # reconciliation rather than risk paying twice
+        item.error = f"{UNANSWERED}: {e}"[:255]
+        return item, None, 0
+
+    item.response = data
+    if not channel.accepted(response, data):
+        item.status = PayoutItem.Status.FAILED
+        message = (data.get("message") or data.get("errorMessage")) if isinstance(data, dict) else None
+        item.error = str(message or f"Provider returned {response.status_code}")[:255]
+        return item, None, 0
+
+    item.status = PayoutItem.Status.SUBMITTED
+    return item, Transaction(
+        provider=channel.provider, kind=channel.kind, request_payload=item.payload,
+        **ledger.extract(data, item.payload),
+    ), 0
+
+
+def _store(results):
+    now = timezone.now()
+    with db_transaction.atomic():
+        Transaction.objects.bulk_create([txn for _, txn, _ in results if txn is not None])
+        for item, txn, _ in results:
+            item.transaction = txn
+            item.updated_at = now
+            if item.status == PayoutItem.Status.SUBMITTED:
+                rows_sent.incr()
+            elif item.status == PayoutItem.Status.FAILED:
+                rows_failed.incr()
+        PayoutItem.objects.bulk_update(
+            [item for item, _, _ in results], ["status", "error", "response", "transaction", "updated_at"]
+        )
+
+
+def process(batch, channel):
+    """
+    Send the batch's queued rows, ``batch.concurrency`` at a time. Rows are
+    marked SENDING before they go out, so ``resume`` after a crash only
+    sends rows that never left. Rows the rate limit or circuit breaker turned
+    back are queued again and picked up by a later chunk, after waiting
+    as long as the provider asked; the batch completes once none are left.
+    """
+    with _running_lock:
+        _running.add(batch.pk)
+    batch.status = PayoutBatch.Status.PROCESSING
+    batch.started_at = timezone.now()
+    batch.save(update_fields=["status", "started_at"])
+
+    chunk = max(batch.concurrency * 25, 100)
+    try:
+        with ThreadPoolExecutor(batch.concurrency, thread_name_prefix=f"payouts-{batch.pk}") as pool:
+            previous, backoff = [], 0
+            while True:
+                if backoff:
+                    time.sleep(backoff)
+                items = list(batch.items.filter(status=PayoutItem.Status.QUEUED).order_by("pk")[:chunk])
+                PayoutItem.objects.filter(pk__in=[item.pk for item in items]).update(
+                    status=PayoutItem.Status.SENDING, updated_at=timezone.now()
+                )
+                for item in items:
+                    item.status = PayoutItem.Status.SENDING
+                # Queue this chunk before storing the last one, so the pool
+                # keeps sending while results are written
+                futures = [pool.submit(_send, channel, item) for item in items]
+                backoff = 0
+                if previous:
+                    results = [future.result() for future in previous]
+                    _store(results)
+                    backoff = max(wait for _, _, wait in results)
+                if not futures and not previous:
+                    break
+                # With no new chunk, look again: the rows just stored may
+                # have gone back to the queue
+                previous = futures
+        batch.status = PayoutBatch.Status.COMPLETED
+    except Exception as e:
+        logger.exception("Payout batch %s failed", batch.pk)
+        batch.status = PayoutBatch.Status.FAILED
+        batch.error = str(e)[:255]
+    finally:
+        batch.finished_at = timezone.now()
+        batch.save(update_fields=["status", "error", "finished_at"])
+        with _running_lock:
+            _running.discard(batch.pk)
+
+
+def start(batch, channel):
+    """
+    Process ``batch`` on a background thread.
+    """
+    def run():
+        try:
+            process(batch, channel)
+        finally:
+            connection.close()
+
+    threading.Thread(target=run, name=f"payout-batch-{batch.pk}", daemon=True).start()
+
+
+def resume(stale):
+    """
+    Finish the batches a dead worker left PROCESSING: those none of whose
+    rows has moved for ``stale`` seconds. Each is claimed by moving its
+    ``started_at``, so two resumers never take the same batch, then
+    processed here. Returns the batches resumed.
+
+    Rows still SENDING went out before the crash and may have been paid.
+    They are never resent: they stay SENDING, with an error saying so, to
+    be reconciled against the provider's transaction status (their
+    references are in ``PayoutItem.reference``). Only QUEUED rows are sent.
+    """
+    # The provider apps' channels register themselves on import
+    autodiscover_modules("api.payouts")
+    cutoff = timezone.now() - timedelta(seconds=stale)
+    stalled = (
+        PayoutBatch.objects.filter(status=PayoutBatch.Status.PROCESSING, started_at__lt=cutoff)
+        .annotate(moved_at=Max("items__updated_at"))
+        .filter(Q(moved_at__lt=cutoff) | Q(moved_at__isnull=True))
+        .order_by("pk")
+    )
+    resumed = []
+    for batch in stalled:
+        channel = channels.get(batch.provider)
+        if channel is None:
+            logger.error("Payout batch %s: no channel for %s", batch.pk, batch.provider)
+            continue
+        claimed = PayoutBatch.objects.filter(
+            pk=batch.pk, status=PayoutBatch.Status.PROCESSING, started_at=batch.started_at
+        ).update(started_at=timezone.now())
+        if not claimed:
+            continue
+        sending = batch.items.filter(status=PayoutItem.Status.SENDING)
+        interrupted = sending.exclude(error__startswith=UNANSWERED).update(
+            error="Interrupted before the provider answered; check its status before resending",
+            updated_at=timezone.now(),
+        )
+        logger.warning(
+            "Resuming payout batch %s; %d rows interrupted while SENDING, left for reconciliation",
+            batch.pk, interrupted,
+        )
+        process(batch, channel)
+        resumed.append(batch)
+    return resumed
+
+
+def summary(batch):
+    counts = dict(
+        batch.items.order_by().values("status").annotate(count=Count("pk")).values_list("status", "count")
+    )
+    return {
+        "id": batch.pk,
+        "provider": batch.provider,
+        "status": batch.status,
+        "concurrency": batch.concurrency,
+        "total_rows": batch.total_rows,
+        "invalid_rows": batch.invalid_rows,
+        "items": {choice: counts.get(choice, 0) for choice in PayoutItem.Status.values},
+        "error": batch.error,
+        "created_at": batch.created_at,
+        "started_at": batch.started_at,
+        "finished_at": batch.finished_at,
+    }
+
+
+def stats():
+    with _running_lock:
+        running = len(_running)
+    return {"batches_running": running, "rows_sent": rows_sent.value, "rows_failed": rows_failed.value}
+
+
+metrics.register("payouts", stats)
@@ -0,0 +1,234 @@
+import asyncio
+import math
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+
+from . import metrics
+from .circuit import ProviderUnavailable
+
+
+class RateLimited(ProviderUnavailable):
+    """
+    An outbound call would have waited longer than allowed for its
+    provider's rate limit, and was not sent. Sent to the caller as a 429
+    with ``Retry-After`` set to the wait.
+    """
+
+    status_code = status.HTTP_429_TOO_MANY_REQUESTS
+    default_code = "rate_limited"
+
+
+class RateLimiter:
+    """
+    Token bucket for one provider endpoint, shared by every worker through
+    the Django cache.
+
+    Each one-second window holds ``rate`` tokens split into blocks of about
+    a tenth of a second's worth, and block ``i`` opens ``i`` tenths into the
+    window, so calls are spread over the second instead of bursting at its
+    start. A worker claims a whole open block with ``cache.add`` (atomic on
+    every cache backend) and spends it locally, so the cache is touched once
+    per block rather than once per call. Callers that find no open block
+    wait for the next one, with jitter so workers don't resume in lockstep,
+    and are shed with ``RateLimited`` once the wait would exceed
+    ``max_wait``.
+
+    A 429 from the provider pauses the limiter for every worker until its
+    Retry-After has passed.
+    """
+
+    window = 1.0
+    burst_blocks = 2
+
+    def __init__(self, name, rate, max_wait):
+        self.name = name
+        self.rate = rate
+        self.max_wait = max_wait
+        self.block = max(1, math.ceil(rate * self.window / 10))
+        self.blocks = max(1, math.ceil(rate * self.window / self.block))
+
+        self._lock = threading.Lock()
+        self._window = None
+        self._tokens = 0
+        self._exhausted = None
+        self._paused_until = 0.0
+
+        self.acquired = metrics.Counter()
+        self.waited = metrics.Counter()
+        self.shed = metrics.Counter()
+        self.blocks_claimed = metrics.Counter()
+        self.throttled = metrics.Counter()
+        self._wait_seconds = 0.0
+        metrics.register(f"ratelimit.{name}", self.stats)
+
+    @property
+    def cache_key(self):
+        return f"gateway:ratelimit:{self.name}"
+
+    def _take_local(self, now):
+        """
+        Spend a token this worker already holds. Returns 0 on success, the
+        seconds to wait if the limiter is known to be paused or exhausted, or
+        None if a block has to be claimed from the cache.
+        """
+        if now < self._paused_until:
+            return self._paused_until - now
+        window = int(now // self.window)
+        if window != self._window:
+            self._window, self._tokens = window, 0
+        if self._tokens > 0:
+            self._tokens -= 1
+            return 0
+        if self._exhausted == window:
+            return self._until_next_window(now)
+        return None
+
+    def _until(self, at):
+        # Spread resumption over a tenth of a block
+        return at - time.time() + random.uniform(0, self.block / self.rate / 10)
+
+    def _until_next_window(self, now):
+        return self._until((self._window + 1) * self.window)
+
+    def _claim(self):
+        with self._lock:
+            now = time.time()
+            wait = self._take_local(now)
+            if wait is not None:
+                return wait
+
+            paused_until = cache.get(f"{self.cache_key}:paused")
+            if paused_until and paused_until > now:
+                self._paused_until = paused_until
+                return paused_until - now
+
+            start = self._window * self.window
+            opened = min(self.blocks, int((now - start) * self.rate / self.block) + 1)
+            # Blocks left unclaimed earlier in the window lapse, like a
+            # full bucket, so at most ``burst_blocks`` are spent at once
+            oldest = max(0, opened - self.burst_blocks)
+            first = random.randrange(oldest, opened)
+            for i in range(opened - oldest):
+                slot = oldest + (first - oldest + i) % (opened - oldest)
+                if cache.add(f"{self.cache_key}:{self._window}:{slot}", 1, math.ceil(self.window * 2)):
+                    self.blocks_claimed.incr()
+                    self._tokens = self.block - 1
+                    return 0
+            if opened < self.blocks:
+                return self._until(start + opened * self.block / self.rate)
+            self._exhausted = self._window
+            return self._until_next_window(now)
+
+    def _try_acquire(self):
+        with self._lock:
+            wait = self._take_local(time.time())
+        return self._claim() if wait is None else wait
+
+    def _admit(self, wait, deadline):
+        """
+        Decide what to do with a ``wait``: True if a token was taken, raise
+        if the deadline would pass, else False after recording the wait.
+        """
+        if wait == 0:
+            self.acquired.incr()
+            return True
+        if time.monotonic() + wait > deadline:
+            self.shed.incr()
+            raise RateLimited(f"Rate limit for {self.name} ({self.rate:g}/s) exceeded, retry shortly", wait)
+        self.waited.incr()
+        self._wait_seconds += wait
+        return False
+
+    def acquire(self):
+        """
+        Block until a token is available, or raise RateLimited.
+        """
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            wait = self._try_acquire()
+            if self._admit(wait, deadline):
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """
+        ``acquire`` for the event loop; only claiming a block leaves it.
+        """
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            with self._lock:
+                wait = self._take_local(time.time())
+            if wait is None:
+                wait = await sync_to_async(self._claim, thread_sensitive=False)()
+            if self._admit(wait, deadline):
+                return
+            await asyncio.sleep(wait)
+
+    def throttle(self, retry_after=None):
+        """
+        The provider answered 429: pause every worker for ``retry_after``
+        seconds (default one window).
+        """
+        try:
+            pause = float(retry_after) if retry_after else self.window
+        except ValueError:
+            pause = self.window
+        self.throttled.incr()
+        paused_until = time.time() + pause
+        with self._lock:
+            self._paused_until = max(self._paused_until, paused_until)
+        cache.set(f"{self.cache_key}:paused", paused_until, math.ceil(pause) + 1)
+
+    def stats(self):
+        return {
+            "rate": self.rate,
+            "block": self.block,
+            "acquired": self.acquired.value,
+            "waited": self.waited.value,
+            "wait_seconds": round(self._wait_seconds, 3),
+            "shed": self.shed.value,
+            "blocks_claimed": self.blocks_claimed.value,
+            "throttled": self.throttled.value,
+            "local_tokens": self._tokens,
+            "paused_for": round(max(self._paused_until - time.time(), 0), 3),
+        }
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(provider, url):
+    """
+    The limiter for ``url`` on ``provider`` from
+    ``settings.PROVIDER_RATE_LIMITS``, or None if it is not limited.
+    Endpoints are matched by path suffix, falling back to ``"*"``.
+    """
+    limits = settings.PROVIDER_RATE_LIMITS.get(provider)
+    if not limits:
+        return None
+    path = urlsplit(url).path
+    endpoint = next(
+        (key for key in limits if key != "*" and path.rstrip("/").endswith(key.strip("/"))), "*"
+    )
+    rate = limits.get(endpoint)
+    if not rate:
+        return None
+
+    key = (provider, endpoint)
+    limiter = _limiters.get(key)
+    if limiter is None:
+        with _limiters_lock:
+            if key not in _limiters:
+                _limiters[key] = RateLimiter(
+                    f"{provider}.{endpoint.strip('/')}", rate, settings.PROVIDER_RATE_LIMIT_MAX_WAIT
+                )
+            limiter = _limiters[key]
+    return limiter
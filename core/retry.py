@@ -0,0 +1,177 @@
+import asyncio
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import aiohttp
+import requests
+from django.conf import settings
+from urllib3.exceptions import NewConnectionError
+
+from . import metrics
+
+# Failures where the request never left this host, so repeating it cannot
+# act twice at the provider
+NEVER_SENT = (requests.exceptions.ConnectTimeout, aiohttp.ClientConnectorError, aiohttp.ConnectionTimeoutError)
+# Failures worth repeating for a call that is safe to repeat
+TRANSIENT = (
+    requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+    requests.exceptions.ChunkedEncodingError, aiohttp.ClientConnectionError,
+    aiohttp.ClientPayloadError, asyncio.TimeoutError,
+)
+RETRY_STATUSES = {429, 502, 503, 504}
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+IDEMPOTENCY_HEADERS = {"x-idempotency-key", "idempotency-key"}
+
+
+def never_sent(error):
+    if isinstance(error, NEVER_SENT):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError) and error.args:
+        return isinstance(getattr(error.args[0], "reason", None), NewConnectionError)
+    return False
+
+
+class RetryPolicy:
+    """
+    When an outbound call to one provider endpoint is tried again.
+
+    A call is idempotent if it is a GET, the endpoint is configured
+    ``idempotent`` (status queries, token fetches) or it carries an
+    idempotency key header. Idempotent calls are retried after transport
+    errors and 429/502/503/504 replies. Any other call is only retried when
+    its connection could not be opened, so a payment is never sent twice.
+
+    Waits are exponential with full jitter (at least the provider's
+    Retry-After), at most ``attempts`` tries are made, and no retry starts
+    or runs past ``deadline`` seconds after the first.
+    """
+
+    def __init__(self, name, attempts=3, base_delay=0.2, max_delay=2.0, deadline=10.0, idempotent=False):
+        self.name = name
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.idempotent = idempotent
+
+        self.retries = metrics.Counter()
+        self.recovered = metrics.Counter()
+        self.exhausted = metrics.Counter()
+        metrics.register(f"retry.{name}", self.stats)
+
+    def is_idempotent(self, method, headers):
+        if self.idempotent or method.upper() in SAFE_METHODS:
+            return True
+        return any(key.lower() in IDEMPOTENCY_HEADERS for key in (headers or {}))
+
+    def _delay(self, attempt, started, idempotent, error=None, response=None):
+        """
+        Seconds to wait before trying again, or None to stop.
+        """
+        if error is not None:
+            if not never_sent(error) and not (idempotent and isinstance(error, TRANSIENT)):
+                return None
+            retry_after = None
+        else:
+            if not idempotent or response.status_code not in RETRY_STATUSES:
+                return None
+            retry_after = response.headers.get("Retry-After")
+
+        if attempt >= self.attempts:
+            self.exhausted.incr()
+            return None
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        try:
+            delay = max(delay, float(retry_after or 0))
+        except ValueError:
+            pass
+        if time.monotonic() + delay >= started + self.deadline:
+            self.exhausted.incr()
+            return None
+        self.retries.incr()
+        return delay
+
+    def call(self, send, method, headers=None):
+        """
+        ``send(budget)`` until it succeeds or may not be retried. ``budget``
+        is None for the first try, then the seconds left before the
+        deadline, to cap that try's timeout.
+        """
+        idempotent = self.is_idempotent(method, headers)
+        started = time.monotonic()
+        budget = None
+        for attempt in range(1, self.attempts + 1):
+            try:
+                response = send(budget)
+            except requests.exceptions.RequestException as e:
+                delay = self._delay(attempt, started, idempotent, error=e)
+                if delay is None:
+                    raise
+            else:
+                delay = self._delay(attempt, started, idempotent, response=response)
+                if delay is None:
+                    if attempt > 1:
+                        self.recovered.incr()
+                    return response
+            time.sleep(delay)
+            budget = started + self.deadline - time.monotonic()
+
+    async def call_async(self, send, method, headers=None):
+        """
+        ``call`` for coroutines; ``send(budget)`` is awaited.
+        """
+        idempotent = self.is_idempotent(method, headers)
+        started = time.monotonic()
+        budget = None
+        for attempt in range(1, self.attempts + 1):
+            try:
+                response = await send(budget)
+            except (requests.exceptions.RequestException, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                delay = self._delay(attempt, started, idempotent, error=e)
+                if delay is None:
+                    raise
+            else:
+                delay = self._delay(attempt, started, idempotent, response=response)
+                if delay is None:
+                    if attempt > 1:
+                        self.recovered.incr()
+                    return response
+            await asyncio.sleep(delay)
+            budget = started + self.deadline - time.monotonic()
+
+    def stats(self):
+        return {
+            "retries": self.retries.value,
+            "recovered": self.recovered.value,
+            "exhausted": self.exhausted.value,
+        }
+
+
+_policies = {}
+_policies_lock = threading.Lock()
+
+
+def get_policy(provider, url):
+    """
+    The retry policy for ``url`` on ``provider``:
+    ``settings.PROVIDER_RETRY_DEFAULTS`` overridden by the entry of
+    ``settings.PROVIDER_RETRY[provider]`` whose path suffix ``url`` ends
+    with, else its ``"*"`` entry.
+    """
+    endpoints = settings.PROVIDER_RETRY.get(provider, {})
+    path = urlsplit(url).path.rstrip("/")
+    endpoint = next((key for key in endpoints if key != "*" and path.endswith(key.strip("/"))), "*")
+
+    key = (provider, endpoint)
+    policy = _policies.get(key)
+    if policy is not None:
+        return policy
+
+    with _policies_lock:
+        if key not in _policies:
+            options = dict(settings.PROVIDER_RETRY_DEFAULTS)
+            options.update(endpoints.get(endpoint, {}))
+            _policies[key] = RetryPolicy(f"{provider}.{endpoint.strip('/')}", **options)
+        return _policies[key]
@@ -0,0 +1,165 @@
+import threading
+import time
+import uuid
+
+from django.core.cache import cache
+
+from . import metrics
+
+
+class TokenManager:
+    """
+    Process-wide cache for a provider access token.
+
+    Subclasses implement ``fetch_token`` returning ``(access_token, expires_in)``.
+    Callers that find the token expired queue behind a single refresh
+    instead of each hitting the provider's token endpoint.
+    """
+
+    # Refresh this many seconds before the provider-reported expiry
+    refresh_margin = 60
+    # Keep the token warm from a daemon thread so callers never wait on it
+    background_refresh = False
+    # Back-off between failed background refreshes
+    retry_delay = 5
+
+    def __init__(self, name):
+        self.name = name
+        # (token, refresh_at, expires_at) swapped as one tuple so readers
+        # never see a token paired with another token's expiry
+        self._state = (None, 0.0, 0.0)
+        self._lock = threading.Lock()
+        self._refresher = None
+        self._renew_at = 0.0
+        self.refreshes = metrics.Counter()
+        self.refresh_failures = metrics.Counter()
+        metrics.register(f"tokens.{name}", self.stats)
+
+    def fetch_token(self):
+        raise NotImplementedError
+
+    def cached_token(self):
+        """
+        Return the cached token if it is still fresh, without ever blocking.
+        """
+        token, refresh_at, _ = self._state
+        if token and time.monotonic() < refresh_at:
+            return token
+        return None
+
+    def get_access_token(self):
+        token, refresh_at, _ = self._state
+        if token and time.monotonic() < refresh_at:
+            return token
+
+        with self._lock:
+            # Another thread may have refreshed while we waited on the lock
+            token, refresh_at, _ = self._state
+            if token and time.monotonic() < refresh_at:
+                return token
+            return self._refresh()
+
+    def _refresh(self):
+        token, expires_in = self.fetch_token()
+        self.refreshes.incr()
+        return self._adopt(token, float(expires_in))
+
+    def _adopt(self, token, expires_in):
+        now = time.monotonic()
+        margin = min(self.refresh_margin, expires_in / 2)
+        self._state = (token, now + expires_in - margin, now + expires_in)
+        # Background renewal runs one margin ahead of the inline deadline
+        self._renew_at = now + max(expires_in - 2 * margin, (expires_in - margin) / 2)
+
+        if self.background_refresh and self._refresher is None:
+            self._refresher = threading.Thread(
+                target=self._refresh_loop, name=f"token-refresh-{self.name}", daemon=True
+            )
+            self._refresher.start()
+        return token
+
+    def _refresh_loop(self):
+        delay = 0
+        while True:
+            time.sleep(max(self._renew_at - time.monotonic(), delay))
+            try:
+                with self._lock:
+                    if time.monotonic() >= self._renew_at:
+                        self._refresh()
+                delay = 0
+            except Exception:
+                self.refresh_failures.incr()
+                delay = self.retry_delay
+
+    def invalidate(self, token=None):
+        """
+        Drop the cached token, or only ``token`` if it is still the cached one.
+        """
+        with self._lock:
+            if token is None or self._state[0] == token:
+                self._state = (None, 0.0, 0.0)
+                self._renew_at = 0.0
+
+    def stats(self):
+        token, _, expires_at = self._state
+        return {
+            "refreshes": self.refreshes.value,
+            "refresh_failures": self.refresh_failures.value,
+            "cached": token is not None,
+            "expires_in": max(int(expires_at - time.monotonic()), 0) if token else 0,
+        }
+
+
+class SharedTokenManager(TokenManager):
+    """
+    Token shared by every worker process through the Django cache.
+
+    A worker whose copy is stale first looks in the cache. If the cached
+    token is stale too, it takes a short lease (``cache.add``) and refreshes;
+    workers that miss the lease poll the cache for the new token instead of
+    calling the token endpoint themselves.
+    """
+
+    lease_seconds = 30
+    poll_interval = 0.1
+
+    @property
+    def cache_key(self):
+        return f"gateway:token:{self.name}"
+
+    @property
+    def _lease_key(self):
+        return f"{self.cache_key}:lease"
+
+    def _refresh(self):
+        owner = uuid.uuid4().hex
+
+        while True:
+            cached = cache.get(self.cache_key)
+            if cached and time.time() < cached["expires_at"] - self.refresh_margin:
+                return self._adopt(cached["access_token"], cached["expires_at"] - time.time())
+
+            if cache.add(self._lease_key, owner, self.lease_seconds):
+                try:
+                    token, expires_in = self.fetch_token()
+                    expires_in = float(expires_in)
+                    cache.set(
+                        self.cache_key,
+                        {"access_token": token, "expires_at": time.time() + expires_in},
+                        int(expires_in),
+                    )
+                    self.refreshes.incr()
+                    return self._adopt(token, expires_in)
+                finally:
+                    if cache.get(self._lease_key) == owner:
+                        cache.delete(self._lease_key)
+
+            # Another worker holds the lease; wait for its token. If that
+            # worker dies the lease expires and the next add() takes over.
+            time.sleep(self.poll_interval)
+
+    def invalidate(self, token=None):
+        super().invalidate(token)
+        cached = cache.get(self.cache_key)
+        if cached and (token is None or cached["access_token"] == token):
+            cache.delete(self.cache_key)
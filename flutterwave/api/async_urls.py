@@ -0,0 +1,15 @@
+from django.urls import path
+from .async_views import *
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+   path("customers/", AsyncCustomerCreateListView.as_view(), name="customers"),
+   path("customers/export/", AsyncExportView.as_view(listing="customers"), name="export-customers"),
+   path("customer/<str:id>/", AsyncCustomerDetailsView.as_view(), name="customer"),
+   path("search/", AsyncCustomerSearchView.as_view(), name="search-customer"),
+
+   path("charges/", AsyncChargesCreateListView.as_view(), name="charges"),
+   path("charges/export/", AsyncExportView.as_view(listing="charges"), name="export-charges"),
+   path("charges/<str:id>/", AsyncChargesDetailsView.as_view(), name="charge"),
+   
+] + sync_urlpatterns
@@ -0,0 +1,287 @@
+import uuid
+
+import requests
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework import status
+
+from core import idempotency
+from core.aio import TRANSPORT_ERRORS, get_async_client
+from core.api.async_views import AsyncProviderView
+from core.circuit import ProviderUnavailable
+from core.models import Transaction
+from . import export, lookups
+from .charges import charge_mirror, list_query
+from .customers import customer_index, remote_search, search_query
+from .services import auth_manager
+from .payloads import *
+
+
+class AsyncFlutterwaveView(AsyncProviderView):
+    client = get_async_client("flutterwave")
+    ledger_provider = Transaction.Provider.FLUTTERWAVE
+
+    def get_token_manager(self):
+        return auth_manager
+
+    @staticmethod
+    def ledger_data(res_data):
+        return res_data.get("data")
+
+    @staticmethod
+    def flutterwave_headers(idempotent=False, idempotency_key=None):
+        headers = {
+            "accept": "application/json",
+            "content-type": "application/json",
+            "X-Trace-Id": str(uuid.uuid4())
+        }
+        if idempotent:
+            headers["X-Idempotency-Key"] = idempotency_key or str(uuid.uuid4())
+        return headers
+
+    @staticmethod
+    async def write_through(res_data):
+        await customer_index.aupsert(res_data.get("data"))
+
+    @staticmethod
+    async def mirror_charge(res_data):
+        await charge_mirror.aupsert(res_data.get("data"))
+
+    @staticmethod
+    def invalid(message):
+        return JsonResponse({
+            "status": False,
+            "message": message
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+
+######  Customer #########
+
+class AsyncCustomerCreateListView(AsyncFlutterwaveView):
+    http_method_names = ["get", "post"]
+
+    async def get(self, request):
+        response, res_data, error = await self.fetch(
+            "GET", f'{settings.FLUTTERWAVE_BASE_URL}/customers', "Failed to fetch customers",
+            headers=self.flutterwave_headers(idempotent=True),
+            params=customer_list_params(request.GET)
+        )
+        if error:
+            return error
+
+        return JsonResponse(
+            {
+                "status": True,
+                "message": "Customers fetched successfully",
+                "data": res_data
+            }
+        )
+
+    async def post(self, request):
+        data, error = self.parse_or_reject(request)
+        if error:
+            return error
+
+        payload = customer_payload(data)
+        existing = await customer_index.aexisting(payload["email"])
+        if existing is not None:
+            return JsonResponse({
+                "status": False,
+                "message": "A customer with this email already exists.",
+                "data": existing
+            }, status=status.HTTP_409_CONFLICT)
+
+        key = idempotency.provider_key("flutterwave.customers", idempotency.caller_key(request, payload["email"]))
+        return await self.call_provider(
+            "POST", f'{settings.FLUTTERWAVE_BASE_URL}/customers',
+            "Customer created successfully.", "Customer creation failed", "Customer creation failed",
+            provider_message=True, on_success=self.write_through,
+            headers=self.flutterwave_headers(idempotent=True, idempotency_key=key), json=payload
+        )
+
+
+class AsyncCustomerDetailsView(AsyncFlutterwaveView):
+    http_method_names = ["get", "put"]
+
+    async def get(self, request, id):
+        return await self.call_provider(
+            "GET", f"{settings.FLUTTERWAVE_BASE_URL}/customers/{id}",
+            "Customer details fetched successfully.", "Failed to fetch customer details.",
+            "Failed to fetch customer details",
+            provider_failure_message=True, headers=self.flutterwave_headers(),
+            coalesce=lookups.customers, coalesce_query=id
+        )
+
+    async def put(self, request, id):
+        data, error = self.parse_or_reject(request)
+        if error:
+            return error
+
+        try:
+            return await self.call_provider(
+                "PUT", f"{settings.FLUTTERWAVE_BASE_URL}/customers/{id}",
+                "Customer updated successfully.", "Customer update failed.", "Customer update failed",
+                provider_message=True, provider_failure_message=True, on_success=self.write_through,
+                headers=self.flutterwave_headers(), json=customer_update_payload(data)
+            )
+        finally:
+            # Even an update that errored may have reached Flutterwave
+            await lookups.customers.ainvalidate(id)
+
+
+class AsyncCustomerSearchView(AsyncFlutterwaveView):
+    http_method_names = ["post"]
+
+    async def post(self, request):
+        data, error = self.parse_or_reject(request)
+        if error:
+            return error
+
+        query, error = search_query(data, request.GET)
+        if error:
+            return self.invalid(error)
+
+        res_data = await customer_index.asearch(**query)
+        if res_data is not None:
+            return JsonResponse(
+                {
+                    "status": True,
+                    "message": "Customer search successful.",
+                    "data": res_data
+                }
+            )
+
+        # The index is still loading; Flutterwave answers what it can
+        try:
+            params, payload = remote_search(query)
+        except ProviderUnavailable as e:
+            return self.unavailable(e)
+        return await self.call_provider(
+            "POST", f"{settings.FLUTTERWAVE_BASE_URL}/customers/search",
+            "Customer search successful.", "Failed to search customers.", "Customer search failed",
+            provider_failure_message=True,
+            headers=self.flutterwave_headers(), params=params, json=payload
+        )
+
+
+class AsyncChargesCreateListView(AsyncFlutterwaveView):
+    http_method_names = ["get", "post"]
+
+    async def get(self, request):
+        query = list_query(request.GET)
+        if query is not None and settings.FLUTTERWAVE_CHARGE_MIRROR:
+            listing = await charge_mirror.alisting(**query)
+            if listing is not None:
+                return JsonResponse(
+                    {
+                        "status": True,
+                        "message": "Charges fetched successfully",
+                        "data": listing
+                    }
+                )
+
+        response, res_data, error = await self.fetch(
+            "GET", f'{settings.FLUTTERWAVE_BASE_URL}/charges', "Failed to fetch charges",
+            headers=self.flutterwave_headers(idempotent=True),
+            params=charge_list_params(request.GET)
+        )
+        if error:
+            return error
+
+        return JsonResponse(
+            {
+                "status": True,
+                "message": "Charges fetched successfully",
+                "data": res_data
+            }
+        )
+
+    async def post(self, request):
+        data, error = self.parse_or_reject(request)
+        if error:
+            return error
+
+        payload = charge_payload(data)
+        error = charge_payload_error(payload, CHARGE_REQUIRED_FIELDS)
+        if error:
+            return self.invalid(error)
+
+        key = idempotency.provider_key("flutterwave.charges", idempotency.caller_key(request, payload["reference"]))
+        return await self.call_provider(
+            "POST", f'{settings.FLUTTERWAVE_BASE_URL}/charges',
+            "Charges created successfully.", "Charges creation failed", "Charges creation failed",
+            provider_message=True,
+            headers=self.flutterwave_headers(idempotent=True, idempotency_key=key),
+            ledger_kind=Transaction.Kind.CHARGE, on_success=self.mirror_charge, json=payload
+        )
+
+
+class AsyncChargesDetailsView(AsyncFlutterwaveView):
+    http_method_names = ["get", "put"]
+
+    async def get(self, request, id):
+        return await self.call_provider(
+            "GET", f"{settings.FLUTTERWAVE_BASE_URL}/charges/{id}",
+            "Charges details fetched successfully.", "Failed to fetch Charges details.",
+            "Failed to fetch Charges details",
+            provider_failure_message=True, headers=self.flutterwave_headers(),
+            coalesce=lookups.charges, coalesce_query=id
+        )
+
+    async def put(self, request, id):
+        data, error = self.parse_or_reject(request)
+        if error:
+            return error
+
+        payload = charge_update_payload(data, id)
+        error = charge_payload_error(payload, CHARGE_UPDATE_REQUIRED_FIELDS)
+        if error:
+            return self.invalid(error)
+
+        try:
+            return await self.call_provider(
+                "PUT", f"{settings.FLUTTERWAVE_BASE_URL}/charges/{id}",
+                "Charges updated successfully.", "Charges update failed.", "Charges update failed",
+                provider_message=True, provider_failure_message=True, on_success=self.mirror_charge,
+                headers=self.flutterwave_headers(), json=payload
+            )
+        finally:
+            # Even an update that errored may have reached Flutterwave
+            await lookups.charges.ainvalidate(id)
+
+
+class AsyncExportView(AsyncFlutterwaveView):
+    """
+    ``ExportView`` with the pages fetched as coroutines.
+    """
+    http_method_names = ["get"]
+    listing = None
+
+    async def get(self, request):
+        url, params = export.listing_request(self.listing, request.GET)
+
+        async def fetch(page):
+            response = await self.client.request(
+                "GET", url, params={**params, "page": page},
+                headers=self.flutterwave_headers(), token_manager=auth_manager
+            )
+            return export.page_of(response)
+
+        try:
+            first = await fetch(1)
+        except ProviderUnavailable as e:
+            return self.unavailable(e)
+        except TRANSPORT_ERRORS + (requests.exceptions.RequestException, ValueError) as e:
+            return JsonResponse(
+                {
+                    "status": False,
+                    "message": f"Export failed: {str(e)}"
+                },
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        response = StreamingHttpResponse(
+            export.astream(fetch, first, settings.FLUTTERWAVE_EXPORT_PREFETCH), content_type=export.CONTENT_TYPE
+        )
+        response["X-Accel-Buffering"] = "no"
+        return response
@@ -0,0 +1,248 @@
+"""
+Local mirror of Flutterwave charges (``flutterwave.models.Charge``).
+
+Charge listings (the dashboard's filtered, paged ``/charges`` queries) are
+answered from indexed local rows once the mirror has loaded; until then
+Flutterwave answers them. Each sync asks ``/charges`` only for charges
+created after a high watermark, the newest charge already held, less
+``FLUTTERWAVE_CHARGE_SYNC_LOOKBACK`` seconds so that recent charges still
+settling are read again. Charges older than that which have not settled
+are fetched one by one, up to ``FLUTTERWAVE_CHARGE_REFRESH_LIMIT`` a sync,
+longest unrefreshed first. Signed webhooks and the charges the gateway
+creates and updates are written through in between, and pending ledger
+rows are settled from what the mirror learns.
+"""
+import datetime
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from core import ledger, metrics
+from core.models import Transaction
+from ..models import Charge
+from .client import client
+from .lookups import SETTLED_CHARGE_STATUSES
+from .mirror import LIST_MAX_SIZE, Mirror, page_reply
+from .services import auth_manager
+
+# Filters the local tables can answer; a listing using any other goes to
+# Flutterwave
+FILTERS = ("status", "reference", "customer_id", "order_id")
+
+
+def timestamp(moment):
+    """
+    ``moment`` as Flutterwave writes ``created_datetime``.
+    """
+    moment = moment.astimezone(datetime.timezone.utc)
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.") + f"{moment.microsecond // 1000:03d}Z"
+
+
+def parse_moment(value):
+    """
+    An aware datetime for an ISO 8601 date or datetime, or None.
+    """
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            return None
+        moment = datetime.datetime.combine(day, datetime.time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment, datetime.timezone.utc)
+    return moment
+
+
+def fetch_page(params):
+    """
+    One page of ``/charges``: ``(charges, page_info)``.
+    """
+    response = client.get(f"{settings.FLUTTERWAVE_BASE_URL}/charges", params=params, token_manager=auth_manager)
+    response.raise_for_status()
+    reply = response.json()
+    return reply.get("data") or [], (reply.get("meta") or {}).get("page_info") or {}
+
+
+def fetch_charge(charge_id):
+    """
+    ``/charges/<id>``, or None if Flutterwave no longer has it.
+    """
+    response = client.get(f"{settings.FLUTTERWAVE_BASE_URL}/charges/{charge_id}", token_manager=auth_manager)
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return response.json().get("data")
+
+
+def list_query(query):
+    """
+    ``ChargeMirror.listing`` arguments for a ``/charges`` query string, or
+    None if the mirror can't answer it (filters it doesn't hold, values it
+    can't parse); Flutterwave is asked instead.
+    """
+    if any(query.get(name) for name in ("virtual_account_id", "payment_method_id")):
+        return None
+    listing = {name: query.get(name) for name in FILTERS if query.get(name)}
+    for name, key in (("from", "start"), ("to", "end")):
+        if query.get(name):
+            listing[key] = parse_moment(query.get(name))
+            if listing[key] is None:
+                return None
+    try:
+        listing["page"] = max(int(query.get("page") or 1), 1)
+        listing["size"] = min(max(int(query.get("size") or 10), 1), LIST_MAX_SIZE)
+    except (TypeError, ValueError):
+        return None
+    return listing
+
+
+class ChargeMirror(Mirror):
+    """
+    The charge mirror, listed and filtered like ``/charges``.
+    """
+
+    name = "flutterwave.charges"
+
+    def __init__(self, fetch, interval, page_size, lookback, fetch_one, refresh_limit):
+        super().__init__(fetch, interval, page_size)
+        self.lookback = lookback
+        self.fetch_one = fetch_one
+        self.refresh_limit = refresh_limit
+        self.listings = metrics.Counter()
+        self.settled = metrics.Counter()
+        self.refreshed = metrics.Counter()
+
+    @staticmethod
+    def _row(charge):
+        created = charge.get("created_datetime")
+        amount = charge.get("amount")
+        return Charge(
+            id=str(charge["id"]),
+            reference=str(charge.get("reference") or "")[:64],
+            status=str(charge.get("status") or "")[:20],
+            customer_id=str(charge.get("customer_id") or "")[:64],
+            order_id=str(charge.get("order_id") or "")[:64],
+            amount=Decimal(str(amount)) if isinstance(amount, (int, float)) else None,
+            currency=str(charge.get("currency") or "")[:3],
+            data=charge,
+            created_datetime=parse_datetime(created) if isinstance(created, str) else None,
+        )
+
+    def upsert_many(self, charges):
+        rows = [self._row(charge) for charge in charges if isinstance(charge, dict) and charge.get("id")]
+        if rows:
+            Charge.objects.bulk_create(
+                rows, update_conflicts=True, unique_fields=["id"],
+                update_fields=[
+                    "reference", "status", "customer_id", "order_id", "amount", "currency",
+                    "data", "created_datetime", "synced_at",
+                ],
+            )
+            self._settle(rows)
+        return len(rows)
+
+    def _settle(self, rows):
+        """
+        Settle the ledger's pending charges that these rows show settled.
+        """
+        outcomes = {}
+        for row in rows:
+            if row.reference and row.status in SETTLED_CHARGE_STATUSES:
+                status = Transaction.Status.COMPLETED if row.status == "succeeded" else Transaction.Status.FAILED
+                outcomes.setdefault((status, row.status), []).append(row.reference)
+        for (status, charge_status), references in outcomes.items():
+            self.settled.incr(ledger.settle(Transaction.Provider.FLUTTERWAVE, status, references, charge_status))
+
+    def sync(self, full=False):
+        """
+        Read ``/charges`` created since the watermark (everything, with
+        ``full``) into the mirror, then move the watermark to the newest
+        charge read and ``refresh`` unsettled charges from before it.
+        Returns the number of charges read.
+        """
+        state = self.state()
+        watermark = None if full or not state.cursor else parse_datetime(state.cursor)
+        params = {"size": self.page_size}
+        if watermark is not None:
+            params["from"] = timestamp(watermark - datetime.timedelta(seconds=self.lookback))
+
+        newest, read, page = watermark, 0, 1
+        while True:
+            charges, page_info = self.fetch({**params, "page": page})
+            read += self.upsert_many(charges)
+            for charge in charges:
+                created = parse_datetime(str(charge.get("created_datetime") or ""))
+                if created is not None and (newest is None or created > newest):
+                    newest = created
+            if not charges or page >= int(page_info.get("total_pages", page)):
+                break
+            page += 1
+
+        if newest is not None:
+            state.cursor = newest.isoformat()
+        if watermark is not None:
+            self.refresh(watermark - datetime.timedelta(seconds=self.lookback))
+        state.synced_at = timezone.now()
+        state.save()
+        self.syncs.incr()
+        self.synced.incr(read)
+        return read
+
+    def refresh(self, before):
+        """
+        Fetch again the unsettled charges created before ``before``, which
+        the listing sync no longer reads, up to ``refresh_limit`` of them,
+        longest unrefreshed first.
+        """
+        stale = (
+            Charge.objects.exclude(status__in=SETTLED_CHARGE_STATUSES)
+            .filter(created_datetime__lt=before)
+            .order_by("synced_at")
+            .values_list("id", flat=True)[:self.refresh_limit]
+        )
+        charges = [charge for charge in map(self.fetch_one, list(stale)) if charge is not None]
+        self.refreshed.incr(self.upsert_many(charges))
+
+    def listing(self, status=None, reference=None, customer_id=None, order_id=None,
+                start=None, end=None, page=1, size=10):
+        """
+        A page of mirrored charges matching the filters, created between
+        ``start`` and ``end`` inclusive, in Flutterwave's listing order
+        (oldest first) and the shape of its ``/charges`` reply. None while
+        the mirror is still loading, in the background.
+        """
+        if not self.warm():
+            return None
+        self.listings.incr()
+        filters = {"status": status, "reference": reference, "customer_id": customer_id, "order_id": order_id}
+        charges = Charge.objects.filter(**{name: value for name, value in filters.items() if value})
+        if start is not None:
+            charges = charges.filter(created_datetime__gte=start)
+        if end is not None:
+            charges = charges.filter(created_datetime__lte=end)
+
+        offset = (page - 1) * size
+        matches = list(charges.order_by("created_datetime", "id").values_list("data", flat=True)[offset:offset + size])
+        # A short page already says how many there are
+        total = offset + len(matches) if matches and len(matches) < size else charges.count()
+        return page_reply(matches, total, page, size, "Charges fetched")
+
+    async def alisting(self, **kwargs):
+        return await sync_to_async(self.listing)(**kwargs)
+
+    def stats(self):
+        return {
+            **super().stats(),
+            "listings": self.listings.value,
+            "ledger_settled": self.settled.value,
+            "refreshed": self.refreshed.value,
+        }
+
+
+charge_mirror = ChargeMirror(
+    fetch_page, settings.FLUTTERWAVE_CHARGE_SYNC_INTERVAL, settings.FLUTTERWAVE_CHARGE_SYNC_PAGE_SIZE,
+    settings.FLUTTERWAVE_CHARGE_SYNC_LOOKBACK, fetch_charge, settings.FLUTTERWAVE_CHARGE_REFRESH_LIMIT,
+)
@@ -0,0 +1,232 @@
+"""
+Local index of Flutterwave customers (``flutterwave.models.Customer``).
+
+Searches by email or phone, exact or by prefix, are answered from indexed
+local rows instead of ``/customers/search``, and creating a customer whose
+email the index already holds is refused without calling Flutterwave.
+
+The index is filled by paging through ``/customers``: all of it the first
+time, then, every ``FLUTTERWAVE_CUSTOMER_SYNC_INTERVAL`` seconds, from the
+page holding the last customer seen. Flutterwave can't list customers by
+when they changed, so each sync also re-reads the next
+``FLUTTERWAVE_CUSTOMER_REFRESH_PAGES`` older pages in turn; a change made
+outside the gateway shows up once its page comes round. Customers the
+gateway creates or updates are written through as Flutterwave returns
+them.
+"""
+import re
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core import metrics
+from ..models import Customer
+from .client import client
+from .mirror import FETCH_ERRORS, LIST_MAX_SIZE, Mirror, MirrorLoading, page_reply
+from .services import auth_manager
+
+# Sorts after any character, so [prefix, prefix + END) is every string
+# starting with prefix
+_END = "\U0010ffff"
+
+
+def email_key(email):
+    return str(email or "").strip().lower()
+
+
+def phone_key(phone):
+    """
+    Digits of a phone number, country code first. ``phone`` is Flutterwave's
+    ``{"country_code", "number"}`` or a string.
+    """
+    if isinstance(phone, dict):
+        phone = f"{phone.get('country_code') or ''}{phone.get('number') or ''}"
+    return re.sub(r"\D", "", str(phone or ""))
+
+
+def fetch_page(page, size):
+    """
+    One page of ``/customers``: ``(customers, page_info)``.
+    """
+    response = client.get(
+        f"{settings.FLUTTERWAVE_BASE_URL}/customers",
+        params={"page": page, "size": size}, token_manager=auth_manager
+    )
+    response.raise_for_status()
+    reply = response.json()
+    return reply.get("data") or [], (reply.get("meta") or {}).get("page_info") or {}
+
+
+class CustomerIndex(Mirror):
+    """
+    The customer mirror, searchable by email and phone.
+    """
+
+    name = "flutterwave.customers"
+
+    def __init__(self, fetch, interval, page_size, refresh_pages):
+        super().__init__(fetch, interval, page_size)
+        self.refresh_pages = refresh_pages
+        self.searches = metrics.Counter()
+        self.duplicates = metrics.Counter()
+        self.refreshed = metrics.Counter()
+
+    @staticmethod
+    def _row(customer):
+        created = customer.get("created_datetime")
+        return Customer(
+            id=str(customer["id"]),
+            email=email_key(customer.get("email")),
+            phone=phone_key(customer.get("phone")),
+            data=customer,
+            created_datetime=parse_datetime(created) if isinstance(created, str) else None,
+        )
+
+    def upsert_many(self, customers):
+        rows = [self._row(customer) for customer in customers if isinstance(customer, dict) and customer.get("id")]
+        if rows:
+            Customer.objects.bulk_create(
+                rows, update_conflicts=True, unique_fields=["id"],
+                update_fields=["email", "phone", "data", "created_datetime", "synced_at"],
+            )
+        return len(rows)
+
+    def sync(self, full=False):
+        """
+        Page through ``/customers`` into the index, from the start with
+        ``full``, else from the page holding the last customer seen.
+        Flutterwave lists customers oldest first, so new ones are always on
+        the pages past that. An incremental sync then re-reads the next
+        ``refresh_pages`` of the pages before it, wrapping round. Returns
+        the number of customers read.
+
+        The cursor is ``"<customers seen>:<last page refreshed>"``.
+        """
+        state = self.state()
+        seen, _, refreshed = (state.cursor or "0").partition(":")
+        seen, refreshed = (0, 0) if full else (int(seen), int(refreshed or 0))
+        first = page = seen // self.page_size + 1
+        read = 0
+        while True:
+            customers, page_info = self.fetch(page, self.page_size)
+            read += self.upsert_many(customers)
+            total = int(page_info.get("total", seen + read))
+            if not customers or page >= int(page_info.get("total_pages", page)):
+                break
+            page += 1
+
+        if total < seen:
+            # Customers were removed, so the pages have shifted
+            return self.sync(full=True)
+
+        older = first - 1
+        for _ in range(min(self.refresh_pages, older)):
+            refreshed = refreshed % older + 1
+            customers, _ = self.fetch(refreshed, self.page_size)
+            self.refreshed.incr(self.upsert_many(customers))
+
+        state.cursor = f"{total}:{refreshed}"
+        state.synced_at = timezone.now()
+        state.save()
+        self.syncs.incr()
+        self.synced.incr(read)
+        return read
+
+    def search(self, email=None, phone=None, prefix=False, page=1, size=10):
+        """
+        Customers matching ``email`` and/or ``phone`` (exactly, or starting
+        with them with ``prefix``), newest first, in the shape of
+        Flutterwave's ``/customers/search`` reply. None while the index is
+        still loading, in the background.
+        """
+        if not self.warm():
+            return None
+        self.searches.incr()
+        customers = Customer.objects.all()
+        for field, value, key in (("email", email, email_key), ("phone", phone, phone_key)):
+            if value in (None, ""):
+                continue
+            value = key(value)
+            if not value:
+                # Nothing left to match on; dropping the filter would match everyone
+                return page_reply([], 0, page, size, "Customers fetched")
+            if prefix:
+                customers = customers.filter(**{f"{field}__gte": value, f"{field}__lt": value + _END})
+            else:
+                customers = customers.filter(**{field: value})
+
+        start = (page - 1) * size
+        matches = [customer.data for customer in customers.order_by("-created_datetime", "id")[start:start + size]]
+        # A short page already says how many there are
+        total = start + len(matches) if matches and len(matches) < size else customers.count()
+        return page_reply(matches, total, page, size, "Customers fetched")
+
+    def existing(self, email):
+        """
+        The indexed customer with ``email``, or None. Also None while the
+        index is loading (in the background, not in the caller's request);
+        Flutterwave then judges the create itself.
+        """
+        if not email or not self.warm():
+            return None
+        customer = Customer.objects.filter(email=email_key(email)).first()
+        if customer is None:
+            return None
+        self.duplicates.incr()
+        return customer.data
+
+    async def asearch(self, **kwargs):
+        return await sync_to_async(self.search)(**kwargs)
+
+    async def aexisting(self, email):
+        return await sync_to_async(self.existing)(email)
+
+    def stats(self):
+        return {
+            **super().stats(),
+            "searches": self.searches.value,
+            "duplicates_rejected": self.duplicates.value,
+            "refreshed": self.refreshed.value,
+        }
+
+
+customer_index = CustomerIndex(
+    fetch_page, settings.FLUTTERWAVE_CUSTOMER_SYNC_INTERVAL, settings.FLUTTERWAVE_CUSTOMER_SYNC_PAGE_SIZE,
+    settings.FLUTTERWAVE_CUSTOMER_REFRESH_PAGES,
+)
+
+
+def search_query(data, query):
+    """
+    ``CustomerIndex.search`` arguments for a search request: ``email``,
+    ``phone`` and ``prefix`` from the body, ``page`` and ``size`` from the
+    query string. Returns ``(kwargs, None)`` or ``(None, error)``.
+    """
+    if not isinstance(data, dict):
+        return None, "Request body must be a JSON object."
+    email, phone = data.get("email"), data.get("phone")
+    if not email and not phone:
+        return None, "Email or phone is required for search."
+    if email and not email_key(email):
+        return None, "Email must not be blank."
+    if phone and not phone_key(phone):
+        return None, "Phone must contain digits."
+    try:
+        page = max(int(query.get("page", 1)), 1)
+        size = min(max(int(query.get("size", 10)), 1), LIST_MAX_SIZE)
+    except (TypeError, ValueError):
+        return None, "page and size must be integers."
+    return {"email": email, "phone": phone, "prefix": bool(data.get("prefix")), "page": page, "size": size}, None
+
+
+def remote_search(query):
+    """
+    ``(params, json)`` asking Flutterwave's ``/customers/search`` for a
+    ``search_query`` while the index loads. It only matches one email
+    exactly, so anything else raises ``MirrorLoading`` (a 503).
+    """
+    if query["phone"] or query["prefix"]:
+        raise MirrorLoading("The customer index")
+    return {"page": query["page"], "size": query["size"]}, {"email": query["email"]}
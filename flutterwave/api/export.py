@@ -0,0 +1,176 @@
+"""
+Streaming NDJSON exports of whole Flutterwave listings (``/customers``,
+``/charges``).
+
+The first page is fetched before the response starts, so a failure there
+is an ordinary error response. After it, ``FLUTTERWAVE_EXPORT_PREFETCH``
+pages are kept in flight ahead of the one being written, and each item
+goes out as one JSON line as soon as its page arrives. Memory holds at most
+that many pages, and an export takes about pages / prefetch round trips. A
+failure mid-stream can no longer change the status; it ends the stream
+with an ``{"error": ...}`` line instead.
+
+Prefetches of all exports share ``FLUTTERWAVE_EXPORT_WORKERS`` threads (or
+as many slots per event loop), so concurrent exports queue for them rather
+than filling Flutterwave's bulkhead and having interactive calls refused.
+"""
+import asyncio
+import collections
+import json
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from core import metrics
+from .client import client
+from .mirror import LIST_MAX_SIZE
+from .payloads import charge_list_params
+from .services import auth_manager
+
+CONTENT_TYPE = "application/x-ndjson"
+
+
+class ExportStats:
+
+    def __init__(self):
+        self.exports = metrics.Counter()
+        self.pages = metrics.Counter()
+        self.items = metrics.Counter()
+        self.failures = metrics.Counter()
+        metrics.register("export.flutterwave", self.stats)
+
+    def stats(self):
+        return {
+            "exports": self.exports.value,
+            "pages": self.pages.value,
+            "items": self.items.value,
+            "failures": self.failures.value,
+        }
+
+
+counters = ExportStats()
+
+_pool = ThreadPoolExecutor(settings.FLUTTERWAVE_EXPORT_WORKERS, thread_name_prefix="flutterwave-export")
+_async_slots = weakref.WeakKeyDictionary()
+
+
+def page_of(response):
+    """
+    ``(items, page_info)`` of a listing reply (``requests.Response`` or
+    ``core.aio.AsyncResponse``). Raises ValueError for an error reply.
+    """
+    if not 200 <= response.status_code < 300:
+        raise ValueError(f"Flutterwave answered {response.status_code}")
+    reply = response.json()
+    return reply.get("data") or [], (reply.get("meta") or {}).get("page_info") or {}
+
+
+def listing_request(listing, query):
+    """
+    URL and query parameters (less the page) for exporting ``listing``
+    ("customers" or "charges"); charges keep the caller's filters.
+    """
+    params = {"size": LIST_MAX_SIZE}
+    if listing == "charges":
+        filters = charge_list_params(query)
+        params.update({name: value for name, value in filters.items() if value and name not in ("page", "size")})
+    return f"{settings.FLUTTERWAVE_BASE_URL}/{listing}", params
+
+
+def fetcher(url, params):
+    """
+    ``fetch(page)`` for ``stream``.
+    """
+    def fetch(page):
+        return page_of(client.get(url, params={**params, "page": page}, token_manager=auth_manager))
+    return fetch
+
+
+def _lines(items):
+    counters.pages.incr()
+    counters.items.incr(len(items))
+    return b"".join(json.dumps(item, separators=(",", ":")).encode() + b"\n" for item in items)
+
+
+def _failed(page, e):
+    counters.failures.incr()
+    return json.dumps({"error": f"Export failed at page {page}: {str(e)}"}).encode() + b"\n"
+
+
+def _total_pages(page_info):
+    try:
+        return int(page_info.get("total_pages") or 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+def stream(fetch, first, depth):
+    """
+    NDJSON chunks, a page at a time, for a listing whose first page
+    ``(items, page_info)`` is ``first``; ``fetch(page)`` returns the others,
+    ``depth`` of them running ahead on the export threads.
+    """
+    counters.exports.incr()
+    items, page_info = first
+    yield _lines(items)
+
+    depth = max(depth, 1)
+    total = _total_pages(page_info)
+    pending = collections.deque()
+    page = 2
+    try:
+        while page <= total or pending:
+            while page <= total and len(pending) < depth:
+                pending.append((page, _pool.submit(fetch, page)))
+                page += 1
+            number, future = pending.popleft()
+            try:
+                items, _ = future.result()
+            except Exception as e:
+                yield _failed(number, e)
+                return
+            yield _lines(items)
+    finally:
+        # Also reached when the client goes away mid-stream
+        for _, future in pending:
+            future.cancel()
+
+
+async def _limited(fetch, page):
+    loop = asyncio.get_running_loop()
+    slots = _async_slots.get(loop)
+    if slots is None:
+        slots = _async_slots[loop] = asyncio.Semaphore(settings.FLUTTERWAVE_EXPORT_WORKERS)
+    async with slots:
+        return await fetch(page)
+
+
+async def astream(fetch, first, depth):
+    """
+    ``stream`` for coroutines: ``fetch(page)`` is awaited, ``depth`` pages
+    running ahead as tasks.
+    """
+    counters.exports.incr()
+    items, page_info = first
+    yield _lines(items)
+
+    depth = max(depth, 1)
+    total = _total_pages(page_info)
+    pending = collections.deque()
+    page = 2
+    try:
+        while page <= total or pending:
+            while page <= total and len(pending) < depth:
+                pending.append((page, asyncio.ensure_future(_limited(fetch, page))))
+                page += 1
+            number, task = pending.popleft()
+            try:
+                items, _ = await task
+            except Exception as e:
+                yield _failed(number, e)
+                return
+            yield _lines(items)
+    finally:
+        for _, task in pending:
+            task.cancel()
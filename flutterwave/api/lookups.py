@@ -0,0 +1,64 @@
+"""
+Read-through cache of Flutterwave customer and charge lookups by id.
+
+Reconciliation asks for the same ids over and over, so a fetched customer is
+kept for ``FLUTTERWAVE_CUSTOMER_CACHE_TTL`` and a charge for as long as its
+status allows: a settled charge no longer changes and is kept for
+``FLUTTERWAVE_CHARGE_CACHE_TTL``, a pending one only for
+``FLUTTERWAVE_PENDING_CHARGE_CACHE_TTL``. Updates through the gateway and
+webhook events drop the entry they touch.
+"""
+import base64
+import hashlib
+import hmac
+
+from django.conf import settings
+
+from core.coalesce import Coalescer
+
+# Charge states Flutterwave never moves a charge out of
+SETTLED_CHARGE_STATUSES = {"succeeded", "failed", "voided", "cancelled", "timeout"}
+
+
+def charge_ttl(reply):
+    try:
+        charge = reply.json().get("data") or {}
+    except (ValueError, AttributeError):
+        return 0
+    if charge.get("status") in SETTLED_CHARGE_STATUSES:
+        return settings.FLUTTERWAVE_CHARGE_CACHE_TTL
+    return settings.FLUTTERWAVE_PENDING_CHARGE_CACHE_TTL
+
+
+customers = Coalescer("flutterwave.customer", ttl=settings.FLUTTERWAVE_CUSTOMER_CACHE_TTL)
+charges = Coalescer("flutterwave.charge", ttl=charge_ttl)
+
+
+def signature_valid(body, signature):
+    """
+    Whether ``signature`` (the ``flutterwave-signature`` header) is the
+    base64 HMAC-SHA256 of ``body`` under ``FLUTTERWAVE_SECRET_HASH``.
+    Never true while no secret hash is configured.
+    """
+    secret = settings.FLUTTERWAVE_SECRET_HASH
+    if not secret:
+        return False
+    expected = base64.b64encode(hmac.new(secret.encode(), body, hashlib.sha256).digest()).decode()
+    return hmac.compare_digest(expected, signature or "")
+
+
+def invalidate_for(event):
+    """
+    Drop the cached lookup a webhook ``event`` makes stale: the charge of a
+    ``charge.*`` event or the customer of a ``customer.*`` one. Returns the
+    ``(kind, id)`` dropped, or None.
+    """
+    data = event.get("data") if isinstance(event, dict) else None
+    if not isinstance(data, dict) or not data.get("id"):
+        return None
+    kind = str(event.get("type", "")).split(".", 1)[0]
+    lookups = {"charge": charges, "customer": customers}.get(kind)
+    if lookups is None:
+        return None
+    lookups.invalidate(str(data["id"]))
+    return kind, str(data["id"])
@@ -0,0 +1,180 @@
+"""
+Local mirrors of Flutterwave listings, answered from indexed tables instead
+of paging through the API. See ``customers`` and ``charges``.
+"""
+import threading
+import time
+
+import requests
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import close_old_connections
+
+from core import metrics
+from core.circuit import ProviderUnavailable
+from ..models import SyncState
+
+# What a failed sync raises
+FETCH_ERRORS = (requests.exceptions.RequestException, ProviderUnavailable, ValueError, KeyError, TypeError)
+# Largest page a local listing returns, as Flutterwave's own
+LIST_MAX_SIZE = 50
+
+
+class MirrorLoading(ProviderUnavailable):
+    """
+    A query only a mirror can answer came in while it was still loading.
+    """
+
+    def __init__(self, name):
+        super().__init__(f"{name} is still loading, retry shortly", 5)
+
+
+def page_reply(items, total, page, size, message):
+    """
+    A page of local rows in the shape of a Flutterwave listing reply.
+    """
+    return {
+        "status": "success",
+        "message": message,
+        "data": items,
+        "meta": {
+            "page_info": {
+                "total": total,
+                "current_page": page,
+                "total_pages": (total + size - 1) // size,
+            }
+        },
+    }
+
+
+class Mirror:
+    """
+    A Flutterwave listing copied into local rows, with its sync.
+
+    The first lookup in a process loads the whole listing if the database
+    has never been synced, then starts a daemon thread that runs an
+    incremental ``sync`` every ``interval`` seconds (never, with 0).
+    Workers take turns through a cache lock, so one sync runs per interval
+    whatever the number of processes. Subclasses implement ``sync`` and
+    ``upsert_many``, and keep their position in a ``SyncState`` row.
+    """
+
+    name = None
+    # Back-off between failed background syncs
+    retry_delay = 30
+
+    def __init__(self, fetch, interval, page_size):
+        self.fetch = fetch
+        self.interval = interval
+        self.page_size = page_size
+        self._ready = False
+        self._lock = threading.Lock()
+        self._syncer = None
+        # Guards _warming only; _lock is held through a first load
+        self._warm_lock = threading.Lock()
+        self._warming = False
+
+        self.syncs = metrics.Counter()
+        self.sync_failures = metrics.Counter()
+        self.synced = metrics.Counter()
+        self.written = metrics.Counter()
+        metrics.register(f"mirror.{self.name}", self.stats)
+
+    def sync(self, full=False):
+        """
+        Copy what changed upstream since the last sync (everything, with
+        ``full``). Returns the number of rows read.
+        """
+        raise NotImplementedError
+
+    def upsert_many(self, items):
+        """
+        Insert or refresh rows for ``items`` as Flutterwave returned them.
+        Returns how many were written.
+        """
+        raise NotImplementedError
+
+    def upsert(self, item):
+        """
+        Write through one item Flutterwave just returned.
+        """
+        if isinstance(item, dict):
+            self.written.incr(self.upsert_many([item]))
+
+    async def aupsert(self, item):
+        await sync_to_async(self.upsert)(item)
+
+    def state(self):
+        return SyncState.objects.get_or_create(name=self.name)[0]
+
+    def _sync_loop(self):
+        delay = self.interval
+        while True:
+            time.sleep(delay)
+            close_old_connections()
+            try:
+                if cache.add(f"gateway:sync:{self.name}", 1, self.interval):
+                    self.sync()
+                delay = self.interval
+            except Exception:
+                self.sync_failures.incr()
+                delay = self.retry_delay
+            finally:
+                close_old_connections()
+
+    def ensure_ready(self):
+        """
+        Load the mirror if it has never been synced, and start the
+        background sync. Raises one of ``FETCH_ERRORS`` if the first load
+        fails.
+        """
+        if self._ready:
+            return
+        with self._lock:
+            if self._ready:
+                return
+            if not SyncState.objects.filter(name=self.name, synced_at__isnull=False).exists():
+                try:
+                    self.sync(full=True)
+                except FETCH_ERRORS:
+                    self.sync_failures.incr()
+                    raise
+            self._ready = True
+            if self.interval and self._syncer is None:
+                self._syncer = threading.Thread(
+                    target=self._sync_loop, name=f"mirror-sync-{self.name}", daemon=True
+                )
+                self._syncer.start()
+
+    def warm(self):
+        """
+        Start ``ensure_ready`` on a thread of its own, for callers that
+        can't wait for a first load. Returns whether the mirror is ready.
+        """
+        if self._ready:
+            return True
+        with self._warm_lock:
+            if self._warming:
+                return False
+            self._warming = True
+        threading.Thread(target=self._warm, name=f"mirror-warm-{self.name}", daemon=True).start()
+        return False
+
+    def _warm(self):
+        try:
+            self.ensure_ready()
+        except Exception:
+            # Counted by ensure_ready; the next warm() tries again
+            pass
+        finally:
+            with self._warm_lock:
+                self._warming = False
+            close_old_connections()
+
+    def stats(self):
+        return {
+            "syncs": self.syncs.value,
+            "sync_failures": self.sync_failures.value,
+            "synced": self.synced.value,
+            "written_through": self.written.value,
+        }
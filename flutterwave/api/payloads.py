@@ -0,0 +1,127 @@
+def customer_payload(data):
+    """
+    Customer creation request.
+    """
+    payload = {
+        "address": data.get("address"),
+        "email": data.get("email"),
+        "name": data.get("name"),
+        "phone": data.get("phone")
+    }
+    return payload
+
+
+def customer_update_payload(data):
+    """
+    Customer update request.
+    """
+    payload = {
+        "name": data.get("name"),
+        "email": data.get("email"),
+        "phone": data.get("phone"),
+        "address": data.get("address")
+    }
+    return payload
+
+
+def charge_payload(data):
+    """
+    Charge creation request.
+    """
+    payload = {
+        "amount": data.get("amount"),
+        "currency": data.get("currency"),
+        "reference": data.get("reference"),
+        "customer_id": data.get("customer_id"),
+        "description": data.get("description"),
+        "meta": data.get("meta", {}),
+        "redirect_url": data.get("redirect_url"),
+        "recurring": data.get("recurring", False),
+        "order_id": data.get("order_id"),
+        "billing_details": {
+            "email": data.get("billing_details", {}).get("email"),
+            "name": {
+                "first": data.get("billing_details", {}).get("name", {}).get("first"),
+                "middle": data.get("billing_details", {}).get("name", {}).get("middle"),
+                "last": data.get("billing_details", {}).get("name", {}).get("last"),
+            },
+            "phone": {
+                "country_code": data.get("billing_details", {}).get("phone", {}).get("country_code"),
+                "number": data.get("billing_details", {}).get("phone", {}).get("number"),
+            }
+        },
+        "payment_method_details": {
+            "type": data.get("payment_method_details", {}).get("type"),
+            "card": data.get("payment_method_details", {}).get("card"),
+            "id": data.get("payment_method_details", {}).get("id"),
+            "meta": data.get("payment_method_details", {}).get("meta", {}),
+            "device_fingerprint": data.get("payment_method_details", {}).get("device_fingerprint"),
+            "client_ip": data.get("payment_method_details", {}).get("client_ip")
+        }
+    }
+    return payload
+
+
+def charge_update_payload(data, id):
+    """
+    Charge update request.
+    """
+    payload = {
+        "amount": data.get("amount"),
+        "currency": data.get("currency"),
+        "reference": data.get("reference"),
+        "customer_id": id,  # from URL
+        "meta": data.get("meta", {}),
+        "payment_method_id": data.get("payment_method_id"),
+        "redirect_url": data.get("redirect_url"),
+        "authorization": data.get("authorization"),
+        "recurring": data.get("recurring", False),
+        "order_id": data.get("order_id")
+    }
+    return payload
+
+
+CHARGE_REQUIRED_FIELDS = ["amount", "currency", "reference", "customer_id"]
+CHARGE_UPDATE_REQUIRED_FIELDS = ["amount", "currency", "reference", "customer_id", "payment_method_id"]
+
+
+def charge_payload_error(payload, required_fields):
+    """
+    Return a validation message for a charge payload, or None if it is valid.
+    """
+    # --- Validate required fields ---
+    missing = [f for f in required_fields if not payload.get(f)]
+    if missing:
+        return f"Missing required fields: {', '.join(missing)}"
+
+    # --- Validate amount ---
+    try:
+        amount = float(payload["amount"])
+        if amount < 0.01:
+            return "Amount must be ≥ 0.01"
+    except (ValueError, TypeError):
+        return "Invalid amount value."
+
+    return None
+
+
+def customer_list_params(query):
+    return {
+        "page": query.get("page"),
+        "size": query.get("size")
+    }
+
+
+def charge_list_params(query):
+    return {
+        "status": query.get("status"),
+        "reference": query.get("reference"),
+        "to": query.get("to"),
+        "from": query.get("from"),
+        "customer_id": query.get("customer_id"),
+        "virtual_account_id": query.get("virtual_account_id"),
+        "payment_method_id": query.get("payment_method_id"),
+        "order_id": query.get("order_id"),
+        "page": query.get("page"),
+        "size": query.get("size")
+    }
@@ -3,10 +3,14 @@ from .views import *
 
 urlpatterns = [
    path("customers/", CustomerCreateListView.as_view(), name="customers"),
+   path("customers/export/", ExportView.as_view(listing="customers"), name="export-customers"),
    path("customer/<str:id>/", CustomerDetailsView.as_view(), name="customer"),
    path("search/", CustomerSearchView.as_view(), name="search-customer"),
 
    path("charges/", ChargesCreateListView.as_view(), name="charges"),
+   path("charges/export/", ExportView.as_view(listing="charges"), name="export-charges"),
    path("charges/<str:id>/", ChargesDetailsView.as_view(), name="charge"),
+
+   path("webhook/", WebhookView.as_view(), name="webhook"),
    
 ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-17 11:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flutterwave', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Charge',
+            fields=[
+                ('id', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('reference', models.CharField(blank=True, max_length=64)),
+                ('status', models.CharField(blank=True, max_length=20)),
+                ('customer_id', models.CharField(blank=True, max_length=64)),
+                ('order_id', models.CharField(blank=True, max_length=64)),
+                ('amount', models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True)),
+                ('currency', models.CharField(blank=True, max_length=3)),
+                ('data', models.JSONField(default=dict)),
+                ('created_datetime', models.DateTimeField(blank=True, null=True)),
+                ('synced_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_datetime', 'id'], name='fw_charge_created_idx'), models.Index(fields=['status', 'created_datetime', 'id'], name='fw_charge_status_created_idx'), models.Index(fields=['customer_id', 'created_datetime', 'id'], name='fw_charge_customer_created_idx'), models.Index(fields=['reference'], name='fw_charge_reference_idx'), models.Index(fields=['order_id'], name='fw_charge_order_idx')],
+            },
+        ),
+    ]
@@ -1,3 +1,76 @@
 from django.db import models
 
-# Create your models here.
+
+class Customer(models.Model):
+    """
+    Local copy of a Flutterwave customer, kept by ``flutterwave.api.customers``
+    so customers can be found by email or phone without calling Flutterwave.
+    """
+
+    # Flutterwave's customer id (cus_...)
+    id = models.CharField(max_length=64, primary_key=True)
+    # Lowercased, so exact and prefix lookups are plain index range scans
+    email = models.CharField(max_length=254, blank=True)
+    # Digits only, country code first
+    phone = models.CharField(max_length=32, blank=True)
+    # The customer as Flutterwave last returned it
+    data = models.JSONField(default=dict)
+    created_datetime = models.DateTimeField(null=True, blank=True)
+    synced_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["email"], name="fw_customer_email_idx"),
+            models.Index(fields=["phone"], name="fw_customer_phone_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.id} ({self.email})"
+
+
+class Charge(models.Model):
+    """
+    Local copy of a Flutterwave charge, kept by ``flutterwave.api.charges``
+    so charge listings can be filtered without paging through Flutterwave.
+    """
+
+    # Flutterwave's charge id (chg_...)
+    id = models.CharField(max_length=64, primary_key=True)
+    reference = models.CharField(max_length=64, blank=True)
+    status = models.CharField(max_length=20, blank=True)
+    customer_id = models.CharField(max_length=64, blank=True)
+    order_id = models.CharField(max_length=64, blank=True)
+    amount = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+    currency = models.CharField(max_length=3, blank=True)
+    # The charge as Flutterwave last returned it
+    data = models.JSONField(default=dict)
+    created_datetime = models.DateTimeField(null=True, blank=True)
+    synced_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Listings filter on these and page in (created_datetime, id) order
+            models.Index(fields=["created_datetime", "id"], name="fw_charge_created_idx"),
+            models.Index(fields=["status", "created_datetime", "id"], name="fw_charge_status_created_idx"),
+            models.Index(fields=["customer_id", "created_datetime", "id"], name="fw_charge_customer_created_idx"),
+            models.Index(fields=["reference"], name="fw_charge_reference_idx"),
+            models.Index(fields=["order_id"], name="fw_charge_order_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.id} ({self.status})"
+
+
+class SyncState(models.Model):
+    """
+    How far a local mirror of a Flutterwave listing has got.
+    """
+
+    name = models.CharField(max_length=64, primary_key=True)
+    # Mirror-specific position to resume from
+    cursor = models.CharField(max_length=64, blank=True)
+    # Last time a sync ran to the end of the listing
+    synced_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} at {self.cursor or 'start'}"
@@ -12,5 +12,13 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'intergrations.settings')
+# Serve provider endpoints from their native async views
+os.environ.setdefault('ROOT_URLCONF', 'intergrations.asgi_urls')
 
 application = get_asgi_application()
+
+# Replay callbacks spooled by workers that exited, without waiting for the
+# first callback to reach this one
+from core.ledger import callbacks
+
+callbacks.start()
@@ -0,0 +1,18 @@
+"""
+URL configuration used under ASGI (see asgi.py).
+
+Same routes as ``intergrations.urls``, but provider endpoints resolve to
+their native async views so a worker can keep many provider round trips
+in flight on one event loop.
+"""
+from django.contrib import admin
+from django.urls import path, include
+
+urlpatterns = [
+    path('admin/', admin.site.urls),
+    path('flutterwave/v1/', include('flutterwave.api.async_urls')),
+    path('mpesa/v1/', include('mpesa.api.async_urls')),
+    path('sasapay/v1/', include('sasapay.api.async_urls')),
+    path('sasapay-tz/v1/', include('sasapay_tz.api.async_urls')),
+    path('core/v1/', include('core.api.urls'))
+]
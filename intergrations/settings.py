@@ -40,6 +40,7 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
 
     'rest_framework',
+    'core',
     'flutterwave',
     'mpesa',
     'sasapay',
@@ -54,9 +55,10 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.IdempotencyMiddleware',
 ]
 
-ROOT_URLCONF = 'intergrations.urls'
+ROOT_URLCONF = config('ROOT_URLCONF', default='intergrations.urls')
 
 TEMPLATES = [
     {
@@ -82,11 +84,96 @@ WSGI_APPLICATION = 'intergrations.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': config('DATABASE_NAME', default=str(BASE_DIR / 'db.sqlite3')),
+        # Every worker writes ledger rows; wait for the write lock instead of
+        # failing with "database is locked"
+        'OPTIONS': {'timeout': 20},
     }
 }
 
 
+# Cache shared by all workers (tokens, leases). The database backend needs
+# `python manage.py createcachetable`; point CACHE_BACKEND at Redis or
+# Memcached for multi-node deployments that do not share a database.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': config('CACHE_LOCATION', default='gateway_cache'),
+    }
+}
+
+
+# Provider callbacks are spooled here and acknowledged before they are
+# applied to the ledger. Use local disk that survives restarts.
+CALLBACK_SPOOL_DIR = config('CALLBACK_SPOOL_DIR', default=str(BASE_DIR / 'spool' / 'callbacks'))
+CALLBACK_SPOOL_FSYNC = config('CALLBACK_SPOOL_FSYNC', default=True, cast=bool)
+
+# SasaPay channel codes are refreshed this often (seconds) and snapshotted
+# here, so a fresh worker can validate channel codes without calling SasaPay
+SASAPAY_CHANNEL_CODES_TTL = config('SASAPAY_CHANNEL_CODES_TTL', default=60 * 60, cast=int)
+SASAPAY_CHANNEL_CODES_SNAPSHOT = config(
+    'SASAPAY_CHANNEL_CODES_SNAPSHOT', default=str(BASE_DIR / 'spool' / 'sasapay-channel-codes.json')
+)
+
+
+# Bulk payouts: provider calls in flight per batch, and the most a request
+# may ask for with ?concurrency=
+PAYOUT_CONCURRENCY = config('PAYOUT_CONCURRENCY', default=8, cast=int)
+PAYOUT_MAX_CONCURRENCY = config('PAYOUT_MAX_CONCURRENCY', default=32, cast=int)
+# `manage.py resume_payouts` takes over PROCESSING batches none of whose
+# rows has moved for this many seconds, as their worker is taken to be dead
+PAYOUT_RESUME_AFTER = config('PAYOUT_RESUME_AFTER', default=10 * 60, cast=int)
+
+
+# Payment-initiating routes answered once per idempotency key (see
+# core/middleware.py), with the body field that names the payment. Requests
+# without an Idempotency-Key header or that field are keyed by their body.
+IDEMPOTENT_ROUTES = {
+    '/mpesa/v1/stk-push/': None,
+    '/mpesa/v1/b2c/': 'OriginatorConversationID',
+    '/sasapay/v1/c2bpayment/': None,
+    '/sasapay/v1/c2b-mobile/': None,
+    '/sasapay/v1/b2cpayment/': 'MerchantTransactionReference',
+    '/sasapay/v1/b2bpayment/': 'MerchantTransactionReference',
+    '/sasapay/v1/checkout/': 'Reference',
+    '/sasapay/v1/remittance/': 'MerchantTransactionReference',
+    '/sasapay-tz/v1/c2b-tz/': None,
+    '/sasapay-tz/v1/ifm/': None,
+    '/sasapay-tz/v1/b2c-tz/': 'MerchantTransactionReference',
+    '/sasapay-tz/v1/b2b-tz/': 'MerchantTransactionReference',
+    '/flutterwave/v1/customers/': 'email',
+    '/flutterwave/v1/charges/': 'reference',
+    # Payout uploads are streamed, so they are keyed by the header alone,
+    # which the view requires, and the body is never read here
+    '/mpesa/v1/b2c/batch/': 'Idempotency-Key',
+    '/sasapay/v1/b2cpayment/batch/': 'Idempotency-Key',
+    '/sasapay-tz/v1/b2c-tz/batch/': 'Idempotency-Key',
+}
+# How long a completed request is replayed for repeats with the same
+# idempotency key, and for repeats of the same body when there is no key
+IDEMPOTENCY_REPLAY_TTL = config('IDEMPOTENCY_REPLAY_TTL', default=24 * 60 * 60, cast=int)
+IDEMPOTENCY_FINGERPRINT_TTL = config('IDEMPOTENCY_FINGERPRINT_TTL', default=120, cast=int)
+# How long a duplicate waits for the first request with its key, and how
+# long that request's lock outlives a crashed worker
+IDEMPOTENCY_WAIT = config('IDEMPOTENCY_WAIT', default=30.0, cast=float)
+IDEMPOTENCY_LOCK_TIMEOUT = config('IDEMPOTENCY_LOCK_TIMEOUT', default=60, cast=int)
+
+
+# Concurrent identical status and balance queries share one provider call
+# (see core/coalesce.py); balances are also served from the shared cache
+# for this many seconds
+BALANCE_CACHE_TTL = config('BALANCE_CACHE_TTL', default=5, cast=int)
+
+# SasaPay TZ account validations are cached (see sasapay_tz/api/validation.py):
+# valid accounts for ACCOUNT_VALIDATION_TTL seconds, rejected ones for the
+# shorter negative TTL. Bulk requests check their misses upstream
+# ACCOUNT_VALIDATION_BULK_CONCURRENCY at a time.
+ACCOUNT_VALIDATION_TTL = config('ACCOUNT_VALIDATION_TTL', default=6 * 60 * 60, cast=int)
+ACCOUNT_VALIDATION_NEGATIVE_TTL = config('ACCOUNT_VALIDATION_NEGATIVE_TTL', default=10 * 60, cast=int)
+ACCOUNT_VALIDATION_BULK_MAX = config('ACCOUNT_VALIDATION_BULK_MAX', default=500, cast=int)
+ACCOUNT_VALIDATION_BULK_CONCURRENCY = config('ACCOUNT_VALIDATION_BULK_CONCURRENCY', default=8, cast=int)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -149,4 +236,170 @@ MPESA_INITIATOR_NAME = config('MPESA_INITIATOR_NAME')
 FLUTTERWAVE_CLIENT_ID = config('FLUTTERWAVE_CLIENT_ID')
 FLUTTERWAVE_CLIENT_SECRET = config('FLUTTERWAVE_CLIENT_SECRET')
 FLUTTERWAVE_ENCRYPTION_KEY = config('FLUTTERWAVE_ENCRYPTION_KEY')
-FLUTTERWAVE_BASE_URL = config('FLUTTERWAVE_BASE_URL')
\ No newline at end of file
+FLUTTERWAVE_BASE_URL = config('FLUTTERWAVE_BASE_URL')
+FLUTTERWAVE_TOKEN_URL = config(
+    'FLUTTERWAVE_TOKEN_URL',
+    default='https://idp.flutterwave.com/realms/flutterwave/protocol/openid-connect/token'
+)
+# Verifies the flutterwave-signature header on webhooks. Without it webhooks
+# only drop cached lookups; charges in them are not mirrored or settled
+FLUTTERWAVE_SECRET_HASH = config('FLUTTERWAVE_SECRET_HASH', default='')
+
+# Customer and charge lookups by id are cached (see flutterwave/api/lookups.py):
+# customers for FLUTTERWAVE_CUSTOMER_CACHE_TTL seconds, settled charges for
+# FLUTTERWAVE_CHARGE_CACHE_TTL and pending ones only briefly
+FLUTTERWAVE_CUSTOMER_CACHE_TTL = config('FLUTTERWAVE_CUSTOMER_CACHE_TTL', default=5 * 60, cast=int)
+FLUTTERWAVE_CHARGE_CACHE_TTL = config('FLUTTERWAVE_CHARGE_CACHE_TTL', default=24 * 60 * 60, cast=int)
+FLUTTERWAVE_PENDING_CHARGE_CACHE_TTL = config('FLUTTERWAVE_PENDING_CHARGE_CACHE_TTL', default=5, cast=int)
+
+# Customers are searched in a local index (see flutterwave/api/customers.py),
+# synced from Flutterwave this often (seconds; 0 only loads it once)
+FLUTTERWAVE_CUSTOMER_SYNC_INTERVAL = config('FLUTTERWAVE_CUSTOMER_SYNC_INTERVAL', default=5 * 60, cast=int)
+FLUTTERWAVE_CUSTOMER_SYNC_PAGE_SIZE = config('FLUTTERWAVE_CUSTOMER_SYNC_PAGE_SIZE', default=50, cast=int)
+# Older pages each sync re-reads in turn, to pick up customers changed
+# outside the gateway
+FLUTTERWAVE_CUSTOMER_REFRESH_PAGES = config('FLUTTERWAVE_CUSTOMER_REFRESH_PAGES', default=2, cast=int)
+
+# Charge listings are answered from a local mirror (see flutterwave/api/charges.py),
+# synced this often (seconds) from the newest charge held, re-reading the last
+# FLUTTERWAVE_CHARGE_SYNC_LOOKBACK seconds for charges that settled since.
+# Charges that change after settling (refunds) only reach it through signed
+# webhooks, so it is off by default without FLUTTERWAVE_SECRET_HASH
+FLUTTERWAVE_CHARGE_MIRROR = config('FLUTTERWAVE_CHARGE_MIRROR', default=bool(FLUTTERWAVE_SECRET_HASH), cast=bool)
+FLUTTERWAVE_CHARGE_SYNC_INTERVAL = config('FLUTTERWAVE_CHARGE_SYNC_INTERVAL', default=60, cast=int)
+FLUTTERWAVE_CHARGE_SYNC_LOOKBACK = config('FLUTTERWAVE_CHARGE_SYNC_LOOKBACK', default=60 * 60, cast=int)
+FLUTTERWAVE_CHARGE_SYNC_PAGE_SIZE = config('FLUTTERWAVE_CHARGE_SYNC_PAGE_SIZE', default=50, cast=int)
+# Older unsettled charges fetched again per sync
+FLUTTERWAVE_CHARGE_REFRESH_LIMIT = config('FLUTTERWAVE_CHARGE_REFRESH_LIMIT', default=50, cast=int)
+
+# Pages fetched ahead of the one being streamed by the NDJSON exports
+# (see flutterwave/api/export.py)
+FLUTTERWAVE_EXPORT_PREFETCH = config('FLUTTERWAVE_EXPORT_PREFETCH', default=4, cast=int)
+# Prefetches in flight across all exports in a process, kept well under
+# FLUTTERWAVE_BULKHEAD_MAX_CONCURRENT
+FLUTTERWAVE_EXPORT_WORKERS = config('FLUTTERWAVE_EXPORT_WORKERS', default=4, cast=int)
+
+
+# Outbound provider HTTP pools (see core/http.py)
+PROVIDER_HTTP_DEFAULTS = {
+    "pool_connections": config('PROVIDER_HTTP_POOL_CONNECTIONS', default=4, cast=int),
+    "pool_maxsize": config('PROVIDER_HTTP_POOL_MAXSIZE', default=20, cast=int),
+    "pool_block": config('PROVIDER_HTTP_POOL_BLOCK', default=False, cast=bool),
+    "connect_timeout": config('PROVIDER_HTTP_CONNECT_TIMEOUT', default=3.05, cast=float),
+    "read_timeout": config('PROVIDER_HTTP_READ_TIMEOUT', default=30, cast=float),
+}
+
+# Connection cap for each provider's asyncio client under ASGI (core/aio.py)
+PROVIDER_ASYNC_HTTP_MAX_CONNECTIONS = config('PROVIDER_ASYNC_HTTP_MAX_CONNECTIONS', default=500, cast=int)
+
+PROVIDER_HTTP = {
+    "mpesa": {
+        "pool_maxsize": config('MPESA_HTTP_POOL_MAXSIZE', default=50, cast=int),
+    },
+    "sasapay": {
+        "pool_maxsize": config('SASAPAY_HTTP_POOL_MAXSIZE', default=20, cast=int),
+    },
+    "sasapay_tz": {
+        "pool_maxsize": config('SASAPAY_TZ_HTTP_POOL_MAXSIZE', default=20, cast=int),
+    },
+    "flutterwave": {
+        "pool_maxsize": config('FLUTTERWAVE_HTTP_POOL_MAXSIZE', default=20, cast=int),
+    },
+}
+
+# Outbound calls per second, shared by every worker (core/ratelimit.py).
+# Keys are endpoint path suffixes; "*" covers the provider's other calls.
+# 0 leaves an endpoint unlimited. Set these to the contracted quotas.
+PROVIDER_RATE_LIMITS = {
+    "mpesa": {
+        "stkpush/v1/processrequest": config('MPESA_STK_PUSH_RATE_LIMIT', default=0, cast=float),
+        "b2c/v3/paymentrequest": config('MPESA_B2C_RATE_LIMIT', default=0, cast=float),
+        "*": config('MPESA_RATE_LIMIT', default=0, cast=float),
+    },
+    "sasapay": {
+        "payments/request-payment/": config('SASAPAY_C2B_RATE_LIMIT', default=0, cast=float),
+        "payments/b2c/": config('SASAPAY_B2C_RATE_LIMIT', default=0, cast=float),
+        "*": config('SASAPAY_RATE_LIMIT', default=0, cast=float),
+    },
+    "sasapay_tz": {
+        "payments/b2c/": config('SASAPAY_TZ_B2C_RATE_LIMIT', default=0, cast=float),
+        "*": config('SASAPAY_TZ_RATE_LIMIT', default=0, cast=float),
+    },
+    "flutterwave": {
+        "*": config('FLUTTERWAVE_RATE_LIMIT', default=0, cast=float),
+    },
+}
+# Longest an outbound call queues for its rate limit before it is shed
+PROVIDER_RATE_LIMIT_MAX_WAIT = config('PROVIDER_RATE_LIMIT_MAX_WAIT', default=2.0, cast=float)
+
+# Circuit breakers on outbound provider endpoints (see core/circuit.py).
+# Slow calls count as failures; an open circuit answers 503 with Retry-After.
+PROVIDER_CIRCUIT_BREAKER_DEFAULTS = {
+    "window": config('CIRCUIT_BREAKER_WINDOW', default=30, cast=float),
+    "min_calls": config('CIRCUIT_BREAKER_MIN_CALLS', default=10, cast=int),
+    "failure_rate": config('CIRCUIT_BREAKER_FAILURE_RATE', default=0.5, cast=float),
+    "consecutive_failures": config('CIRCUIT_BREAKER_CONSECUTIVE_FAILURES', default=5, cast=int),
+    "slow_call_seconds": config('CIRCUIT_BREAKER_SLOW_CALL_SECONDS', default=10, cast=float),
+    "open_seconds": config('CIRCUIT_BREAKER_OPEN_SECONDS', default=15, cast=float),
+    "max_open_seconds": config('CIRCUIT_BREAKER_MAX_OPEN_SECONDS', default=120, cast=float),
+    "probes": config('CIRCUIT_BREAKER_PROBES', default=1, cast=int),
+}
+
+PROVIDER_CIRCUIT_BREAKER = {
+    "flutterwave": {
+        "slow_call_seconds": config('FLUTTERWAVE_CIRCUIT_BREAKER_SLOW_CALL_SECONDS', default=10, cast=float),
+    },
+    "sasapay_tz": {
+        "slow_call_seconds": config('SASAPAY_TZ_CIRCUIT_BREAKER_SLOW_CALL_SECONDS', default=10, cast=float),
+    },
+}
+
+# Outbound calls in flight per provider in each worker process (see
+# core/bulkhead.py), so a slow provider cannot hold every worker thread.
+# Calls wait max_wait seconds for a slot before a 503; keep it short, since
+# a waiting call holds its worker thread too.
+PROVIDER_BULKHEAD_DEFAULTS = {
+    "max_concurrent": config('PROVIDER_BULKHEAD_MAX_CONCURRENT', default=20, cast=int),
+    "max_wait": config('PROVIDER_BULKHEAD_MAX_WAIT', default=0.05, cast=float),
+}
+
+PROVIDER_BULKHEAD = {
+    "mpesa": {
+        "max_concurrent": config('MPESA_BULKHEAD_MAX_CONCURRENT', default=50, cast=int),
+    },
+    "sasapay": {
+        "max_concurrent": config('SASAPAY_BULKHEAD_MAX_CONCURRENT', default=20, cast=int),
+    },
+    "sasapay_tz": {
+        "max_concurrent": config('SASAPAY_TZ_BULKHEAD_MAX_CONCURRENT', default=20, cast=int),
+    },
+    "flutterwave": {
+        "max_concurrent": config('FLUTTERWAVE_BULKHEAD_MAX_CONCURRENT', default=20, cast=int),
+    },
+}
+
+# Retries of outbound provider calls (see core/retry.py). Only calls that
+# are safe to repeat (GETs, endpoints marked idempotent below, or requests
+# with an idempotency key) are retried after a reply or timeout; anything
+# else only when its connection could not be opened.
+PROVIDER_RETRY_DEFAULTS = {
+    "attempts": config('PROVIDER_RETRY_ATTEMPTS', default=3, cast=int),
+    "base_delay": config('PROVIDER_RETRY_BASE_DELAY', default=0.2, cast=float),
+    "max_delay": config('PROVIDER_RETRY_MAX_DELAY', default=2.0, cast=float),
+    "deadline": config('PROVIDER_RETRY_DEADLINE', default=10.0, cast=float),
+}
+
+# Per-endpoint overrides, keyed by path suffix like PROVIDER_RATE_LIMITS
+PROVIDER_RETRY = {
+    "mpesa": {
+        "transactionstatus/v1/query": {"idempotent": True},
+    },
+    "sasapay_tz": {
+        "transactions/status-query/": {"idempotent": True},
+        "accounts/account-validation/": {"idempotent": True},
+    },
+    "flutterwave": {
+        "openid-connect/token": {"idempotent": True},
+        "customers/search": {"idempotent": True},
+    },
+}
@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'intergrations.settings')
 
 application = get_wsgi_application()
+
+# Replay callbacks spooled by workers that exited, without waiting for the
+# first callback to reach this one
+from core.ledger import callbacks
+
+callbacks.start()
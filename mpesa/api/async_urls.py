@@ -0,0 +1,13 @@
+from django.urls import path
+from .async_views import *
+from .urls import urlpatterns as sync_urlpatterns
+
+# Native async views first; anything without one (auth/) falls through to
+# the sync view, which Django runs in a thread.
+urlpatterns = [
+   path("QR-Code/", AsyncDynamicQR.as_view(), name="QR"),
+   path("stk-push/", AsyncMpesaExpressView.as_view(), name="stk"),
+   path("c2b/", AsyncC2BRegisterUrlView.as_view(), name="c2b"),
+   path("b2c/", AsyncB2CPaymentView.as_view(), name="b2c"),
+   path("transaction-status/", AsyncTransactionStatusView.as_view(), name="transaction-check")
+] + sync_urlpatterns
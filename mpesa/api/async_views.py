@@ -0,0 +1,87 @@
+from django.conf import settings
+
+from core.aio import get_async_client
+from core.api.async_views import AsyncProviderView
+from core.models import Transaction
+from .services import get_token_manager, status_queries
+from .payloads import *
+
+
+class AsyncMpesaView(AsyncProviderView):
+    http_method_names = ["post"]
+    client = get_async_client("mpesa")
+    ledger_provider = Transaction.Provider.MPESA
+
+    def get_token_manager(self):
+        return get_token_manager()
+
+
+class AsyncDynamicQR(AsyncMpesaView):
+
+    async def post(self, request):
+        data, error = self.parse_or_reject(request)
+        if error:
+            return error
+
+        return await self.call_provider(
+            "POST", f"{settings.MPESA_BASE_URL}/mpesa/qrcode/v1/generate",
+            "QR Code generated successfully.", "QR Code not generated", "QR Code generation failed",
+            json=qr_code_payload(data)
+        )
+
+
+class AsyncMpesaExpressView(AsyncMpesaView):
+
+    async def post(self, request):
+        data, error = self.parse_or_reject(request)
+        if error:
+            return error
+
+        return await self.call_provider(
+            "POST", f"{settings.MPESA_BASE_URL}/mpesa/stkpush/v1/processrequest",
+            "STK Push sent successfully.", "STK Push unsuccessful", "STK Push failed",
+            ledger_kind=Transaction.Kind.C2B, json=stk_push_payload(data)
+        )
+
+
+class AsyncC2BRegisterUrlView(AsyncMpesaView):
+
+    async def post(self, request):
+        data, error = self.parse_or_reject(request)
+        if error:
+            return error
+
+        return await self.call_provider(
+            "POST", f"{settings.MPESA_BASE_URL}/mpesa/c2b/v1/registerurl",
+            "C2B transaction successfully.", "C2B transaction unsuccessful", "C2B transaction failed",
+            json=c2b_register_payload(data)
+        )
+
+
+class AsyncB2CPaymentView(AsyncMpesaView):
+
+    async def post(self, request):
+        data, error = self.parse_or_reject(request)
+        if error:
+            return error
+
+        return await self.call_provider(
+            "POST", f"{settings.MPESA_BASE_URL}/mpesa/b2c/v3/paymentrequest",
+            "B2C transaction successfully.", "B2C transaction unsuccessful", "B2C transaction failed",
+            ledger_kind=Transaction.Kind.B2C, json=b2c_payload(data)
+        )
+
+
+class AsyncTransactionStatusView(AsyncMpesaView):
+
+    async def post(self, request):
+        data, error = self.parse_or_reject(request)
+        if error:
+            return error
+
+        return await self.call_provider(
+            "POST", f"{settings.MPESA_BASE_URL}/mpesa/transactionstatus/v1/query",
+            "Transaction status check.", "Transaction status check unsuccessful",
+            "Transaction status check failed",
+            coalesce=status_queries, json=transaction_status_payload(data)
+        )
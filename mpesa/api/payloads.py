@@ -0,0 +1,116 @@
+from django.conf import settings
+
+from .services import generate_STKpassword, generate_timestamp
+
+
+def qr_code_payload(data):
+    """
+    Dynamic QR code generation request.
+    """
+    payload = {
+        "MerchantName": data.get("MerchantName"),
+        "RefNo": data.get("RefNo"),
+        "Amount": data.get("Amount"),
+        "TrxCode": data.get("TrxCode"),
+        "CPI": data.get("CPI"),
+        "Size": data.get("Size")
+    }
+
+    payload = {k: v for k, v in payload.items() if v is not None}
+    return payload
+
+
+def stk_push_payload(data):
+    """
+    Lipa na M-Pesa Online (STK push) request.
+    """
+    timestamp = generate_timestamp()
+    password = generate_STKpassword(
+        shortcode=settings.SHORT_CODE,
+        passkey=settings.MPESA_PASSKEY,
+        timestamp=timestamp
+    )
+
+    payload = {
+        "BusinessShortCode": settings.SHORT_CODE,
+        "Password": password,
+        "Timestamp": timestamp,
+        "TransactionType": data.get("TransactionType"),
+        "Amount": data.get("Amount"),
+        "PartyA": data.get("PartyA"),
+        "PartyB": data.get("PartyB"),
+        "PhoneNumber": data.get("PhoneNumber"),
+        "CallBackURL": data.get("CallBackURL"),
+        "AccountReference": data.get("AccountReference"),
+        "TransactionDesc": data.get("TransactionDesc")
+    }
+
+    payload = {x: v for x, v in payload.items() if v is not None}
+    return payload
+
+
+def c2b_register_payload(data):
+    """
+    C2B confirmation/validation URL registration request.
+    """
+    payload = {
+        "ShortCode": data.get("ShortCode"),
+        "ResponseType": data.get("ResponseType"),
+        "ConfirmationURL": data.get("ConfirmationURL"),
+        "ValidationURL": data.get("ValidationURL")
+    }
+
+    payload = {x: v for x, v in payload.items() if v is not None}
+    return payload
+
+
+def b2c_payload(data):
+    """
+    B2C payment request.
+    """
+    payload = {
+        "OriginatorConversationID": data.get("OriginatorConversationID"),
+        "InitiatorName": settings.MPESA_INITIATOR_NAME,
+        "SecurityCredential": settings.MPESA_SECURITY_CREDENTIALS,
+        "CommandID": data.get("CommandID"),
+        "Amount": data.get("Amount"),
+        "PartyA": data.get("PartyA"),
+        "PartyB": data.get("PartyB"),
+        "Remarks": data.get("Remarks"),
+        "QueueTimeOutURL": data.get("QueueTimeOutURL"),
+        "ResultURL": data.get("ResultURL"),
+        "Occassion": data.get("Occassion"),
+        "ResponseType": data.get("ResponseType"),
+        "ValidationURL": data.get("ValidationURL"),
+        "ConfirmationURL": data.get("ConfirmationURL"),
+        "ShortCode": settings.SHORT_CODE
+    }
+
+    payload = {x: v for x, v in payload.items() if v is not None}
+    return payload
+
+
+def transaction_status_payload(data):
+    """
+    Transaction status query.
+    """
+    payload = {
+        "Initiator": settings.MPESA_INITIATOR_NAME,
+        "SecurityCredential": settings.MPESA_SECURITY_CREDENTIALS,
+        "CommandID": data.get("Command ID"),
+        "TransactionID": data.get("Transaction ID"),
+        "OriginatorConversationID": data.get("OriginatorConversationID"),
+        "PartyA": data.get("PartyA"),
+        "IdentifierType": data.get("IdentifierType"),
+        "ResultURL": data.get("ResultURL"),
+        "QueueTimeOutURL": data.get("QueueTimeOutURL"),
+        "Remarks": data.get("Remarks"),
+        "Occassion": data.get("Occassion"),
+        # "ResponseType": data.get("ResponseType"),
+        # "ValidationURL": data.get("ValidationURL"),
+        # "ConfirmationURL": data.get("ConfirmationURL"),
+        # "ShortCode": settings.SHORT_CODE
+    }
+
+    payload = {x: v for x, v in payload.items() if v is not None}
+    return payload
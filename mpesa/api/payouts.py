@@ -0,0 +1,30 @@
+from django.conf import settings
+
+from core.models import Transaction
+from core.payouts import PayoutChannel
+from .client import client
+from .services import get_token_manager
+from .payloads import b2c_payload
+
+
+class MpesaB2CChannel(PayoutChannel):
+    provider = Transaction.Provider.MPESA
+    client = client
+    receiver_field = "PartyB"
+    reference_field = "OriginatorConversationID"
+    required_fields = ("CommandID", "Amount", "PartyA", "PartyB", "QueueTimeOutURL", "ResultURL")
+
+    def url(self):
+        return f"{settings.MPESA_BASE_URL}/mpesa/b2c/v3/paymentrequest"
+
+    def get_token_manager(self):
+        return get_token_manager()
+
+    def payload(self, row):
+        return b2c_payload(row)
+
+    def accepted(self, response, data):
+        return response.ok and isinstance(data, dict) and str(data.get("ResponseCode", "0")) == "0"
+
+
+b2c_channel = MpesaB2CChannel()
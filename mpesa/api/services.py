@@ -1,15 +1,67 @@
 import base64
+import hashlib
+import threading
 from datetime import datetime, timezone
 
+from django.conf import settings
+
+from core.coalesce import Coalescer
+from core.tokens import TokenManager
+from .client import client
+
 
 def generate_auth(consumer_key, consumer_secret):
     raw = f"{consumer_key}:{consumer_secret}"
     b64 = base64.b64encode(raw.encode("utf-8")).decode("utf-8")
 
-    print(b64)       
-
     return {"Authorization": f"Basic {b64}"}
-    
+
+
+class DarajaTokenManager(TokenManager):
+    """
+    Daraja OAuth token for one consumer key, refreshed in the background
+    before it expires.
+    """
+
+    background_refresh = True
+
+    def __init__(self, consumer_key, consumer_secret):
+        # Name metrics after a digest so the key itself is never exposed
+        digest = hashlib.sha256(consumer_key.encode("utf-8")).hexdigest()[:8]
+        super().__init__(f"mpesa.{digest}")
+        self.consumer_key = consumer_key
+        self.consumer_secret = consumer_secret
+
+    def fetch_token(self):
+        url = f"{settings.MPESA_BASE_URL}/oauth/v1/generate"
+        params = {"grant_type": "client_credentials"}
+        headers = generate_auth(self.consumer_key, self.consumer_secret)
+
+        response = client.get(url, params=params, headers=headers)
+        response.raise_for_status()
+
+        res_data = response.json()
+        return res_data["access_token"], res_data["expires_in"]
+
+
+_token_managers = {}
+_token_managers_lock = threading.Lock()
+
+
+def get_token_manager(consumer_key=None, consumer_secret=None):
+    """
+    Return the shared token manager for a consumer key (defaults to the
+    gateway's own MPESA_CONSUMER_KEY).
+    """
+    if consumer_key is None:
+        consumer_key = settings.MPESA_CONSUMER_KEY
+        consumer_secret = settings.MPESA_CONSUMER_SECRET
+
+    with _token_managers_lock:
+        if consumer_key not in _token_managers:
+            _token_managers[consumer_key] = DarajaTokenManager(consumer_key, consumer_secret)
+        return _token_managers[consumer_key]
+
 
 def generate_timestamp(now=None):
     """
@@ -30,3 +82,6 @@ def generate_STKpassword(shortcode, passkey, timestamp=None):
     raw = f"{shortcode}{passkey}{timestamp}"
     b64 = base64.b64encode(raw.encode("utf-8")).decode("utf-8")
     return b64
+
+
+status_queries = Coalescer("mpesa.transaction_status")
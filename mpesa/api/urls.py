@@ -7,5 +7,6 @@ urlpatterns = [
    path("stk-push/", MpesaExpressView.as_view(), name="stk"),
    path("c2b/", C2BRegisterUrlView.as_view(), name="c2b"),
    path("b2c/", B2CPaymentView.as_view(), name="b2c"),
+   path("b2c/batch/", B2CBatchPayoutView.as_view(), name="b2c-batch"),
    path("transaction-status/", TransactionStatusView.as_view(), name="transaction-check")
 ]
@@ -4,71 +4,53 @@ from rest_framework.response import Response
 from rest_framework import status, permissions
 from django.conf import settings
 import requests
-from .services import generate_auth, generate_STKpassword, generate_timestamp
+from core import ledger
+from core.models import Transaction
+from core.api.views import BulkPayoutView
+from .services import get_token_manager, status_queries
+from .payloads import *
+from .payouts import b2c_channel
+from .client import client
 
 class AuthView(APIView):
+    """
+    Return the gateway's cached Daraja token. Provider views authorize
+    themselves, so clients no longer need to call this first.
+    """
 
     def post(self, request):
-        url = f"{settings.MPESA_BASE_URL}/oauth/v1/generate"
-        params = {"grant_type": "client_credentials"}
-
-        consumer_key = settings.MPESA_CONSUMER_KEY
-        consumer_secret = settings.MPESA_CONSUMER_SECRET
-
-        headers = generate_auth(consumer_key, consumer_secret)
-
-        response = requests.get(url, params=params, headers=headers)
+        token_manager = get_token_manager()
 
         try:
-            res_data = response.json()
-        except ValueError:
-            res_data = {"detail": "Invalid JSON response from Mpesa."}
-
-        if response.status_code == 200:
-            return Response({
-                "status": True,
-                "message": "Token retrieved successfully",
-                "data": res_data
-            }, status=status.HTTP_200_OK)
-        else:
+            access_token = token_manager.get_access_token()
+        except requests.exceptions.RequestException as e:
             return Response({
                 "status": False,
-                "message": f"Failed to retrieve token (status {response.status_code})",
-                "data": res_data
-            }, status=response.status_code)
+                "message": f"Failed to retrieve token: {str(e)}"
+            }, status=status.HTTP_502_BAD_GATEWAY)
+
+        return Response({
+            "status": True,
+            "message": "Token retrieved successfully",
+            "data": {
+                "access_token": access_token,
+                "expires_in": token_manager.stats()["expires_in"]
+            }
+        }, status=status.HTTP_200_OK)
         
 class DynamicQR(APIView):
     # permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
         url = f"{settings.MPESA_BASE_URL}/mpesa/qrcode/v1/generate"
-        access_token = request.headers.get("Authorization")
-        if not access_token:
-            return Response(
-                {
-                    "status": False,
-                    "message": "Missing Authorization header (Bearer token required)"
-                }, status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        payload = {
-            "MerchantName": request.data.get("MerchantName"),
-            "RefNo": request.data.get("RefNo"),
-            "Amount": request.data.get("Amount"),
-            "TrxCode": request.data.get("TrxCode"),
-            "CPI": request.data.get("CPI"),
-            "Size": request.data.get("Size")
-        }
-
-        payload = {k: v for k, v in payload.items() if v is not None}
+        payload = qr_code_payload(request.data)
 
         headers = {
-            "Authorization": access_token,
             "Content-Type": "application/json"
         }
 
         try:
-            response = requests.post(url, headers=headers, json=payload)
+            response = client.post(url, headers=headers, json=payload, token_manager=get_token_manager())
             res_data = response.json()
 
             if not response.ok:
@@ -105,46 +87,14 @@ class MpesaExpressView(APIView):
     def post(self, request):
         url = f"{settings.MPESA_BASE_URL}/mpesa/stkpush/v1/processrequest"
 
-        access_token = request.headers.get("Authorization")
-        if not access_token:
-            return Response(
-                {
-                    "status": False,
-                    "message": "Missing Authorization header (Bearer token required)"
-                }, status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        timestamp = generate_timestamp()
-        password = generate_STKpassword(
-            shortcode=settings.SHORT_CODE,
-            passkey=settings.MPESA_PASSKEY,
-            timestamp=timestamp
-        )
-       
-        
-        payload = {
-            "BusinessShortCode": settings.SHORT_CODE,
-            "Password": password,
-            "Timestamp": timestamp,
-            "TransactionType": request.data.get("TransactionType"),
-            "Amount": request.data.get("Amount"),
-            "PartyA": request.data.get("PartyA"),
-            "PartyB": request.data.get("PartyB"),
-            "PhoneNumber": request.data.get("PhoneNumber"),
-            "CallBackURL": request.data.get("CallBackURL"),
-            "AccountReference": request.data.get("AccountReference"),
-            "TransactionDesc": request.data.get("TransactionDesc")
-        }
-
-        payload = {x: v for x, v in payload.items() if v is not None}
+        payload = stk_push_payload(request.data)
 
         headers = {
-            "Authorization": access_token,
             "Content-Type": "application/json"
         }
 
         try:
-            response = requests.post(url, headers=headers, json=payload)
+            response = client.post(url, headers=headers, json=payload, token_manager=get_token_manager())
             res_data = response.json()
 
             if not response.ok:
@@ -157,6 +107,8 @@ class MpesaExpressView(APIView):
                     status=response.status_code
                 )
 
+            ledger.record(Transaction.Provider.MPESA, Transaction.Kind.C2B, payload, res_data)
+
             return Response(
                 {
                     "status": True,
@@ -180,31 +132,14 @@ class C2BRegisterUrlView(APIView):
     def post(self, request):
         url =f"{settings.MPESA_BASE_URL}/mpesa/c2b/v1/registerurl"
 
-        access_token = request.headers.get("Authorization")
-        if not access_token:
-            return Response(
-                {
-                    "status": False,
-                    "message": "Missing Authorization header (Bearer token required)"
-                }, status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        payload = {
-            "ShortCode": request.data.get("ShortCode"),
-            "ResponseType": request.data.get("ResponseType"),
-            "ConfirmationURL": request.data.get("ConfirmationURL"),
-            "ValidationURL": request.data.get("ValidationURL")
-        }
-
-        payload = {x: v for x, v in payload.items() if v is not None}
+        payload = c2b_register_payload(request.data)
 
         headers = {
-            "Authorization": access_token,
             "Content-Type": "application/json"
         }
 
         try:
-            response = requests.post(url, headers=headers, json=payload)
+            response = client.post(url, headers=headers, json=payload, token_manager=get_token_manager())
             res_data = response.json()
 
             if not response.ok:
@@ -239,45 +174,17 @@ class C2BRegisterUrlView(APIView):
 class B2CPaymentView(APIView):
 
     def post(self, request):
-        url =f"{settings.MPESA_BASE_URL}/mpesa/c2b/v1/registerurl"
+        url = f"{settings.MPESA_BASE_URL}/mpesa/b2c/v3/paymentrequest"
 
-        access_token = request.headers.get("Authorization")
-        if not access_token:
-            return Response(
-                {
-                    "status": False,
-                    "message": "Missing Authorization header (Bearer token required)"
-                }, status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        payload = {
-            "OriginatorConversationID": request.data.get("OriginatorConversationID"),
-            "InitiatorName": settings.MPESA_INITIATOR_NAME,
-            "SecurityCredential": settings.MPESA_SECURITY_CREDENTIALS,
-            "CommandID": request.data.get("CommandID"),
-            "Amount": request.data.get("Amount"),
-            "PartyA": request.data.get("PartyA"),
-            "PartyB": request.data.get("PartyB"),
-            "Remarks": request.data.get("Remarks"),
-            "QueueTimeOutURL": request.data.get("QueueTimeOutURL"),
-            "ResultURL": request.data.get("ResultURL"),
-            "Occassion": request.data.get("Occassion"),
-            "ResponseType": request.data.get("ResponseType"),
-            "ValidationURL": request.data.get("ValidationURL"),
-            "ConfirmationURL": request.data.get("ConfirmationURL"),
-            "ShortCode": settings.SHORT_CODE
-        }
+        payload = b2c_payload(request.data)
         print("PAYLOAD: ",payload)
 
-        payload = {x: v for x, v in payload.items() if v is not None}
-
         headers = {
-            "Authorization": access_token,
             "Content-Type": "application/json"
         }
 
         try:
-            response = requests.post(url, headers=headers, json=payload)
+            response = client.post(url, headers=headers, json=payload, token_manager=get_token_manager())
             res_data = response.json()
             print("res_data",res_data)
 
@@ -291,6 +198,8 @@ class B2CPaymentView(APIView):
                     status=response.status_code
                 )
 
+            ledger.record(Transaction.Provider.MPESA, Transaction.Kind.B2C, payload, res_data)
+
             return Response(
                 {
                     "status": True,
@@ -309,48 +218,29 @@ class B2CPaymentView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+class B2CBatchPayoutView(BulkPayoutView):
+    """
+    B2C payouts in bulk from a CSV or NDJSON upload (see BulkPayoutView).
+    """
+    channel = b2c_channel
+
+
 class TransactionStatusView(APIView):
 
     def post(self, request):
         url = f"{settings.MPESA_BASE_URL}/mpesa/transactionstatus/v1/query"
 
-        access_token = request.headers.get("Authorization")
-        if not access_token:
-            return Response(
-                {
-                    "status": False,
-                    "message": "Missing Authorization header (Bearer token required)"
-                }, status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        payload = {
-            "Initiator": settings.MPESA_INITIATOR_NAME,
-            "SecurityCredential": settings.MPESA_SECURITY_CREDENTIALS,
-            "CommandID": request.data.get("Command ID"),
-            "TransactionID": request.data.get("Transaction ID"),
-            "OriginatorConversationID": request.data.get("OriginatorConversationID"),
-            "PartyA": request.data.get("PartyA"),
-            "IdentifierType": request.data.get("IdentifierType"),
-            "ResultURL": request.data.get("ResultURL"),
-            "QueueTimeOutURL": request.data.get("QueueTimeOutURL"),
-            "Remarks": request.data.get("Remarks"),
-            "Occassion": request.data.get("Occassion"),
-            # "ResponseType": request.data.get("ResponseType"),
-            # "ValidationURL": request.data.get("ValidationURL"),
-            # "ConfirmationURL": request.data.get("ConfirmationURL"),
-            # "ShortCode": settings.SHORT_CODE
-        }
+        payload = transaction_status_payload(request.data)
         print("PAYLOAD: ",payload)
 
-        payload = {x: v for x, v in payload.items() if v is not None}
-
         headers = {
-            "Authorization": access_token,
             "Content-Type": "application/json"
         }
 
         try:
-            response = requests.post(url, headers=headers, json=payload)
+            response = status_queries.call(
+                payload, lambda: client.post(url, headers=headers, json=payload, token_manager=get_token_manager())
+            )
             res_data = response.json()
             print("res_data",res_data)
 
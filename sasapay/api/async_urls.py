@@ -0,0 +1,19 @@
+from django.urls import path
+from .async_views import *
+from .urls import urlpatterns as sync_urlpatterns
+
+# Native async views first; auth and callbacks fall through to the sync
+# views, which Django runs in a thread.
+urlpatterns = [
+    path("c2bpayment/", AsyncC2BPaymentRequestView.as_view(), name="c2b"),
+    path("process-payment/", AsyncProcessPayment.as_view(), name="process-payment"),
+    path("c2b-mobile/", AsyncC2BPaymentMobileMoneyRequestView.as_view(), name="c2b-mobile-money"),
+
+    path("b2cpayment/", AsyncB2CPaymentRequestView.as_view(), name="b2cpayment"),
+
+    path("b2bpayment/", AsyncB2BPaymentRequestView.as_view(), name="b2cpayment"),
+
+    path("channel-codes/", AsyncChannelCodesView.as_view(), name="channel-codes"),
+    path("checkout/", AsyncCheckoutView.as_view(), name="checkout"),
+    path("remittance/", AsyncRemittancePaymentView.as_view(), name="remittance")
+] + sync_urlpatterns
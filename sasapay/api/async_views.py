@@ -0,0 +1,185 @@
+from django.conf import settings
+from django.http import JsonResponse
+from rest_framework import status
+
+from core.aio import get_async_client
+from core.api.async_views import AsyncProviderView
+from core.circuit import ProviderUnavailable
+from core.models import Transaction
+from .channels import FETCH_ERRORS, channel_codes
+from .services import token_manager
+from .payloads import *
+
+
+class AsyncSasapayView(AsyncProviderView):
+    http_method_names = ["post"]
+    client = get_async_client("sasapay")
+    ledger_provider = Transaction.Provider.SASAPAY
+
+    def get_token_manager(self):
+        return token_manager
+
+    @staticmethod
+    def invalid(message):
+        return JsonResponse({
+            "status": False,
+            "message": message
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+
+class AsyncC2BPaymentRequestView(AsyncSasapayView):
+    """
+    Request payment from a SasaPay user (C2B)
+    """
+
+    async def post(self, request):
+        data, error = self.parse_or_reject(request)
+        if error:
+            return error
+
+        payload = c2b_payload(data)
+        response, res_data, error = await self.fetch(
+            "POST", f"{settings.SASAPAY_BASE_URL}/payments/request-payment/",
+            "Request to SasaPay failed", json=payload
+        )
+        if error:
+            return error
+
+        if response.is_success and res_data.get("status", True):
+            await self.record(Transaction.Kind.C2B, payload, res_data)
+
+        return JsonResponse({
+            "status": True,
+            "message": res_data.get("detail", "Request processed"),
+            "data": res_data
+        }, status=response.status_code)
+
+
+class AsyncProcessPayment(AsyncSasapayView):
+
+    async def post(self, request):
+        data, error = self.parse_or_reject(request)
+        if error:
+            return error
+
+        response, res_data, error = await self.fetch(
+            "POST", f"{settings.SASAPAY_BASE_URL}/payments/process-payment/",
+            "Request to SasaPay failed", json=process_payment_payload(data)
+        )
+        if error:
+            return error
+
+        return JsonResponse({
+            "status": res_data.get("status", False),
+            "message": res_data.get("detail", "Request processed"),
+            "data": res_data
+        }, status=response.status_code)
+
+
+class AsyncC2BPaymentMobileMoneyRequestView(AsyncSasapayView):
+    """
+    Request payment from a SasaPay user (C2B) for mobile money
+    """
+
+    async def post(self, request):
+        data, error = self.parse_or_reject(request)
+        if error:
+            return error
+
+        return await self.call_provider(
+            "POST", f"{settings.SASAPAY_BASE_URL}/payments/request-payment/",
+            "Payment request sent successfully.", "Payment request failed.", "Request to SasaPay failed",
+            check_status=True, provider_message=True,
+            ledger_kind=Transaction.Kind.C2B, json=c2b_mobile_money_payload(data)
+        )
+
+
+class AsyncB2CPaymentRequestView(AsyncSasapayView):
+
+    async def post(self, request):
+        data, error = self.parse_or_reject(request)
+        if error:
+            return error
+
+        return await self.call_provider(
+            "POST", f"{settings.SASAPAY_BASE_URL}/payments/b2c/",
+            "B2C Payment request sent successfully.", "B2C Transaction Failed", "B2C request failed",
+            ledger_kind=Transaction.Kind.B2C, json=b2c_payload(data)
+        )
+
+
+class AsyncB2BPaymentRequestView(AsyncSasapayView):
+
+    async def post(self, request):
+        data, error = self.parse_or_reject(request)
+        if error:
+            return error
+
+        payload = b2b_payload(data)
+        if not await channel_codes.is_known_async(payload.get("NetworkCode")):
+            return self.invalid(f"Unknown NetworkCode: {payload.get('NetworkCode')}")
+
+        return await self.call_provider(
+            "POST", f"{settings.SASAPAY_BASE_URL}/payments/b2b/",
+            "B2B Payment request sent successfully.", "B2B Transaction Failed", "B2B request failed",
+            ledger_kind=Transaction.Kind.B2B, json=payload
+        )
+
+
+class AsyncChannelCodesView(AsyncSasapayView):
+    http_method_names = ["get"]
+
+    async def get(self, request):
+        try:
+            reply, _ = await channel_codes.aget()
+        except ProviderUnavailable as e:
+            return self.unavailable(e)
+        except FETCH_ERRORS as e:
+            return JsonResponse(
+                {
+                    "status": False,
+                    "message": f"Channel codes fetch failed: {str(e)}"
+                },
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        return JsonResponse(
+            {
+                "status": True,
+                "message": "Channel Codes available",
+                "data": reply
+            }, status=status.HTTP_200_OK)
+
+
+class AsyncCheckoutView(AsyncSasapayView):
+
+    async def post(self, request):
+        data, error = self.parse_or_reject(request)
+        if error:
+            return error
+
+        return await self.call_provider(
+            "POST", f"{settings.SASAPAY_BASE_URL}/payments/card-payments/",
+            "Checkout processed successfully.", "Checkout process failed",
+            "Checkout Request to SasaPay failed",
+            provider_message=True, ledger_kind=Transaction.Kind.CHECKOUT, json=checkout_payload(data)
+        )
+
+
+class AsyncRemittancePaymentView(AsyncSasapayView):
+
+    async def post(self, request):
+        data, error = self.parse_or_reject(request)
+        if error:
+            return error
+
+        payload = remittance_payload(data)
+        if not await channel_codes.is_known_async(payload.get("DestinationChannelCode")):
+            return self.invalid(f"Unknown DestinationChannelCode: {payload.get('DestinationChannelCode')}")
+
+        return await self.call_provider(
+            "POST", f"{settings.SASAPAY_BASE_URL}/remittances/remittance-payments/",
+            "Remittance processed successfully.", "Remittance process failed",
+            "Remittance Request to SasaPay failed",
+            provider_message=True, ledger_kind=Transaction.Kind.REMITTANCE, json=payload
+        )
@@ -0,0 +1,190 @@
+import json
+import os
+import threading
+import time
+
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from core import metrics
+from core.circuit import ProviderUnavailable
+from .client import client
+from .services import token_manager
+
+# What a failed fetch raises; lookups then leave validation to the provider
+FETCH_ERRORS = (requests.exceptions.RequestException, ProviderUnavailable, ValueError)
+
+
+class ChannelRegistry:
+    """
+    SasaPay's channel codes, fetched once and indexed by code.
+
+    The list barely changes, so it is kept in memory and refreshed every
+    ``ttl`` seconds from a daemon thread; callers always get the last good
+    copy without waiting on the provider. Every successful fetch is written
+    to ``snapshot`` so a worker that has just started serves lookups from
+    disk, and only calls the provider inline when there is no copy at all.
+    """
+
+    # Back-off between failed background refreshes
+    retry_delay = 30
+
+    def __init__(self, name, fetch, snapshot, ttl):
+        self.name = name
+        self.fetch = fetch
+        self.snapshot = snapshot
+        self.ttl = ttl
+        # (reply, index by code, wall-clock time fetched) swapped as one tuple
+        self._state = None
+        self._lock = threading.Lock()
+        self._refresher = None
+
+        self.refreshes = metrics.Counter()
+        self.refresh_failures = metrics.Counter()
+        self.snapshot_loads = metrics.Counter()
+        metrics.register(f"channels.{name}", self.stats)
+
+    @staticmethod
+    def _index(reply):
+        channels = reply.get("data") if isinstance(reply, dict) else None
+        return {
+            str(channel["channel_code"]): channel
+            for channel in channels or []
+            if isinstance(channel, dict) and "channel_code" in channel
+        }
+
+    def _adopt(self, reply, fetched_at):
+        self._state = (reply, self._index(reply), fetched_at)
+        if self._refresher is None:
+            self._refresher = threading.Thread(
+                target=self._refresh_loop, name=f"channels-refresh-{self.name}", daemon=True
+            )
+            self._refresher.start()
+
+    def _load_snapshot(self):
+        try:
+            with open(self.snapshot) as f:
+                saved = json.load(f)
+            reply, fetched_at = saved["reply"], float(saved["fetched_at"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        self.snapshot_loads.incr()
+        self._adopt(reply, fetched_at)
+        return True
+
+    def _save_snapshot(self, reply, fetched_at):
+        tmp = f"{self.snapshot}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.snapshot), exist_ok=True)
+            with open(tmp, "w") as f:
+                json.dump({"fetched_at": fetched_at, "reply": reply}, f)
+            os.replace(tmp, self.snapshot)
+        except OSError:
+            pass
+
+    def _refresh(self):
+        reply = self.fetch()
+        fetched_at = time.time()
+        self.refreshes.incr()
+        self._save_snapshot(reply, fetched_at)
+        self._adopt(reply, fetched_at)
+
+    def _refresh_loop(self):
+        delay = 0
+        while True:
+            time.sleep(max(self._state[2] + self.ttl - time.time(), delay))
+            try:
+                with self._lock:
+                    if time.time() >= self._state[2] + self.ttl:
+                        self._refresh()
+                delay = 0
+            except Exception:
+                self.refresh_failures.incr()
+                delay = self.retry_delay
+
+    def peek(self):
+        """
+        ``(reply, index)`` from memory or the snapshot, or None without
+        calling the provider.
+        """
+        state = self._state
+        # Skip the snapshot while another caller is fetching; it holds the lock
+        if state is None and self._lock.acquire(blocking=False):
+            try:
+                if self._state is None:
+                    self._load_snapshot()
+                state = self._state
+            finally:
+                self._lock.release()
+        return state[:2] if state else None
+
+    def get(self):
+        """
+        ``(reply, index)``, fetching inline only when there is no copy in
+        memory or on disk. Raises whatever ``fetch`` raises in that case.
+        """
+        state = self.peek()
+        if state is not None:
+            return state
+        with self._lock:
+            if self._state is None:
+                self._refresh()
+            return self._state[:2]
+
+    async def aget(self):
+        """
+        ``get`` for coroutines; only an inline fetch leaves the event loop.
+        """
+        state = self.peek()
+        if state is not None:
+            return state
+        return await sync_to_async(self.get, thread_sensitive=False)()
+
+    @staticmethod
+    def _known(code, state):
+        return not state[1] or str(code) in state[1]
+
+    def is_known(self, code):
+        """
+        False only if ``code`` is given and missing from the channel list.
+        If the list can't be loaded the provider is left to judge.
+        """
+        if code in (None, ""):
+            return True
+        try:
+            return self._known(code, self.get())
+        except FETCH_ERRORS:
+            return True
+
+    async def is_known_async(self, code):
+        if code in (None, ""):
+            return True
+        try:
+            return self._known(code, await self.aget())
+        except FETCH_ERRORS:
+            return True
+
+    def stats(self):
+        state = self._state
+        return {
+            "channels": len(state[1]) if state else 0,
+            "age": round(time.time() - state[2], 1) if state else None,
+            "refreshes": self.refreshes.value,
+            "refresh_failures": self.refresh_failures.value,
+            "snapshot_loads": self.snapshot_loads.value,
+        }
+
+
+def fetch_channel_codes():
+    response = client.get(f"{settings.SASAPAY_BASE_URL}/payments/channel-codes/", token_manager=token_manager)
+    response.raise_for_status()
+    reply = response.json()
+    if not reply.get("status", True):
+        raise ValueError(reply.get("detail") or reply.get("message") or "Channel codes fetch failed")
+    return reply
+
+
+channel_codes = ChannelRegistry(
+    "sasapay", fetch_channel_codes, settings.SASAPAY_CHANNEL_CODES_SNAPSHOT, settings.SASAPAY_CHANNEL_CODES_TTL
+)
@@ -0,0 +1,3 @@
+from core.http import get_client
+
+client = get_client("sasapay")
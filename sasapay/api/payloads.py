@@ -0,0 +1,145 @@
+def c2b_payload(data):
+    """
+    Request payment from a SasaPay user (C2B).
+    """
+    payload = {
+        "MerchantCode": data.get("MerchantCode"),
+        "NetworkCode": data.get("NetworkCode"),
+        "Currency": data.get("Currency", "KES"),
+        "Amount": data.get("Amount"),
+        "CallBackURL": data.get("CallBackURL"),
+        "PhoneNumber": data.get("PhoneNumber"),
+        "TransactionDesc": data.get("TransactionDesc"),
+        "AccountReference": data.get("AccountReference"),
+    }
+
+    payload = {k: v for k, v in payload.items() if v is not None}
+    return payload
+
+
+def process_payment_payload(data):
+    """
+    Complete a C2B request with the customer's verification code.
+    """
+    payload = {
+        "CheckoutRequestID": data.get('CheckoutRequestID'),
+        "MerchantCode": data.get('MerchantCode'),
+        "VerificationCode": data.get('VerificationCode')
+    }
+
+    payload = {k: v for k, v in payload.items() if v is not None}
+    return payload
+
+
+def c2b_mobile_money_payload(data):
+    """
+    Request payment from a mobile money wallet (C2B).
+    """
+    payload = {
+        "MerchantCode": data.get("MerchantCode"),
+        "NetworkCode": data.get("NetworkCode"),
+        "TransactionFee": data.get("TransactionFee"),
+        "Currency": data.get("Currency", "KES"),
+        "Amount": data.get("Amount"),
+        "CallBackURL": data.get("CallBackURL"),
+        "PhoneNumber": data.get("PhoneNumber"),
+        "TransactionDesc": data.get("TransactionDesc"),
+        "AccountReference": data.get("AccountReference"),
+    }
+
+    payload = {k: v for k, v in payload.items() if v is not None}
+    return payload
+
+
+def b2c_payload(data):
+    """
+    B2C payment request.
+    """
+    payload = {
+        "MerchantCode": data.get("MerchantCode"),
+        "MerchantTransactionReference": data.get("MerchantTransactionReference"),
+        "Amount": data.get("Amount"),
+        "Currency": data.get("Currency", "KES"),
+        "ReceiverNumber": data.get("ReceiverNumber"),
+        "Channel": data.get("Channel"),
+        "Reason": data.get("Reason"),
+        "CallBackURL": data.get("CallBackURL")
+    } 
+    return payload
+
+
+def b2b_payload(data):
+    """
+    B2B payment request.
+    """
+    payload = {
+        "MerchantCode": data.get("MerchantCode"),
+        "MerchantTransactionReference": data.get("MerchantTransactionReference"),
+        "Currency": data.get("Currency", "KES"),
+        "Amount": data.get("Amount"),
+        "ReceiverMerchantCode": data.get("ReceiverMerchantCode"),
+        "AccountReference": data.get("AccountReference"),
+        "ReceiverAccountType": data.get("ReceiverAccountType"),
+        "NetworkCode": data.get("NetworkCode"),
+        "CallBackURL": data.get("CallBackURL"),
+        "Reason": data.get("Reason")
+    }  
+    return payload
+
+
+def checkout_payload(data):
+    """
+    Hosted card checkout request.
+    """
+    payload = {
+        "MerchantCode": data.get("MerchantCode"),
+        "Amount": data.get("Amount"),
+        "Reference": data.get("Reference"),
+        "Description": data.get("Description"),
+        "Currency": data.get("Currency", "KES"),
+        "PayerEmail": data.get("PayerEmail"),
+        "CallbackUrl": data.get("CallbackUrl"),
+        "SuccessUrl": data.get("SuccessUrl"),
+        "FailureUrl": data.get("FailureUrl"),
+        "SasaPayWalletEnabled": data.get("SasaPayWalletEnabled"),
+        "MpesaEnabled": data.get("MpesaEnabled"),
+        "CardEnabled": data.get("CardEnabled"),
+        "AirtelEnabled": data.get("AirtelEnabled")
+    }  
+
+    payload = {k: v for k, v in payload.items() if v is not None}
+    return payload
+
+
+def remittance_payload(data):
+    """
+    Remittance payment request.
+    """
+    payload = {
+        "MerchantCode": data.get("MerchantCode"),
+        "MerchantTransactionReference": data.get("MerchantTransactionReference"),
+        "DestinationChannelCode": data.get("DestinationChannelCode"),
+        "DestinationChannelName": data.get("DestinationChannelName"),
+        "Currency": data.get("Currency", "KES"),
+        "Amount": data.get("Amount"),
+        "ReceiverPhoneNumber": data.get("ReceiverPhoneNumber"),
+        "ReceiverAccountNumber": data.get("ReceiverAccountNumber"),
+        "AccountReference": data.get("AccountReference"),
+        "ReceiverAccountType": data.get("ReceiverAccountType"),
+        "ReceiverAccountName": data.get("ReceiverAccountName"),
+        "ForeignCurrency": data.get("ForeignCurrency"),
+        "SenderPhoneNumber": data.get("SenderPhoneNumber"),
+        "SenderName": data.get("SenderName"),
+        "SenderDOB": data.get("SenderDOB"),
+        "SenderCountryISO": data.get("SenderCountryISO"),
+        "SenderNationality": data.get("SenderNationality"),
+        "SenderIDType": data.get("SenderIDType"),
+        "SenderIDNumber": data.get("SenderIDNumber"),
+        "SenderServiceProviderName": data.get("SenderServiceProviderName"),
+        "RemittancePurpose": data.get("RemittancePurpose"),
+        "CallbackUrl": data.get("CallbackUrl"),
+        "Remarks": data.get("Remarks")
+    }  
+
+    payload = {k: v for k, v in payload.items() if v is not None}
+    return payload
@@ -0,0 +1,30 @@
+from django.conf import settings
+
+from core.models import Transaction
+from core.payouts import PayoutChannel
+from .client import client
+from .services import token_manager
+from .payloads import b2c_payload
+
+
+class SasapayB2CChannel(PayoutChannel):
+    provider = Transaction.Provider.SASAPAY
+    client = client
+    receiver_field = "ReceiverNumber"
+    reference_field = "MerchantTransactionReference"
+    required_fields = ("MerchantCode", "Amount", "ReceiverNumber", "Channel", "CallBackURL")
+
+    def url(self):
+        return f"{settings.SASAPAY_BASE_URL}/payments/b2c/"
+
+    def get_token_manager(self):
+        return token_manager
+
+    def payload(self, row):
+        return b2c_payload(row)
+
+    def accepted(self, response, data):
+        return response.ok and isinstance(data, dict) and data.get("status", True)
+
+
+b2c_channel = SasapayB2CChannel()
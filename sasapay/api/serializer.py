@@ -1,20 +1,8 @@
 from rest_framework import serializers
-from ..models import *
+from core.models import Transaction
 
-class PaymentSerializer(serializers.ModelSerializer):
+class TransactionSerializer(serializers.ModelSerializer):
 
     class Meta:
-        model = Payment
-        fields = '__all__'
-
-class RefundSerializer(serializers.ModelSerializer):
-
-    class Meta:
-        model = Refund
-        fields = '__all__'
-
-class SubscriptionSerializer(serializers.ModelSerializer):
-
-    class Meta:
-        model = Subscription
+        model = Transaction
         fields = '__all__'
@@ -1,35 +1,51 @@
-import requests
-import json
 from requests.auth import HTTPBasicAuth
 from django.conf import settings
 
+from core.tokens import SharedTokenManager
+from .client import client
+
+
+class SasapayTokenManager(SharedTokenManager):
+    """
+    SasaPay client-credentials token, shared across every gateway worker.
+    One instance per region (KE / TZ).
+    """
+
+    def __init__(self, name, base_url, client_id, client_secret, http_client):
+        super().__init__(name)
+        self.base_url = base_url
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.http_client = http_client
+
+    def fetch_token(self):
+        url = f"{self.base_url}/auth/token/"
+        params = {"grant_type": "client_credentials"}
+
+        response = self.http_client.get(
+            url,
+            auth=HTTPBasicAuth(self.client_id, self.client_secret),
+            params=params
+        )
+        response.raise_for_status()
+
+        data = response.json()
+        return data["access_token"], data["expires_in"]
+
+
+token_manager = SasapayTokenManager(
+    "sasapay",
+    settings.SASAPAY_BASE_URL,
+    settings.SASAPAY_CLIENT_ID,
+    settings.SASAPAY_CLIENT_SECRET,
+    client,
+)
+
 
 def get_sasapay_token():
-    
-    url = "https://sandbox.sasapay.app/api/v1/auth/token/"
-    params = {"grant_type": "client_credentials"}
-
-    # Perform authenticated request
-    response = requests.get(
-        url,
-        auth=HTTPBasicAuth(settings.CLIENT_ID, settings.CLIENT_SECRET),
-        params=params
-    )
-
-    if response.status_code != 200:
-        return {
-            "payload": params,
-            "access_token": None,
-            "expires_in": None,
-            "error": f"Failed to get token (status {response.status_code})",
-        }
-
-    data = response.json()
-    access_token = data.get("access_token")
-    expires_in = data.get("expires_in")
+    access_token = token_manager.get_access_token()
 
     return {
-        "payload": params,
         "access_token": access_token,
-        "expires_in": expires_in,
+        "expires_in": token_manager.stats()["expires_in"],
     }
@@ -13,6 +13,7 @@ urlpatterns = [
     path("sasapay/ipn/", IPNView.as_view(), name="sasapay-ipn"),
 
     path("b2cpayment/", B2CPaymentRequestView.as_view(), name="b2cpayment"),
+    path("b2cpayment/batch/", B2CBatchPayoutView.as_view(), name="b2cpayment-batch"),
 
     path("b2bpayment/", B2BPaymentRequestView.as_view(), name="b2cpayment"),
 
@@ -1,42 +1,43 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
-from requests.auth import HTTPBasicAuth
 from django.conf import settings
 import requests
+from core import ledger
+from core.circuit import ProviderUnavailable
+from core.models import Transaction
+from core.api.views import BulkPayoutView
+from .channels import FETCH_ERRORS, channel_codes
+from .client import client
+from .services import token_manager
+from .payloads import *
+from .payouts import b2c_channel
 
 
 
 class SasapayAuthView(APIView):
+    """
+    Return the gateway's shared SasaPay token. Provider views authorize
+    themselves, so clients no longer need to call this first.
+    """
 
     def post(self, request):
-        url = f"{settings.SASAPAY_BASE_URL}/auth/token/"
-        params = {"grant_type": "client_credentials"}
-
-        # Use HTTP Basic Authentication
-        response = requests.get(
-            url,
-            auth=HTTPBasicAuth(settings.SASAPAY_CLIENT_ID, settings.SASAPAY_CLIENT_SECRET),
-            params=params,
-        )
-
         try:
-            res_data = response.json()
-        except ValueError:
-            res_data = {"detail": "Invalid JSON response from SasaPay."}
-
-        if response.status_code == 200:
-            return Response({
-                "status": True,
-                "message": "Token retrieved successfully",
-                "data": res_data
-            }, status=status.HTTP_200_OK)
-        else:
+            access_token = token_manager.get_access_token()
+        except requests.exceptions.RequestException as e:
             return Response({
                 "status": False,
-                "message": f"Failed to retrieve token (status {response.status_code})",
-                "data": res_data
-            }, status=response.status_code)
+                "message": f"Failed to retrieve token: {str(e)}"
+            }, status=status.HTTP_502_BAD_GATEWAY)
+
+        return Response({
+            "status": True,
+            "message": "Token retrieved successfully",
+            "data": {
+                "access_token": access_token,
+                "expires_in": token_manager.stats()["expires_in"]
+            }
+        }, status=status.HTTP_200_OK)
 
 
 class C2BPaymentRequestView(APIView):
@@ -48,42 +49,27 @@ class C2BPaymentRequestView(APIView):
     def post(self, request):
         url = f"{settings.SASAPAY_BASE_URL}/payments/request-payment/"
 
-        access_token = request.headers.get("Authorization")
-        if not access_token:
-            return Response({
-                "status": False,
-                "message": "Missing Authorization header (Bearer token required)"
-            }, status=status.HTTP_400_BAD_REQUEST)
-
         # Build payload
-        payload = {
-            "MerchantCode": request.data.get("MerchantCode"),
-            "NetworkCode": request.data.get("NetworkCode"),
-            "Currency": request.data.get("Currency", "KES"),
-            "Amount": request.data.get("Amount"),
-            "CallBackURL": request.data.get("CallBackURL"),
-            "PhoneNumber": request.data.get("PhoneNumber"),
-            "TransactionDesc": request.data.get("TransactionDesc"),
-            "AccountReference": request.data.get("AccountReference"),
-        }
-
-        # Remove empty fields
-        payload = {k: v for k, v in payload.items() if v is not None}
+        payload = c2b_payload(request.data)
 
         headers = {
-            "Authorization": access_token,
             "Content-Type": "application/json",
         }
 
         try:
-            response = requests.post(url, headers=headers, json=payload)
+            response = client.post(url, headers=headers, json=payload, token_manager=token_manager)
             res_data = response.json()
+        except ProviderUnavailable:
+            raise
         except Exception as e:
             return Response({
                 "status": False,
                 "message": f"Request to SasaPay failed: {str(e)}"
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+        if response.ok and res_data.get("status", True):
+            ledger.record(Transaction.Provider.SASAPAY, Transaction.Kind.C2B, payload, res_data)
+
         return Response({
             "status": True,
             "message": res_data.get("detail", "Request processed"),
@@ -96,29 +82,17 @@ class ProcessPayment(APIView):
     def post(self, request):
         url = f"{settings.SASAPAY_BASE_URL}/payments/process-payment/"
 
-        access_token = request.headers.get("Authorization")
-        if not access_token:
-            return Response({
-                "status": False,
-                "message": "Missing Authorization header (Bearer token required)"
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        payload = {
-            "CheckoutRequestID": request.data.get('CheckoutRequestID'),
-            "MerchantCode": request.data.get('MerchantCode'),
-            "VerificationCode": request.data.get('VerificationCode')
-        }
-
-        payload = {k: v for k, v in payload.items() if v is not None}
+        payload = process_payment_payload(request.data)
 
         headers = {
-            "Authorization": access_token,
             "Content-Type": "application/json",
         }
 
         try:
-            response = requests.post(url, headers=headers, json=payload)
+            response = client.post(url, headers=headers, json=payload, token_manager=token_manager)
             res_data = response.json()
+        except ProviderUnavailable:
+            raise
         except Exception as e:
             return Response({
                 "status": False,
@@ -141,39 +115,14 @@ class C2BPaymentMobileMoneyRequestView(APIView):
     def post(self, request):
         url = f'{settings.SASAPAY_BASE_URL}/payments/request-payment/'
 
-        # --- Check token ---
-        access_token = request.headers.get("Authorization")
-        if not access_token:
-            return Response(
-                {
-                    "status": False,
-                    "message": "Missing Authorization header (Bearer token required)"
-                },
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        payload = {
-            "MerchantCode": request.data.get("MerchantCode"),
-            "NetworkCode": request.data.get("NetworkCode"),
-            "TransactionFee": request.data.get("TransactionFee"),
-            "Currency": request.data.get("Currency", "KES"),
-            "Amount": request.data.get("Amount"),
-            "CallBackURL": request.data.get("CallBackURL"),
-            "PhoneNumber": request.data.get("PhoneNumber"),
-            "TransactionDesc": request.data.get("TransactionDesc"),
-            "AccountReference": request.data.get("AccountReference"),
-        }
-
-        # remove null/None fields
-        payload = {k: v for k, v in payload.items() if v is not None}
+        payload = c2b_mobile_money_payload(request.data)
 
         headers = {
-            "Authorization": access_token,
             "Content-Type": "application/json"
         }
 
         try:
-            response = requests.post(url, headers=headers, json=payload)
+            response = client.post(url, headers=headers, json=payload, token_manager=token_manager)
             res_data = response.json()
 
             # --- Handle SasaPay error responses gracefully ---
@@ -188,6 +137,8 @@ class C2BPaymentMobileMoneyRequestView(APIView):
                     status=response.status_code
                 )
 
+            ledger.record(Transaction.Provider.SASAPAY, Transaction.Kind.C2B, payload, res_data)
+
             # --- Success ---
             return Response(
                 {
@@ -226,12 +177,17 @@ class C2BCallbackView(APIView):
         customer_mobile = data.get("CustomerMobile")
         transaction_code = data.get("TransactionCode")
 
-        # Example logic: mark transaction as complete if successful
+        # SasaPay re-delivers callbacks it thinks timed out; acknowledge
+        # those again without applying them twice
+        if not ledger.receive_callback(Transaction.Provider.SASAPAY, Transaction.Kind.C2B, data):
+            return Response(
+                {"status": True, "message": "Duplicate callback ignored.", "data": data},
+                status=status.HTTP_200_OK,
+            )
+
         if result_code == "0":
-            # TODO: update your database, mark payment successful, etc.
             message = "Transaction processed successfully."
         else:
-            # TODO: log or flag failed transaction
             message = f"Transaction failed: {result_desc}"
 
         return Response(
@@ -260,17 +216,8 @@ class IPNView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Example: Save or update transaction record
         try:
-            # Example pseudo-code
-            # transaction = Transaction.objects.filter(bill_ref=data["BillRefNumber"]).first()
-            # if transaction:
-            #     transaction.status = "COMPLETED"
-            #     transaction.amount = data["TransAmount"]
-            #     transaction.transaction_id = data["TransID"]
-            #     transaction.payment_method = data["PaymentMethod"]
-            #     transaction.save()
-
+            received = ledger.receive_callback(Transaction.Provider.SASAPAY, Transaction.Kind.C2B, data)
             print("Processed IPN for BillRefNumber %s", data["BillRefNumber"])
         except Exception as e:
             print("Error processing IPN: %s", str(e))
@@ -279,6 +226,12 @@ class IPNView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+        if not received:
+            return Response(
+                {"status": True, "message": "Duplicate IPN ignored", "data": data},
+                status=status.HTTP_200_OK
+            )
+
         return Response(
             {"status": True, "message": "IPN received successfully", "data": data},
             status=status.HTTP_200_OK
@@ -290,33 +243,14 @@ class B2CPaymentRequestView(APIView):
     def post(self, request):
         url = f"{settings.SASAPAY_BASE_URL}/payments/b2c/"
 
-        access_token = request.headers.get("Authorization")
-        if not access_token:
-            return Response(
-                {
-                    "status": False,
-                    "message": "Missing Authorization header (Bearer token required)"
-                }, status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        payload = {
-            "MerchantCode": request.data.get("MerchantCode"),
-            "MerchantTransactionReference": request.data.get("MerchantTransactionReference"),
-            "Amount": request.data.get("Amount"),
-            "Currency": request.data.get("Currency", "KES"),
-            "ReceiverNumber": request.data.get("ReceiverNumber"),
-            "Channel": request.data.get("Channel"),
-            "Reason": request.data.get("Reason"),
-            "CallBackURL": request.data.get("CallBackURL")
-        } 
+        payload = b2c_payload(request.data)
 
         headers = {
-            "Authorization": access_token,
             "Content-Type": "application/json"
         }
 
         try:
-            response = requests.post(url, headers=headers, json=payload)
+            response = client.post(url, headers=headers, json=payload, token_manager=token_manager)
             resp_data = response.json()
              
             if not response.ok:
@@ -328,6 +262,8 @@ class B2CPaymentRequestView(APIView):
                     },
                     status=response.status_code
                 )
+            ledger.record(Transaction.Provider.SASAPAY, Transaction.Kind.B2C, payload, resp_data)
+
             return Response(
                 {
                     "status": True,
@@ -345,42 +281,33 @@ class B2CPaymentRequestView(APIView):
                 },
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-        
+
+class B2CBatchPayoutView(BulkPayoutView):
+    """
+    B2C payouts in bulk from a CSV or NDJSON upload (see BulkPayoutView).
+    """
+    channel = b2c_channel
+
+
 class B2BPaymentRequestView(APIView):
     # permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
         url = f"{settings.SASAPAY_BASE_URL}/payments/b2b/"
 
-        access_token = request.headers.get("Authorization")
-        if not access_token:
-            return Response(
-                {
-                    "status": False,
-                    "message": "Missing Authorization header (Bearer token required)"
-                }, status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        payload = {
-            "MerchantCode": request.data.get("MerchantCode"),
-            "MerchantTransactionReference": request.data.get("MerchantTransactionReference"),
-            "Currency": request.data.get("Currency", "KES"),
-            "Amount": request.data.get("Amount"),
-            "ReceiverMerchantCode": request.data.get("ReceiverMerchantCode"),
-            "AccountReference": request.data.get("AccountReference"),
-            "ReceiverAccountType": request.data.get("ReceiverAccountType"),
-            "NetworkCode": request.data.get("NetworkCode"),
-            "CallBackURL": request.data.get("CallBackURL"),
-            "Reason": request.data.get("Reason")
-        }  
+        payload = b2b_payload(request.data)
+        if not channel_codes.is_known(payload.get("NetworkCode")):
+            return Response({
+                "status": False,
+                "message": f"Unknown NetworkCode: {payload.get('NetworkCode')}"
+            }, status=status.HTTP_400_BAD_REQUEST)
 
         headers = {
-            "Authorization": access_token,
             "Content-Type": "application/json"
         }
 
         try:
-            response = requests.post(url, headers=headers, json=payload)
+            response = client.post(url, headers=headers, json=payload, token_manager=token_manager)
             resp_data = response.json()
              
             if not response.ok:
@@ -392,6 +319,8 @@ class B2BPaymentRequestView(APIView):
                     },
                     status=response.status_code
                 )
+            ledger.record(Transaction.Provider.SASAPAY, Transaction.Kind.B2B, payload, resp_data)
+
             return Response(
                 {
                     "status": True,
@@ -414,29 +343,24 @@ class ChannelCodesView(APIView):
     # permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-
-        url = f"{settings.SASAPAY_BASE_URL}/payments/channel-codes/"
-
-        access_token = request.headers.get("Authorization")
-        if not access_token:
+        try:
+            reply, _ = channel_codes.get()
+        except ProviderUnavailable:
+            raise
+        except FETCH_ERRORS as e:
             return Response(
                 {
                     "status": False,
-                    "message": "Missing Authorization header (Bearer token required)"
-                }, status=status.HTTP_400_BAD_REQUEST
+                    "message": f"Channel codes fetch failed: {str(e)}"
+                },
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-        
-        headers = {
-            "Authorization": access_token
-        }
-
-        response = requests.get(url, headers=headers)
 
         return Response(
             {
                 "status": True,
                 "message": "Channel Codes available",
-                "data": response.json()
+                "data": reply
             }, status=status.HTTP_200_OK)
     
 class CheckoutView(APIView):
@@ -445,40 +369,14 @@ class CheckoutView(APIView):
     def post(self, request):
         url = f"{settings.SASAPAY_BASE_URL}/payments/card-payments/"
 
-        access_token = request.headers.get("Authorization")
-        if not access_token:
-            return Response(
-                {
-                    "status": False,
-                    "message": "Missing Authorization header (Bearer token required)"
-                }, status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        payload = {
-            "MerchantCode": request.data.get("MerchantCode"),
-            "Amount": request.data.get("Amount"),
-            "Reference": request.data.get("Reference"),
-            "Description": request.data.get("Description"),
-            "Currency": request.data.get("Currency", "KES"),
-            "PayerEmail": request.data.get("PayerEmail"),
-            "CallbackUrl": request.data.get("CallbackUrl"),
-            "SuccessUrl": request.data.get("SuccessUrl"),
-            "FailureUrl": request.data.get("FailureUrl"),
-            "SasaPayWalletEnabled": request.data.get("SasaPayWalletEnabled"),
-            "MpesaEnabled": request.data.get("MpesaEnabled"),
-            "CardEnabled": request.data.get("CardEnabled"),
-            "AirtelEnabled": request.data.get("AirtelEnabled")
-        }  
-
-        payload = {k: v for k, v in payload.items() if v is not None}
+        payload = checkout_payload(request.data)
 
         headers = {
-            "Authorization": access_token,
             "Content-Type": "application/json"
         }
 
         try:
-            response = requests.post(url, headers=headers, json=payload)
+            response = client.post(url, headers=headers, json=payload, token_manager=token_manager)
             res_data = response.json()
 
             # --- Handle SasaPay error responses gracefully ---
@@ -492,6 +390,8 @@ class CheckoutView(APIView):
                     status=response.status_code
                 )
 
+            ledger.record(Transaction.Provider.SASAPAY, Transaction.Kind.CHECKOUT, payload, res_data)
+
             # --- Success ---
             return Response(
                 {
@@ -516,50 +416,19 @@ class RemittancePaymentView(APIView):
 
     def post(self, request):
         url = f"{settings.SASAPAY_BASE_URL}/remittances/remittance-payments/"
-        access_token = request.headers.get("Authorizaton")
-        if not access_token:
-            return Response(
-                {
-                    "status": False,
-                    "message": "Missing Authorization header (Bearer token required)"
-                }, status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        payload = {
-            "MerchantCode": request.data.get("MerchantCode"),
-            "MerchantTransactionReference": request.data.get("MerchantTransactionReference"),
-            "DestinationChannelCode": request.data.get("DestinationChannelCode"),
-            "DestinationChannelName": request.data.get("DestinationChannelName"),
-            "Currency": request.data.get("Currency", "KES"),
-            "Amount": request.data.get("Amount"),
-            "ReceiverPhoneNumber": request.data.get("ReceiverPhoneNumber"),
-            "ReceiverAccountNumber": request.data.get("ReceiverAccountNumber"),
-            "AccountReference": request.data.get("AccountReference"),
-            "ReceiverAccountType": request.data.get("ReceiverAccountType"),
-            "ReceiverAccountName": request.data.get("ReceiverAccountName"),
-            "ForeignCurrency": request.data.get("ForeignCurrency"),
-            "SenderPhoneNumber": request.data.get("SenderPhoneNumber"),
-            "SenderName": request.data.get("SenderName"),
-            "SenderDOB": request.data.get("SenderDOB"),
-            "SenderCountryISO": request.data.get("SenderCountryISO"),
-            "SenderNationality": request.data.get("SenderNationality"),
-            "SenderIDType": request.data.get("SenderIDType"),
-            "SenderIDNumber": request.data.get("SenderIDNumber"),
-            "SenderServiceProviderName": request.data.get("SenderServiceProviderName"),
-            "RemittancePurpose": request.data.get("RemittancePurpose"),
-            "CallbackUrl": request.data.get("CallbackUrl"),
-            "Remarks": request.data.get("Remarks")
-        }  
-
-        payload = {k: v for k, v in payload.items() if v is not None}
+        payload = remittance_payload(request.data)
+        if not channel_codes.is_known(payload.get("DestinationChannelCode")):
+            return Response({
+                "status": False,
+                "message": f"Unknown DestinationChannelCode: {payload.get('DestinationChannelCode')}"
+            }, status=status.HTTP_400_BAD_REQUEST)
 
         headers = {
-            "Authorization": access_token,
             "Content-Type": "application/json"
         }
 
         try:
-            response = requests.post(url, headers=headers, json=payload)
+            response = client.post(url, headers=headers, json=payload, token_manager=token_manager)
             res_data = response.json()
 
             # --- Handle SasaPay error responses gracefully ---
@@ -573,6 +442,8 @@ class RemittancePaymentView(APIView):
                     status=response.status_code
                 )
 
+            ledger.record(Transaction.Provider.SASAPAY, Transaction.Kind.REMITTANCE, payload, res_data)
+
             # --- Success ---
             return Response(
                 {
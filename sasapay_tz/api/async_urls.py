@@ -0,0 +1,20 @@
+from django.urls import path
+from .async_views import *
+from .urls import urlpatterns as sync_urlpatterns
+
+# Native async views first; auth and callbacks fall through to the sync
+# views, which Django runs in a thread.
+urlpatterns = [
+    path("c2b-tz/", AsyncC2BTZRequestView.as_view(), name="c2b-tz"),
+
+    path("ifm/", AsyncInternalFundMovement.as_view(), name="ifm"),
+
+    path("b2c-tz/", AsyncB2CPaymentRequestView.as_view(), name="b2c"),
+    path("b2b-tz/", AsyncB2BPaymentRequestView.as_view(), name="b2b"),
+
+    path("account-validation/", AsyncAccountValidationView.as_view(), name="acc-validation"),
+    path("account-validation/bulk/", AsyncBulkAccountValidationView.as_view(), name="acc-validation-bulk"),
+    path("transaction-status/", AsyncTransactionStatusView.as_view(), name="transaction-status"),
+
+    path("account-balance/", AsyncMerchantAccBalanceView.as_view(), name="acc-bal")
+] + sync_urlpatterns
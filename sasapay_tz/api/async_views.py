@@ -0,0 +1,172 @@
+from django.conf import settings
+from django.http import JsonResponse
+from rest_framework import status
+
+from core.aio import get_async_client
+from core.api.async_views import AsyncProviderView
+from core.models import Transaction
+from . import validation
+from .services import balances, status_queries, token_manager
+from .validation import account_validations
+from .payloads import *
+
+
+class AsyncSasapayTZView(AsyncProviderView):
+    http_method_names = ["post"]
+    client = get_async_client("sasapay_tz")
+    ledger_provider = Transaction.Provider.SASAPAY_TZ
+
+    def get_token_manager(self):
+        return token_manager
+
+
+class AsyncC2BTZRequestView(AsyncSasapayTZView):
+
+    async def post(self, request):
+        data, error = self.parse_or_reject(request)
+        if error:
+            return error
+
+        return await self.call_provider(
+            "POST", f"{settings.SASAPAY_TZ_BASE_URL}/payments/request-payment/",
+            "Payment request sent successfully.", "Payment request failed.", "Request to SasaPay failed",
+            check_status=True, provider_message=True, ledger_kind=Transaction.Kind.C2B, json=c2b_payload(data)
+        )
+
+
+class AsyncInternalFundMovement(AsyncSasapayTZView):
+
+    async def post(self, request):
+        data, error = self.parse_or_reject(request)
+        if error:
+            return error
+
+        return await self.call_provider(
+            "POST", f"{settings.SASAPAY_TZ_BASE_URL}/transactions/fund-movement/",
+            "Transaction completed successfully.", "Transaction failed.", "Transaction failed",
+            check_status=True, provider_message=True, json=fund_movement_payload(data)
+        )
+
+
+class AsyncB2CPaymentRequestView(AsyncSasapayTZView):
+
+    async def post(self, request):
+        data, error = self.parse_or_reject(request)
+        if error:
+            return error
+
+        return await self.call_provider(
+            "POST", f"{settings.SASAPAY_TZ_BASE_URL}/payments/b2c/",
+            "B2C Payment request sent successfully.", "B2C Transaction Failed", "B2C request failed",
+            ledger_kind=Transaction.Kind.B2C, json=b2c_payload(data)
+        )
+
+
+class AsyncB2BPaymentRequestView(AsyncSasapayTZView):
+
+    async def post(self, request):
+        data, error = self.parse_or_reject(request)
+        if error:
+            return error
+
+        return await self.call_provider(
+            "POST", f"{settings.SASAPAY_TZ_BASE_URL}/payments/b2b/",
+            "B2B Payment request sent successfully.", "B2B Transaction Failed", "B2B request failed",
+            ledger_kind=Transaction.Kind.B2B, json=b2b_payload(data)
+        )
+
+
+class AsyncAccountValidationView(AsyncSasapayTZView):
+    http_method_names = ["post", "delete"]
+
+    async def post(self, request):
+        data, error = self.parse_or_reject(request)
+        if error:
+            return error
+
+        payload = account_validation_payload(data)
+        return await self.call_provider(
+            "POST", f"{settings.SASAPAY_TZ_BASE_URL}/accounts/account-validation/",
+            "Account Validation successful.", "Account Validation Failed", "Account Validation failed",
+            coalesce=account_validations, coalesce_query=validation.query(payload), json=payload
+        )
+
+    async def delete(self, request):
+        data, error = self.parse_or_reject(request)
+        if error:
+            return error
+
+        await account_validations.ainvalidate(validation.query(account_validation_payload(data)))
+        return JsonResponse(
+            {
+                "status": True,
+                "message": "Account validation cache cleared."
+            },
+            status=status.HTTP_200_OK
+        )
+
+
+class AsyncBulkAccountValidationView(AsyncSasapayTZView):
+
+    async def post(self, request):
+        data, error = self.parse_or_reject(request)
+        if error:
+            return error
+
+        payloads, error = validation.bulk_payloads(data)
+        if error:
+            return JsonResponse({
+                "status": False,
+                "message": error
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        def send(query):
+            return self.client.request(
+                "POST", f"{settings.SASAPAY_TZ_BASE_URL}/accounts/account-validation/",
+                headers={"Content-Type": "application/json"}, token_manager=token_manager, json=query
+            )
+
+        outcomes = await account_validations.call_many_async(
+            [validation.query(payload) for payload in payloads], send,
+            settings.ACCOUNT_VALIDATION_BULK_CONCURRENCY
+        )
+        return JsonResponse(
+            {
+                "status": True,
+                "message": "Account Validation complete.",
+                "data": validation.summary([
+                    validation.result(payload, outcome) for payload, outcome in zip(payloads, outcomes)
+                ])
+            },
+            status=status.HTTP_200_OK
+        )
+
+
+class AsyncTransactionStatusView(AsyncSasapayTZView):
+
+    async def post(self, request):
+        data, error = self.parse_or_reject(request)
+        if error:
+            return error
+
+        return await self.call_provider(
+            "POST", f"{settings.SASAPAY_TZ_BASE_URL}/transactions/status-query/",
+            "Transaction Status successful.", "Transaction Status Failed", "Transaction Status failed",
+            coalesce=status_queries, json=transaction_status_payload(data)
+        )
+
+
+class AsyncMerchantAccBalanceView(AsyncSasapayTZView):
+    http_method_names = ["get"]
+
+    async def get(self, request):
+        params = {
+            "MerchantCode": request.GET.get("MerchantCode"),
+        }
+
+        return await self.call_provider(
+            "GET", f"{settings.SASAPAY_TZ_BASE_URL}/payments/check-balance/",
+            "Account balance fetch successful.", "Account balance fetch Failed",
+            "Account balance fetch failed",
+            coalesce=balances, params=params
+        )
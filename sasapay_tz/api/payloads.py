@@ -0,0 +1,93 @@
+def c2b_payload(data):
+    """
+    Request payment from a mobile money wallet (C2B).
+    """
+    payload = {
+        "MerchantCode": data.get("MerchantCode"),
+        "NetworkCode": data.get("NetworkCode"),
+        "TransactionFee": data.get("Transaction Fee"),
+        "Currency": data.get("Currency", "TZS"),
+        "Amount": data.get("Amount"),
+        "CallBackURL": data.get("CallBackURL"),
+        "PhoneNumber": data.get("PhoneNumber"),
+        "TransactionDesc": data.get("TransactionDesc"),
+        "AccountReference": data.get("AccountReference"),
+    }
+
+    payload = {k: v for k, v in payload.items() if v is not None}
+    return payload
+
+
+def fund_movement_payload(data):
+    """
+    Move funds between the merchant's own accounts.
+    """
+    payload = {
+        "merchantCode": data.get("merchantCode"),
+        "amount": data.get("amount"),
+    }
+
+    payload = {k: v for k, v in payload.items() if v is not None}
+    return payload
+
+
+def b2c_payload(data):
+    """
+    B2C payment request.
+    """
+    payload = {
+        "MerchantCode": data.get("MerchantCode"),
+        "MerchantTransactionReference": data.get("MerchantTransactionReference"),
+        "Amount": data.get("Amount"),
+        "Currency": data.get("Currency", "TZS"),
+        "ReceiverNumber": data.get("ReceiverNumber"),
+        "Channel": data.get("Channel"),
+        "Reason": data.get("Reason"),
+        "CallBackURL": data.get("CallBackURL")
+    } 
+    return payload
+
+
+def b2b_payload(data):
+    """
+    B2B payment request.
+    """
+    payload = {
+        "MerchantCode": data.get("MerchantCode"),
+        "MerchantTransactionReference": data.get("MerchantTransactionReference"),
+        "Currency": data.get("Currency", "TZS"),
+        "Amount": data.get("Amount"),
+        "ReceiverMerchantCode": data.get("ReceiverMerchantCode"),
+        "AccountReference": data.get("AccountReference"),
+        "ReceiverAccountType": data.get("ReceiverAccountType"), #PAYBILL/TILL PAYBILL requires AccountReference
+        "NetworkCode": data.get("NetworkCode"),
+        "CallBackURL": data.get("CallBackURL"),
+        "Reason": data.get("Reason")
+    }  
+    return payload
+
+
+def account_validation_payload(data):
+    """
+    Account validation request.
+    """
+    payload = {
+        "merchant_code": data.get("merchant_code"),
+        "channel_code": data.get("channel_code"),
+        "account_number": data.get("account_number"),
+    }  
+    return payload
+
+
+def transaction_status_payload(data):
+    """
+    Transaction status query.
+    """
+    payload = {
+        "MerchantCode": data.get("MerchantCode"),
+        "CheckoutRequestId": data.get("CheckoutRequestId"),
+        "MerchantTransactionReference": data.get("MerchantTransactionReference"),
+        "TransactionCode": data.get("TransactionCode"),
+        "CallbackUrl": data.get("CallbackUrl")
+    }
+    return payload
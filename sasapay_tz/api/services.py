@@ -0,0 +1,17 @@
+from django.conf import settings
+
+from core.coalesce import Coalescer
+from sasapay.api.services import SasapayTokenManager
+from .client import client
+
+
+token_manager = SasapayTokenManager(
+    "sasapay_tz",
+    settings.SASAPAY_TZ_BASE_URL,
+    settings.SASAPAY_TZ_CLIENT_ID,
+    settings.SASAPAY_TZ_CLIENT_SECRET,
+    client,
+)
+
+status_queries = Coalescer("sasapay_tz.transaction_status")
+balances = Coalescer("sasapay_tz.balance", ttl=settings.BALANCE_CACHE_TTL)
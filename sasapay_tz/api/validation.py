@@ -0,0 +1,85 @@
+"""
+Cached SasaPay TZ account validation.
+
+A (merchant_code, channel_code, account_number) triple is validated upstream
+once and the answer kept for ``ACCOUNT_VALIDATION_TTL``; an account SasaPay
+rejects is remembered for the shorter ``ACCOUNT_VALIDATION_NEGATIVE_TTL``.
+Failures (5xx, timeouts) are never cached.
+"""
+from django.conf import settings
+
+from core.coalesce import Coalescer
+from .payloads import account_validation_payload
+
+FIELDS = ("merchant_code", "channel_code", "account_number")
+
+account_validations = Coalescer(
+    "sasapay_tz.account_validation",
+    ttl=settings.ACCOUNT_VALIDATION_TTL,
+    negative_ttl=settings.ACCOUNT_VALIDATION_NEGATIVE_TTL,
+)
+
+
+def query(payload):
+    """
+    The cache identity of a validation request: the triple as strings.
+    """
+    return {field: str(payload[field]).strip() for field in FIELDS if payload.get(field) is not None}
+
+
+def bulk_payloads(data):
+    """
+    Validation payloads for a bulk request ``{"accounts": [...]}``, where
+    top-level ``merchant_code`` / ``channel_code`` apply to every account
+    that doesn't set them. Returns ``(payloads, None)`` or ``(None, error)``.
+    """
+    accounts = data.get("accounts") if isinstance(data, dict) else None
+    if not isinstance(accounts, list) or not accounts:
+        return None, "accounts must be a non-empty list"
+    if len(accounts) > settings.ACCOUNT_VALIDATION_BULK_MAX:
+        return None, f"At most {settings.ACCOUNT_VALIDATION_BULK_MAX} accounts per request"
+
+    defaults = {field: data[field] for field in FIELDS[:2] if data.get(field) is not None}
+    payloads = []
+    for number, account in enumerate(accounts, 1):
+        if not isinstance(account, dict):
+            return None, f"Account {number} must be an object"
+        payload = account_validation_payload({**defaults, **account})
+        missing = [field for field in FIELDS if payload.get(field) in (None, "")]
+        if missing:
+            return None, f"Account {number} is missing {', '.join(missing)}"
+        payloads.append(payload)
+    return payloads, None
+
+
+def result(payload, outcome):
+    """
+    One entry of a bulk response for ``outcome``, a ``Reply`` or the
+    exception its call raised. ``valid`` is None when SasaPay could not
+    answer.
+    """
+    entry = dict(query(payload))
+    if isinstance(outcome, Exception):
+        entry.update(valid=None, message=f"Account Validation failed: {str(outcome)}")
+        return entry
+    try:
+        data = outcome.json()
+    except ValueError:
+        data = None
+    if outcome.refused:
+        valid = False
+    elif outcome.is_success:
+        valid = True
+    else:
+        valid = None
+    entry.update(valid=valid, status_code=outcome.status_code, data=data)
+    return entry
+
+
+def summary(results):
+    return {
+        "valid": sum(1 for entry in results if entry["valid"] is True),
+        "invalid": sum(1 for entry in results if entry["valid"] is False),
+        "failed": sum(1 for entry in results if entry["valid"] is None),
+        "results": results,
+    }
@@ -1,42 +1,44 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
-from requests.auth import HTTPBasicAuth
 from django.conf import settings
 import requests
+from core import ledger
+from core.models import Transaction
+from core.api.views import BulkPayoutView
+from .client import client
+from . import validation
+from .services import balances, status_queries, token_manager
+from .validation import account_validations
+from .payloads import *
+from .payouts import b2c_channel
 
 
 
 class SasapayTZAuthView(APIView):
+    """
+    Return the gateway's shared SasaPay token. Provider views authorize
+    themselves, so clients no longer need to call this first.
+    """
 
     def post(self, request):
-        url = f"{settings.SASAPAY_TZ_BASE_URL}/auth/token/"
-        params = {"grant_type": "client_credentials"}
-
-        # Use HTTP Basic Authentication
-        response = requests.get(
-            url,
-            auth=HTTPBasicAuth(settings.SASAPAY_TZ_CLIENT_ID, settings.SASAPAY_TZ_CLIENT_SECRET),
-            params=params,
-        )
-
         try:
-            res_data = response.json()
-        except ValueError:
-            res_data = {"detail": "Invalid JSON response from SasaPay."}
-
-        if response.status_code == 200:
-            return Response({
-                "status": True,
-                "message": "Token retrieved successfully",
-                "data": res_data
-            }, status=status.HTTP_200_OK)
-        else:
+            access_token = token_manager.get_access_token()
+        except requests.exceptions.RequestException as e:
             return Response({
                 "status": False,
-                "message": f"Failed to retrieve token (status {response.status_code})",
-                "data": res_data
-            }, status=response.status_code)
+                "message": f"Failed to retrieve token: {str(e)}"
+            }, status=status.HTTP_502_BAD_GATEWAY)
+
+        return Response({
+            "status": True,
+            "message": "Token retrieved successfully",
+            "data": {
+                "access_token": access_token,
+                "expires_in": token_manager.stats()["expires_in"]
+            }
+        }, status=status.HTTP_200_OK)
+
         
 class C2BTZRequestView(APIView):
     # permission_classes = [permissions.IsAuthenticated]
@@ -44,39 +46,14 @@ class C2BTZRequestView(APIView):
     def post(self, request):
         url = f'{settings.SASAPAY_TZ_BASE_URL}/payments/request-payment/'
 
-        # --- Check token ---
-        access_token = request.headers.get("Authorization")
-        if not access_token:
-            return Response(
-                {
-                    "status": False,
-                    "message": "Missing Authorization header (Bearer token required)"
-                },
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        payload = {
-            "MerchantCode": request.data.get("MerchantCode"),
-            "NetworkCode": request.data.get("NetworkCode"),
-            "TransactionFee": request.data.get("Transaction Fee"),
-            "Currency": request.data.get("Currency", "TZS"),
-            "Amount": request.data.get("Amount"),
-            "CallBackURL": request.data.get("CallBackURL"),
-            "PhoneNumber": request.data.get("PhoneNumber"),
-            "TransactionDesc": request.data.get("TransactionDesc"),
-            "AccountReference": request.data.get("AccountReference"),
-        }
-
-        # remove null/None fields
-        payload = {k: v for k, v in payload.items() if v is not None}
+        payload = c2b_payload(request.data)
 
         headers = {
-            "Authorization": access_token,
             "Content-Type": "application/json"
         }
 
         try:
-            response = requests.post(url, headers=headers, json=payload)
+            response = client.post(url, headers=headers, json=payload, token_manager=token_manager)
             res_data = response.json()
 
             # --- Handle SasaPay error responses gracefully ---
@@ -91,6 +68,8 @@ class C2BTZRequestView(APIView):
                     status=response.status_code
                 )
 
+            ledger.record(Transaction.Provider.SASAPAY_TZ, Transaction.Kind.C2B, payload, res_data)
+
             # --- Success ---
             return Response(
                 {
@@ -131,12 +110,17 @@ class C2BTZCallbackView(APIView):
         trans_date = data.get("TransactionDate")
         third_party_transaction_id = data.get("ThirdPartyTransID")
 
-        # Example logic: mark transaction as complete if successful
+        # SasaPay re-delivers callbacks it thinks timed out; acknowledge
+        # those again without applying them twice
+        if not ledger.receive_callback(Transaction.Provider.SASAPAY_TZ, Transaction.Kind.C2B, data):
+            return Response(
+                {"status": True, "message": "Duplicate callback ignored.", "data": data},
+                status=status.HTTP_200_OK,
+            )
+
         if result_code == "0":
-            # TODO: update your database, mark payment successful, etc.
             message = "Transaction processed successfully."
         else:
-            # TODO: log or flag failed transaction
             message = f"Transaction failed: {result_desc}"
 
         return Response(
@@ -165,17 +149,8 @@ class IPNView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Example: Save or update transaction record
         try:
-            # Example pseudo-code
-            # transaction = Transaction.objects.filter(bill_ref=data["BillRefNumber"]).first()
-            # if transaction:
-            #     transaction.status = "COMPLETED"
-            #     transaction.amount = data["TransAmount"]
-            #     transaction.transaction_id = data["TransID"]
-            #     transaction.payment_method = data["PaymentMethod"]
-            #     transaction.save()
-
+            received = ledger.receive_callback(Transaction.Provider.SASAPAY_TZ, Transaction.Kind.C2B, data)
             print("Processed IPN for BillRefNumber %s", data["BillRefNumber"])
         except Exception as e:
             print("Error processing IPN: %s", str(e))
@@ -184,6 +159,12 @@ class IPNView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+        if not received:
+            return Response(
+                {"status": True, "message": "Duplicate IPN ignored", "data": data},
+                status=status.HTTP_200_OK
+            )
+
         return Response(
             {"status": True, "message": "IPN received successfully", "data": data},
             status=status.HTTP_200_OK
@@ -193,31 +174,14 @@ class InternalFundMovement(APIView):
 
     def post(self, request):
         url = f'{settings.SASAPAY_TZ_BASE_URL}/transactions/fund-movement/'
-        access_token = request.headers.get("Authorization")
-        if not access_token:
-            return Response(
-                {
-                    "status": False,
-                    "message": "Missing Authorization header (Bearer token required)"
-                },
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        payload = {
-            "merchantCode": request.data.get("merchantCode"),
-            "amount": request.data.get("amount"),
-        }
-
-        # remove null/None fields
-        payload = {k: v for k, v in payload.items() if v is not None}
+        payload = fund_movement_payload(request.data)
 
         headers = {
-            "Authorization": access_token,
             "Content-Type": "application/json"
         }
 
         try:
-            response = requests.post(url, headers=headers, json=payload)
+            response = client.post(url, headers=headers, json=payload, token_manager=token_manager)
             res_data = response.json()
 
             # --- Handle SasaPay error responses gracefully ---
@@ -257,29 +221,9 @@ class B2CPaymentRequestView(APIView):
     def post(self, request):
         url = f"{settings.SASAPAY_TZ_BASE_URL}/payments/b2c/"
 
-        access_token = request.headers.get("Authorization")
-        print("TOKEN: ", access_token)
-        if not access_token:
-            return Response(
-                {
-                    "status": False,
-                    "message": "Missing Authorization header (Bearer token required)"
-                }, status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        payload = {
-            "MerchantCode": request.data.get("MerchantCode"),
-            "MerchantTransactionReference": request.data.get("MerchantTransactionReference"),
-            "Amount": request.data.get("Amount"),
-            "Currency": request.data.get("Currency", "TZS"),
-            "ReceiverNumber": request.data.get("ReceiverNumber"),
-            "Channel": request.data.get("Channel"),
-            "Reason": request.data.get("Reason"),
-            "CallBackURL": request.data.get("CallBackURL")
-        } 
+        payload = b2c_payload(request.data)
 
         headers = {
-            "Authorization": access_token,
             "Content-Type": "application/json"
         }
         print("URL:", url)
@@ -287,7 +231,7 @@ class B2CPaymentRequestView(APIView):
         print("PAYLOAD:", payload)
 
         try:
-            response = requests.post(url, headers=headers, json=payload)
+            response = client.post(url, headers=headers, json=payload, token_manager=token_manager)
             print("RAW RESPONSE:", response.text)
             resp_data = response.json()
              
@@ -300,6 +244,8 @@ class B2CPaymentRequestView(APIView):
                     },
                     status=response.status_code
                 )
+            ledger.record(Transaction.Provider.SASAPAY_TZ, Transaction.Kind.B2C, payload, resp_data)
+
             return Response(
                 {
                     "status": True,
@@ -317,43 +263,28 @@ class B2CPaymentRequestView(APIView):
                 },
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-        
+
+class B2CBatchPayoutView(BulkPayoutView):
+    """
+    B2C payouts in bulk from a CSV or NDJSON upload (see BulkPayoutView).
+    """
+    channel = b2c_channel
+
+
 class B2BPaymentRequestView(APIView):
     # permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
         url = f"{settings.SASAPAY_TZ_BASE_URL}/payments/b2b/"
 
-        access_token = request.headers.get("Authorization")
-        
-        if not access_token:
-            return Response(
-                {
-                    "status": False,
-                    "message": "Missing Authorization header (Bearer token required)"
-                }, status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        payload = {
-            "MerchantCode": request.data.get("MerchantCode"),
-            "MerchantTransactionReference": request.data.get("MerchantTransactionReference"),
-            "Currency": request.data.get("Currency", "TZS"),
-            "Amount": request.data.get("Amount"),
-            "ReceiverMerchantCode": request.data.get("ReceiverMerchantCode"),
-            "AccountReference": request.data.get("AccountReference"),
-            "ReceiverAccountType": request.data.get("ReceiverAccountType"), #PAYBILL/TILL PAYBILL requires AccountReference
-            "NetworkCode": request.data.get("NetworkCode"),
-            "CallBackURL": request.data.get("CallBackURL"),
-            "Reason": request.data.get("Reason")
-        }  
+        payload = b2b_payload(request.data)
 
         headers = {
-            "Authorization": access_token,
             "Content-Type": "application/json"
         }
 
         try:
-            response = requests.post(url, headers=headers, json=payload)
+            response = client.post(url, headers=headers, json=payload, token_manager=token_manager)
             resp_data = response.json()
              
             if not response.ok:
@@ -365,6 +296,8 @@ class B2BPaymentRequestView(APIView):
                     },
                     status=response.status_code
                 )
+            ledger.record(Transaction.Provider.SASAPAY_TZ, Transaction.Kind.B2B, payload, resp_data)
+
             return Response(
                 {
                     "status": True,
@@ -389,29 +322,17 @@ class AccountValidationView(APIView):
     def post(self, request):
         url = f'{settings.SASAPAY_TZ_BASE_URL}/accounts/account-validation/'
 
-        access_token = request.headers.get("Authorization")
-        
-        if not access_token:
-            return Response(
-                {
-                    "status": False,
-                    "message": "Missing Authorization header (Bearer token required)"
-                }, status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        payload = {
-            "merchant_code": request.data.get("merchant_code"),
-            "channel_code": request.data.get("channel_code"),
-            "account_number": request.data.get("account_number"),
-        }  
+        payload = account_validation_payload(request.data)
 
         headers = {
-            "Authorization": access_token,
             "Content-Type": "application/json"
         }
 
         try:
-            response = requests.post(url, headers=headers, json=payload)
+            response = account_validations.call(
+                validation.query(payload),
+                lambda: client.post(url, headers=headers, json=payload, token_manager=token_manager)
+            )
             resp_data = response.json()
              
             if not response.ok:
@@ -440,36 +361,74 @@ class AccountValidationView(APIView):
                 },
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+    def delete(self, request):
+        """
+        Forget the cached result for an account, e.g. once it has been opened.
+        """
+        account_validations.invalidate(validation.query(account_validation_payload(request.data)))
+        return Response(
+            {
+                "status": True,
+                "message": "Account validation cache cleared."
+            },
+            status=status.HTTP_200_OK
+        )
+
+
+class BulkAccountValidationView(APIView):
+    """
+    Validate up to ACCOUNT_VALIDATION_BULK_MAX accounts in one request:
+    ``{"merchant_code": ..., "channel_code": ..., "accounts": [{"account_number": ...}]}``.
+    Cached answers are returned as they are and only the rest are checked
+    with SasaPay, in parallel.
+    """
+
+    def post(self, request):
+        url = f'{settings.SASAPAY_TZ_BASE_URL}/accounts/account-validation/'
+
+        payloads, error = validation.bulk_payloads(request.data)
+        if error:
+            return Response({
+                "status": False,
+                "message": error
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        headers = {
+            "Content-Type": "application/json"
+        }
+
+        outcomes = account_validations.call_many(
+            [validation.query(payload) for payload in payloads],
+            lambda query: client.post(url, headers=headers, json=query, token_manager=token_manager),
+            settings.ACCOUNT_VALIDATION_BULK_CONCURRENCY
+        )
+        return Response(
+            {
+                "status": True,
+                "message": "Account Validation complete.",
+                "data": validation.summary([
+                    validation.result(payload, outcome) for payload, outcome in zip(payloads, outcomes)
+                ])
+            },
+            status=status.HTTP_200_OK
+        )
         
 class TransactionStatusView(APIView):
 
     def post(self, request):
         url = f'{settings.SASAPAY_TZ_BASE_URL}/transactions/status-query/'
 
-        access_token = request.headers.get("Authorization")
-        if not access_token:
-            return Response(
-                {
-                    "status": True,
-                    "message": ""
-                }, status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        payload = {
-            "MerchantCode": request.data.get("MerchantCode"),
-            "CheckoutRequestId": request.data.get("CheckoutRequestId"),
-            "MerchantTransactionReference": request.data.get("MerchantTransactionReference"),
-            "TransactionCode": request.data.get("TransactionCode"),
-            "CallbackUrl": request.data.get("CallbackUrl")
-        }
+        payload = transaction_status_payload(request.data)
 
         headers = {
-            "Authorization": access_token,
             "Content-Type": "application/json"        
         }
 
         try:
-            response = requests.post(url, headers=headers, json=payload)
+            response = status_queries.call(
+                payload, lambda: client.post(url, headers=headers, json=payload, token_manager=token_manager)
+            )
             resp_data = response.json()
              
             if not response.ok:
@@ -504,26 +463,18 @@ class MerchantAccBalanceView(APIView):
     def get(self, request):
         url = f'{settings.SASAPAY_TZ_BASE_URL}/payments/check-balance/'
 
-        access_token = request.headers.get("Authorization")
-        if not access_token:
-            return Response(
-                {
-                    "status": True,
-                    "message": ""
-                }, status=status.HTTP_400_BAD_REQUEST
-            )
-        
         params = {
             "MerchantCode": request.query_params.get("MerchantCode"),
         }
 
         headers = {
-            "Authorization": access_token,
             "Content-Type": "application/json"        
         }
 
         try:
-            response = requests.get(url, headers=headers, params=params)
+            response = balances.call(
+                params, lambda: client.get(url, headers=headers, params=params, token_manager=token_manager)
+            )
             resp_data = response.json()
              
             if not response.ok: